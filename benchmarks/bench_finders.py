@@ -0,0 +1,197 @@
+"""
+Measures the latency, number of requests and throughput of each finder, and of looking up projects end to end with
+every finder as get_funders.py's batch mode does, against a local stub of the services the finders query (see
+`stub_server`). Runs without network access or credentials, so the effect of a change to a finder or to
+`get_project_funders` can be compared before and after, e.g.
+
+    PYTHONPATH='.' python3 benchmarks/bench_finders.py
+    PYTHONPATH='.' python3 benchmarks/bench_finders.py --sources tidelift --repos 1000 --latency 50 --error_rate 0.01
+
+A project's latency is the time from when its first finder starts to when its last finder finishes.
+"""
+
+import argparse
+import logging
+import math
+import os
+import time
+
+from benchmarks.stub_server import StubConfig, StubServer, redirect_session
+from funderfinder.get_funders import get_batch_project_funders
+from funderfinder.sources import config
+from funderfinder.utils.transport import get_session, set_cache
+
+# The finders refuse to run without credentials; these are only ever sent to the stub
+STUB_CREDENTIALS = {
+    "GITHUB_TOKEN": "stub-token",
+    "GITHUB_USERNAME": "stub-user",
+    "OPENCOLLECTIVE_API_KEY": "stub-key",
+}
+
+
+def time_finder(finder_class, timings: list):
+    """
+    Subclasses a finder to record when each of its runs starts and finishes
+    :param finder_class: Finder subclass
+    :param timings: List to append a (repo name, start, end) tuple to after each run
+    :return: Finder subclass
+    """
+
+    def run(self, gh_project_slug=None) -> list:
+        start = time.perf_counter()
+        try:
+            return finder_class.run(self, gh_project_slug)
+        finally:
+            timings.append((gh_project_slug, start, time.perf_counter()))
+
+    return type(finder_class.__name__, (finder_class,), {"run": run})
+
+
+def get_repo_names(num_repos: int, repos_per_owner: int) -> list:
+    """
+    Names the projects to look up. Owners have several projects, as in real inputs, so that lookups of owner-level
+    signals can be shared
+    :param num_repos: Number of projects
+    :param repos_per_owner: Number of projects of each owner
+    :return: List of GitHub identifiers
+    """
+    return [f"owner{idx // repos_per_owner}/project{idx}" for idx in range(num_repos)]
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    """
+    Returns a nearest-rank percentile
+    :param values: Non-empty list of values
+    :param percentile: Percentile, between 0 and 100
+    :return: Percentile of the values
+    """
+    values = sorted(values)
+    return values[max(math.ceil(percentile / 100 * len(values)) - 1, 0)]
+
+
+def measure(
+    finders: list,
+    repo_names: list,
+    server: StubServer,
+    max_concurrent_repos: int,
+) -> dict:
+    """
+    Looks up projects with a set of finders, as get_funders.py's batch mode does
+    :param finders: Finder subclasses to run
+    :param repo_names: GitHub identifiers of the projects to look up
+    :param server: Stub server the finders' requests are sent to
+    :param max_concurrent_repos: Number of projects to look up at once
+    :return: Dict of the p50 and p99 latency per project in ms, the number of requests per project, the number of
+        projects looked up per second and the number of projects whose lookup failed
+    """
+    server.reset()
+    timings = []
+    timed_finders = [time_finder(finder_class, timings) for finder_class in finders]
+    start = time.perf_counter()
+    results = list(
+        get_batch_project_funders(
+            repo_names, max_concurrent_repos, finders=timed_finders
+        )
+    )
+    elapsed = time.perf_counter() - start
+    spans = {}
+    for repo_name, run_start, run_end in timings:
+        first, last = spans.get(repo_name, (run_start, run_end))
+        spans[repo_name] = (min(first, run_start), max(last, run_end))
+    latencies = [(last - first) * 1000 for first, last in spans.values()]
+    return {
+        "p50_ms": get_percentile(latencies, 50),
+        "p99_ms": get_percentile(latencies, 99),
+        "requests_per_repo": sum(server.counts.values()) / len(repo_names),
+        "repos_per_sec": len(repo_names) / elapsed,
+        "errors": sum("error" in result for result in results),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=list(config.FINDERS),
+        help="Finders to benchmark. Defaults to all finders",
+    )
+    parser.add_argument(
+        "--repos",
+        nargs="+",
+        type=int,
+        default=[1, 10, 1000],
+        help="Numbers of projects to look up",
+    )
+    parser.add_argument("--repos_per_owner", type=int, default=4)
+    parser.add_argument("--max_concurrent_repos", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=20, help="Minimum latency of the stub in ms"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=10, help="Random latency added, in ms"
+    )
+    parser.add_argument(
+        "--error_rate",
+        type=float,
+        default=0,
+        help="Fraction of requests the stub fails with a 502",
+    )
+    parser.add_argument(
+        "--rate_limit",
+        type=int,
+        default=5000,
+        help="Number of GitHub REST and GraphQL requests the stub allows per window",
+    )
+    parser.add_argument(
+        "--rate_limit_window",
+        type=float,
+        default=3600,
+        help="Number of seconds after which the stub's rate limit budgets reset",
+    )
+    parser.add_argument(
+        "--funded_rate",
+        type=float,
+        default=0.3,
+        help="Share of projects the stub reports each funding signal for",
+    )
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    os.environ.update(STUB_CREDENTIALS)
+
+    server = StubServer(
+        StubConfig(
+            latency=args.latency / 1000,
+            jitter=args.jitter / 1000,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            rate_limit_window=args.rate_limit_window,
+            funded_rate=args.funded_rate,
+        )
+    ).start()
+    set_cache(None)
+    redirect_session(get_session(), server.url)
+    finders = config.get_finders(args.sources)
+    # Import the HTTP stack, load the bundled datasets and open connections before anything is timed
+    measure(finders, ["warmup/warmup"], server, 1)
+
+    print(
+        f"{'finder':<22} {'repos':>6} {'p50 ms':>9} {'p99 ms':>9} {'req/repo':>9} {'repos/s':>9} "
+        f"{'errors':>7}"
+    )
+    for label, selected in [
+        *[(finder_class.name, [finder_class]) for finder_class in finders],
+        ("End to end", finders),
+    ]:
+        for num_repos in args.repos:
+            stats = measure(
+                selected,
+                get_repo_names(num_repos, args.repos_per_owner),
+                server,
+                args.max_concurrent_repos,
+            )
+            print(
+                f"{label:<22} {num_repos:>6} {stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f} "
+                f"{stats['requests_per_repo']:>9.2f} {stats['repos_per_sec']:>9.1f} {stats['errors']:>7}"
+            )
+    server.shutdown()
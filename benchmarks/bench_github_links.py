@@ -0,0 +1,117 @@
+"""
+Compares the throughput of extracting GitHub links from the pages the dataset builders crawl with the original
+regexes (a findall for repos, then another for owners, or a search for the first repo) and with the single-pass
+extractor in `funderfinder.utils.utils`. Runs on synthetic pages by default, on saved pages, or on every page in a
+page archive recorded by the builders, e.g.
+
+    PYTHONPATH='.' python3 -m funderfinder.utils.list_numfocus --output_file numfocus.jsonl --archive_file pages.sqlite
+    PYTHONPATH='.' python3 benchmarks/bench_github_links.py --archive_file pages.sqlite
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.fixtures import build_project_page, build_repo_page
+from funderfinder.utils.list_gsoc import get_link_matches
+from funderfinder.utils.page_archive import PageArchive
+from funderfinder.utils.utils import (
+    GITHUB_ORG_PATTERN,
+    GITHUB_REPO_PATTERN,
+    find_github_repo,
+)
+
+
+def get_legacy_link_matches(text: str) -> list:
+    """
+    The original `list_gsoc.get_link_matches`
+    :param text: Text that may contain github links
+    :return: List of orgs and/or repos
+    """
+    repo_matches = re.findall(GITHUB_REPO_PATTERN, text)
+    if repo_matches:
+        return list(set([repo_match[1] for repo_match in repo_matches]))
+    org_matches = re.findall(GITHUB_ORG_PATTERN, text)
+    if org_matches:
+        return list(set([org_match[1] for org_match in org_matches]))
+    return []
+
+
+def find_legacy_github_repo(text: str) -> str:
+    """
+    The original `list_numfocus.get_github_link`, without the manual mapping
+    :param text: Text that may contain github links
+    :return: The first repo found, or None
+    """
+    match = re.search(GITHUB_REPO_PATTERN, text)
+    return None if not match else match.group(2)
+
+
+def get_pages(paths: list, archive_file: str) -> dict:
+    """
+    Reads saved or archived pages, or builds synthetic ones
+    :param paths: Paths to saved pages
+    :param archive_file: Path to a page archive, if any
+    :return: Dict mapping page names to their text. If no pages were given, synthetic pages are used
+    """
+    pages = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages[path] = f.read()
+    if archive_file:
+        archive = PageArchive(archive_file)
+        for url in archive.get_urls():
+            pages[url] = archive.get(url).body.decode("utf-8", errors="replace")
+        archive.close()
+    if pages:
+        return pages
+    pages = {
+        f"synthetic project {seed}": build_project_page(num_links=seed % 4, seed=seed)
+        for seed in range(200)
+    }
+    pages["synthetic repo page"] = build_repo_page()
+    return pages
+
+
+def measure(extract, pages: dict, repeat: int) -> tuple:
+    """
+    Measures an extractor's throughput over a corpus
+    :param extract: Function taking a page's text
+    :param pages: Dict mapping page names to their text
+    :param repeat: Number of times to run over the corpus
+    :return: Tuple of the dict mapping page names to the extractor's results, and its throughput in MB/s
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        results = {name: extract(text) for name, text in pages.items()}
+    elapsed = time.process_time() - start
+    size = sum(len(text) for text in pages.values()) * repeat
+    return results, size / max(elapsed, 1e-9) / 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="*", default=[], help="Saved pages")
+    parser.add_argument("--archive_file", help="Page archive recorded by the builders")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = get_pages(args.pages, args.archive_file)
+    size_kb = sum(len(text) for text in pages.values()) // 1024
+    print(f"{len(pages)} pages, {size_kb} KB")
+    for label, legacy, fast in [
+        ("All links", get_legacy_link_matches, get_link_matches),
+        ("First repo", find_legacy_github_repo, find_github_repo),
+    ]:
+        legacy_results, legacy_mbs = measure(legacy, pages, args.repeat)
+        fast_results, fast_mbs = measure(fast, pages, args.repeat)
+        for name in pages:
+            expected, actual = legacy_results[name], fast_results[name]
+            if isinstance(expected, list):
+                expected, actual = sorted(expected), sorted(actual)
+            if expected != actual:
+                raise ValueError(f"Results differ for {name}: {expected} != {actual}")
+        print(
+            f"{label}: regexes {legacy_mbs:.1f} MB/s; single pass {fast_mbs:.1f} MB/s "
+            f"({fast_mbs / legacy_mbs:.1f}x faster)"
+        )
@@ -0,0 +1,86 @@
+"""
+Compares the CPU time and peak memory of extracting a repo's funding sources by parsing its whole GitHub page with
+BeautifulSoup, and by only parsing the page's sidebar. Runs on synthetic pages by default, or on saved pages, e.g.
+
+    curl -s https://github.com/babel/babel > babel.html
+    PYTHONPATH='.' python3 benchmarks/bench_github_sources.py --pages babel.html
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+
+from benchmarks.fixtures import build_repo_page
+from funderfinder.utils.github_sources import (
+    parse_funding_sources,
+    parse_page_funding_sources,
+)
+
+
+def measure(parse, repo: str, html: str, repeat: int) -> tuple:
+    """
+    Measures a parser's CPU time and peak memory
+    :param parse: Function taking a repo identifier and its page's HTML
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param html: HTML of the repo's page
+    :param repeat: Number of times to run the parser
+    :return: Tuple of the parser's result, its mean CPU time in ms, and its peak memory in KB
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        result = parse(repo, html)
+    cpu_ms = (time.process_time() - start) * 1000 / repeat
+    tracemalloc.start()
+    parse(repo, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, cpu_ms, peak / 1024
+
+
+def get_pages(paths: list) -> dict:
+    """
+    Reads saved pages, or builds synthetic ones
+    :param paths: Paths to saved pages, named after their repo's name. If empty, synthetic pages are used
+    :return: Dict mapping page names to their HTML
+    """
+    if not paths:
+        return {
+            "synthetic (sponsored)": build_repo_page(sponsored=True),
+            "synthetic (no sponsors)": build_repo_page(sponsored=False),
+            "synthetic (large, sponsored)": build_repo_page(
+                num_files=600, num_sections=200
+            ),
+        }
+    pages = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages[path] = f.read()
+    return pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="*", default=[], help="Saved repo pages")
+    parser.add_argument(
+        "--repo",
+        default="example/project",
+        help="GitHub repo identifier the pages are treated as belonging to",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    for name, html in get_pages(args.pages).items():
+        full, full_ms, full_kb = measure(
+            parse_page_funding_sources, args.repo, html, args.repeat
+        )
+        fast, fast_ms, fast_kb = measure(
+            parse_funding_sources, args.repo, html, args.repeat
+        )
+        if full != fast:
+            raise ValueError(f"Results differ for {name}: {full} != {fast}")
+        print(
+            f"{name} ({len(html) // 1024} KB): whole page {full_ms:.1f} ms, {full_kb:.0f} KB peak; "
+            f"sidebar {fast_ms:.1f} ms, {fast_kb:.0f} KB peak ({full_ms / max(fast_ms, 1e-3):.0f}x faster)"
+        )
@@ -0,0 +1,216 @@
+"""
+Synthetic pages for benchmarks. Repo pages follow the structure of a github.com repo page (a header, the file listing
+and its embedded JSON payload, the rendered README, then the sidebar and footer) and are about as large as a real
+page. Project pages stand in for the GSOC and NumFOCUS pages the dataset builders extract GitHub links from. Unlike
+saved pages, they don't go stale when the sites change their markup
+"""
+
+import json
+import random
+
+SPONSOR_LINKS = [
+    "/sponsors",
+    "https://opencollective.com/{name}",
+    "https://www.patreon.com/{name}",
+    "https://tidelift.com/funding/github/pypi/{name}",
+]
+
+
+def build_file_rows(rng: random.Random, repo: str, num_files: int) -> str:
+    rows = []
+    for idx in range(num_files):
+        name = f"module_{idx}.py"
+        rows.append(
+            f'<tr class="react-directory-row"><td class="react-directory-row-name-cell-large-screen">'
+            f'<svg aria-hidden="true" class="octicon octicon-file"><path d="M2 1.75C2 .784"></path></svg>'
+            f'<a title="{name}" aria-label="{name}, (File)" class="Link--primary" href="/{repo}/blob/main/{name}">'
+            f"{name}</a></td>"
+            f'<td class="react-directory-row-commit-cell"><a class="Link--secondary" '
+            f'href="/{repo}/commit/{rng.getrandbits(64):016x}">Fix issue #{rng.randint(1, 9999)}</a></td>'
+            f'<td><relative-time datetime="2023-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T12:00:00Z">'
+            f"last month</relative-time></td></tr>"
+        )
+    return "\n".join(rows)
+
+
+def build_payload(rng: random.Random, repo: str, num_files: int) -> str:
+    payload = {
+        "props": {
+            "initialPayload": {
+                "repo": {"ownerLogin": repo.split("/")[0], "name": repo.split("/")[1]},
+                "tree": {
+                    "items": [
+                        {
+                            "name": f"module_{idx}.py",
+                            "path": f"module_{idx}.py",
+                            "contentType": "file",
+                            "oid": f"{rng.getrandbits(128):032x}",
+                        }
+                        for idx in range(num_files)
+                    ]
+                },
+                "blob": {"rawLines": ["x = 1 < 2 and 3 > 2"] * (num_files * 20)},
+            }
+        }
+    }
+    return json.dumps(payload)
+
+
+def build_readme(rng: random.Random, repo: str, num_sections: int) -> str:
+    sections = []
+    for idx in range(num_sections):
+        sections.append(
+            f'<h2 tabindex="-1" dir="auto"><a id="section-{idx}" class="anchor" aria-hidden="true" '
+            f'href="#section-{idx}"></a>Section {idx}</h2>'
+            f'<p dir="auto">Lorem ipsum <code>dolor</code> sit amet, see <a href="https://example.com/{idx}" '
+            f'rel="nofollow">the docs</a> &amp; <em>more</em>. {"Consectetur adipiscing elit. " * 8}</p>'
+            f'<div class="highlight highlight-source-python"><pre><span class="pl-k">import</span> '
+            f'<span class="pl-s1">{repo.split("/")[1]}</span>\n'
+            f'<span class="pl-s1">x</span> <span class="pl-c1">=</span> <span class="pl-c1">{rng.random()}</span>'
+            f"</pre></div>"
+            f'<ul dir="auto"><li>First &lt;item&gt;</li><li>Second item<br>continued</li></ul>'
+        )
+    return "\n".join(sections)
+
+
+def build_sidebar(repo: str, sponsored: bool) -> str:
+    owner, name = repo.split("/")
+    sponsor_section = ""
+    if sponsored:
+        links = "".join(
+            f'<li class="mb-1 mr-1"><a class="Link--muted" href="{link.format(name=name)}">'
+            f'<img class="avatar" src="https://avatars.githubusercontent.com/u/1?s=40" width="20" height="20">'
+            f"<span>{link.format(name=name)}</span></a></li>"
+            for link in SPONSOR_LINKS
+        )
+        sponsor_section = (
+            '<div class="BorderGrid-row"><div class="BorderGrid-cell">'
+            '<h2 class="h4 mb-3">Sponsor this project</h2>'
+            f'<ul class="list-style-none">{links}</ul>'
+            f'<a href="/sponsors/{owner}" class="text-small">Learn more about GitHub Sponsors</a>'
+            "</div></div>"
+        )
+    contributors = "".join(
+        f'<li class="mb-2 mr-2"><a href="https://github.com/user{idx}" class="">'
+        f'<img src="https://avatars.githubusercontent.com/u/{idx}?s=64" alt="@user{idx}" size="32" height="32" '
+        f'width="32" class="avatar circle"></a></li>'
+        for idx in range(14)
+    )
+    return (
+        '<div class="Layout-sidebar" data-view-component="true"><div class="BorderGrid BorderGrid--spacious">'
+        '<div class="BorderGrid-row"><div class="BorderGrid-cell"><h2 class="mb-3 h4">About</h2>'
+        f'<p class="f4 my-3">The {name} project</p><div class="my-3 d-flex flex-items-center">'
+        f'<a class="text-bold" href="https://{name}.org">{name}.org</a></div></div></div>'
+        f"{sponsor_section}"
+        '<div class="BorderGrid-row"><div class="BorderGrid-cell"><h2 class="h4 mb-3">Releases</h2>'
+        f'<a href="/{repo}/releases" class="Link--primary">v1.0.0 <span class="Label">Latest</span></a>'
+        "</div></div>"
+        '<div class="BorderGrid-row"><div class="BorderGrid-cell"><h2 class="h4 mb-3">Contributors</h2>'
+        f'<ul class="list-style-none d-flex flex-wrap mb-n2">{contributors}</ul></div></div>'
+        "</div></div>"
+    )
+
+
+def build_repo_page(
+    repo: str = "example/project",
+    sponsored: bool = True,
+    num_files: int = 150,
+    num_sections: int = 60,
+    seed: int = 0,
+) -> str:
+    """
+    Builds a synthetic GitHub repo page
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param sponsored: If True, the sidebar has a "Sponsor this project" section
+    :param num_files: Number of files in the file listing
+    :param num_sections: Number of sections in the README
+    :param seed: Seed for the random parts of the page
+    :return: HTML of the page
+    """
+    rng = random.Random(seed)
+    head = "\n".join(
+        [
+            '<meta charset="utf-8"><link rel="dns-prefetch" href="https://github.githubassets.com">',
+            *[
+                f'<script crossorigin="anonymous" defer="defer" type="application/javascript" '
+                f'src="https://github.githubassets.com/assets/chunk-{idx}-{rng.getrandbits(48):012x}.js"></script>'
+                for idx in range(60)
+            ],
+            *[
+                f'<meta name="meta-{idx}" content="{rng.getrandbits(64):016x}">'
+                for idx in range(40)
+            ],
+        ]
+    )
+    nav = "".join(
+        f'<li><a href="/features/{idx}" class="HeaderMenu-link" data-analytics-event="{{&quot;category&quot;:'
+        f'&quot;Header menu&quot;,&quot;label&quot;:&quot;item {idx}&quot;}}">Feature {idx}</a></li>'
+        for idx in range(50)
+    )
+    footer = "".join(
+        f'<li class="mr-3"><a href="https://docs.github.com/{idx}" data-analytics-event="footer">Footer {idx}</a>'
+        f"</li>"
+        for idx in range(30)
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="en" data-color-mode="auto"><head>{head}<title>{repo}</title></head>'
+        f'<body class="logged-out env-production page-responsive"><div class="application-main">'
+        f'<header class="HeaderMktg"><nav><ul>{nav}</ul></nav></header>'
+        f'<main id="js-repo-pjax-container"><div class="Layout Layout--sidebarPosition-end">'
+        f'<div class="Layout-main"><react-partial partial-name="repos-overview">'
+        f'<script type="application/json" data-target="react-partial.embeddedData">'
+        f"{build_payload(rng, repo, num_files)}</script>"
+        f'<table aria-labelledby="folders-and-files"><tbody>{build_file_rows(rng, repo, num_files)}'
+        f"</tbody></table></react-partial>"
+        f'<article class="markdown-body entry-content container-lg" itemprop="text">'
+        f"{build_readme(rng, repo, num_sections)}</article></div>"
+        f"{build_sidebar(repo, sponsored)}</div></main></div>"
+        f'<footer class="footer"><ul>{footer}</ul></footer>'
+        f'<script type="text/javascript">window.__data = {{"a": "</div>"}};</script></body></html>'
+    )
+
+
+def build_project_page(
+    num_paragraphs: int = 40, num_links: int = 6, seed: int = 0
+) -> str:
+    """
+    Builds a synthetic project page, like a GSOC organization page or a NumFOCUS project page: mostly prose and
+    navigation, with a few links to GitHub repos, owners and gists among other links
+    :param num_paragraphs: Number of paragraphs of the project's description
+    :param num_links: Number of GitHub links in the description
+    :param seed: Seed for the random parts of the page
+    :return: HTML of the page
+    """
+    rng = random.Random(seed)
+    github_links = [
+        "https://github.com/{name}/{name}",
+        "https://github.com/{name}/{name}-docs/issues",
+        "https://github.com/{name}",
+        "https://gist.github.com/{name}/{hash}",
+        "https://{name}.github.io/{name}",
+    ]
+    links = {
+        rng.randrange(num_paragraphs): rng.choice(github_links).format(
+            name=f"project{rng.randint(1, 99)}", hash=f"{rng.getrandbits(64):016x}"
+        )
+        for _ in range(num_links)
+    }
+    paragraphs = []
+    for idx in range(num_paragraphs):
+        link = links.get(idx, f"https://project.org/docs/{idx}")
+        paragraphs.append(
+            f'<p class="mdl-typography--body-1">Our project builds tools for {rng.choice(["data", "science"])}. '
+            f'{"Students will work with mentors on the codebase and its documentation. " * 4}'
+            f'See <a href="{link}" target="_blank">{link}</a> for details.</p>'
+        )
+    nav = "".join(
+        f'<li><a class="mdl-navigation__link" href="/archive/gsoc/{2009 + idx % 7}/orgs/org{idx}">'
+        f"Organization {idx}</a></li>"
+        for idx in range(60)
+    )
+    return (
+        '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>Project</title></head>'
+        f'<body><header><nav><ul>{nav}</ul></nav></header><main class="mdl-layout__content">'
+        f'{"".join(paragraphs)}</main><footer><a href="https://www.google.com/policies">Privacy</a>'
+        "</footer></body></html>"
+    )
@@ -0,0 +1,381 @@
+"""
+Local stand-in for the services the finders query: api.github.com (GraphQL, and the REST contributors and README
+endpoints), raw.githubusercontent.com, github.com repo and sponsor pages, and the Open Collective GraphQL endpoint.
+Every repo, owner and user exists, and whether each is funded is derived from its name, so runs are reproducible.
+The server can add latency to each response, fail a fraction of requests, and enforce GitHub-style rate limit
+budgets, reporting them in X-RateLimit-* headers. It counts the requests it answers by host.
+
+`redirect_session` mounts an adapter on a requests session that sends requests for those hosts to the stub
+instead, keeping the original host in the Host header so the session's rate limiting and caching see the real URL.
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Union
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks.fixtures import build_repo_page
+from funderfinder.utils.rate_limit import get_family
+from funderfinder.utils.transport import POOL_MAXSIZE
+
+STUB_HOSTS = [
+    "api.github.com",
+    "raw.githubusercontent.com",
+    "github.com",
+    "api.opencollective.com",
+]
+# Top-level fields of the GitHub GraphQL queries the finders make, e.g. `repo0: repository(owner: $repoOwner0, ...)`
+FIELD_PATTERN = re.compile(
+    r"(?:(\w+):\s*)?\b(repository|organization|user|viewer)\b\s*(?:\(([^)]*)\))?\s*\{"
+)
+ARG_PATTERN = re.compile(r'(\w+):\s*(?:\$(\w+)|"([^"]*)")')
+BLOB_PATTERN = re.compile(r'(\w+):\s*object\(expression:\s*"HEAD:([^"]+)"\)')
+# Share of repos whose README isn't at one of the paths the finders try first
+UNUSUAL_README_RATE = 0.1
+FUNDING_YML = "github: [{owner}]\nopen_collective: {name}\n"
+
+
+class StubConfig:
+    """
+    Behaviour of the stub server, and the share of projects that each funding signal is found for
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        rate_limit: int = 5000,
+        rate_limit_window: float = 3600,
+        funded_rate: float = 0.3,
+        seed: int = 0,
+    ):
+        """
+        :param latency: Minimum number of seconds to wait before answering each request
+        :param jitter: Maximum number of seconds added at random to `latency`
+        :param error_rate: Fraction of requests answered with a 502 error
+        :param rate_limit: Number of requests to each of GitHub's REST ("core") and GraphQL APIs allowed per window.
+            Requests beyond it are answered with a 403 until the window resets
+        :param rate_limit_window: Number of seconds after which the rate limit budgets reset
+        :param funded_rate: Probability of each funding signal (README badge, FUNDING.yml, sponsors, collective)
+        :param seed: Seed deciding which projects are funded
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.funded_rate = funded_rate
+        self.seed = seed
+
+    def has_signal(self, kind: str, name: str, rate: Union[float, None] = None) -> bool:
+        """
+        Decides whether an entity has a signal, consistently across requests
+        :param kind: Kind of signal, e.g. "tidelift"
+        :param name: Repo, owner or user the signal is about
+        :param rate: Probability of the signal. Defaults to `funded_rate`
+        :return: True if the entity has the signal
+        """
+        rate = self.funded_rate if rate is None else rate
+        return random.Random(f"{self.seed}:{kind}:{name}").random() < rate
+
+
+@lru_cache(maxsize=256)
+def get_repo_page(repo: str, sponsored: bool) -> bytes:
+    return build_repo_page(repo, sponsored=sponsored).encode("utf-8")
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server imitating the finders' upstream services. Call `start` to serve in the background
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Union[StubConfig, None] = None, port: int = 0):
+        """
+        :param config: Behaviour of the server. Defaults to `StubConfig()`
+        :param port: Port to listen on. Defaults to any free port
+        """
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.config = config or StubConfig()
+        self.lock = threading.Lock()
+        self.rng = random.Random(self.config.seed)
+        self.reset()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "StubServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients drop connections to pages they stopped reading, so that they don't download the rest
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def reset(self) -> None:
+        """
+        Clears the request counts and refills the rate limit budgets
+        :return: None
+        """
+        with self.lock:
+            self.counts = Counter()
+            self.budgets = {}
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.config.error_rate
+
+    def get_delay(self) -> float:
+        with self.lock:
+            return self.config.latency + self.rng.random() * self.config.jitter
+
+    def count(self, host: str) -> None:
+        with self.lock:
+            self.counts[host] += 1
+
+    def spend(self, family: str) -> tuple:
+        """
+        Takes a request from a family's rate limit budget
+        :param family: "core" or "graphql"
+        :return: Tuple of the dict of X-RateLimit-* headers to send, and whether the budget allowed the request
+        """
+        with self.lock:
+            now = time.time()
+            remaining, reset = self.budgets.get(family, (0, 0))
+            if now >= reset:
+                remaining = self.config.rate_limit
+                reset = now + self.config.rate_limit_window
+            remaining = max(remaining - 1, -1)
+            self.budgets[family] = (remaining, reset)
+        return {
+            "X-RateLimit-Limit": str(self.config.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(int(reset) + 1),
+            "X-RateLimit-Used": str(self.config.rate_limit - max(remaining, 0)),
+            "X-RateLimit-Resource": family,
+        }, remaining >= 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.handle_request(self.route_get)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length)
+        self.handle_request(self.route_post)
+
+    def handle_request(self, route) -> None:
+        """
+        Answers a request after the configured latency, failing it or rate limiting it if need be
+        :param route: Method returning the response's status, content type and body
+        :return: None
+        """
+        host = (self.headers.get("Host") or "").split(":")[0]
+        self.server.count(host)
+        time.sleep(self.server.get_delay())
+        headers = {}
+        family = get_family(f"https://{host}{self.path}")
+        if family is not None:
+            headers, allowed = self.server.spend(family)
+            if not allowed:
+                message = {"message": "API rate limit exceeded"}
+                self.respond(403, "application/json", json.dumps(message), headers)
+                return
+        if self.server.should_fail():
+            self.respond(502, "text/plain", "Server Error", headers)
+            return
+        status, content_type, body = route(host, urlsplit(self.path))
+        self.respond(status, content_type, body, headers)
+
+    def respond(
+        self,
+        status: int,
+        content_type: str,
+        body: Union[str, bytes],
+        headers: Union[dict, None] = None,
+    ) -> None:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route_get(self, host: str, url) -> tuple:
+        config = self.server.config
+        parts = url.path.strip("/").split("/")
+        if host == "api.github.com" and parts[0] == "repos" and len(parts) == 4:
+            owner, name, endpoint = parts[1:]
+            if endpoint == "contributors":
+                per_page = int(parse_qs(url.query).get("per_page", ["30"])[0])
+                logins = [{"login": f"{name}-dev{i}"} for i in range(per_page)]
+                return 200, "application/json", json.dumps(logins)
+            if endpoint == "readme":
+                return 200, "text/plain", self.get_readme(owner, name)
+        if host == "raw.githubusercontent.com" and len(parts) >= 4:
+            owner, name, path = parts[0], parts[1], "/".join(parts[3:])
+            text = self.get_file(owner, name, path)
+            if text is not None:
+                return 200, "text/plain", text
+        if host == "github.com" and len(parts) == 2:
+            if parts[0] == "sponsors":
+                return 200, "text/html", f"<html><h1>Sponsor @{parts[1]}</h1></html>"
+            # GitHub lists "Sponsor this project" links for repos with a FUNDING.yml of their own or their owner's
+            repo = "/".join(parts)
+            sponsored = config.has_signal("yml", repo) or config.has_signal(
+                "yml", parts[0]
+            )
+            return 200, "text/html", get_repo_page(repo, sponsored)
+        return 404, "text/plain", "Not Found"
+
+    def route_post(self, host: str, url) -> tuple:
+        request = json.loads(self.body or b"{}")
+        if host == "api.github.com" and url.path == "/graphql":
+            data = self.resolve_github_query(
+                request.get("query", ""), request.get("variables") or {}
+            )
+            return 200, "application/json", json.dumps({"data": data})
+        if host == "api.opencollective.com" and url.path.startswith("/graphql/v2"):
+            slug = (request.get("variables") or {}).get("slug", "")
+            collective = None
+            if self.server.config.has_signal("opencollective", slug):
+                amount = random.Random(slug).randint(100, 100000)
+                collective = {
+                    "totalFinancialContributors": amount // 100,
+                    "stats": {
+                        "totalAmountReceived": {"currency": "USD", "value": amount}
+                    },
+                }
+            return (
+                200,
+                "application/json",
+                json.dumps({"data": {"collective": collective}}),
+            )
+        return 404, "text/plain", "Not Found"
+
+    def get_readme(self, owner: str, name: str) -> str:
+        badge = ""
+        if self.server.config.has_signal("tidelift", f"{owner}/{name}"):
+            badge = f"[![Tidelift](https://tidelift.com/badges/package/pypi/{name})]"
+        return f"# {name}\n{badge}\n" + "Lorem ipsum dolor sit amet.\n" * 200
+
+    def get_file(self, owner: str, name: str, path: str) -> Union[str, None]:
+        """
+        Returns the text of a file on a repo's default branch
+        :param owner: Owner of the repo
+        :param name: Name of the repo
+        :param path: Path of the file
+        :return: Text of the file, or None if the repo doesn't have it
+        """
+        config = self.server.config
+        if path.lower().startswith("readme"):
+            # Some repos name their README in a way the finders don't guess, so they have to ask the REST API
+            readme_name = "README.md"
+            if config.has_signal("readme_name", f"{owner}/{name}", UNUSUAL_README_RATE):
+                readme_name = "docs/README.md"
+            return self.get_readme(owner, name) if path == readme_name else None
+        if path == ".github/FUNDING.yml":
+            repo = owner if name == ".github" else f"{owner}/{name}"
+            if config.has_signal("yml", repo):
+                return FUNDING_YML.format(owner=owner, name=name)
+        return None
+
+    def resolve_github_query(self, query: str, variables: dict) -> dict:
+        """
+        Answers the GitHub GraphQL queries the finders make, field by top-level field
+        :param query: GraphQL query
+        :param variables: Variables of the query
+        :return: The response's `data`
+        """
+        config = self.server.config
+        data = {}
+        fields = list(FIELD_PATTERN.finditer(query))
+        for idx, field in enumerate(fields):
+            alias, kind, args = field.group(1) or field.group(2), field.group(2), {}
+            for arg in ARG_PATTERN.finditer(field.group(3) or ""):
+                args[arg.group(1)] = (
+                    variables.get(arg.group(2)) if arg.group(2) else arg.group(3)
+                )
+            if kind == "viewer":
+                data[alias] = {"login": "stub"}
+            elif kind == "repository":
+                end = fields[idx + 1].start() if idx + 1 < len(fields) else len(query)
+                owner, name = args.get("owner"), args.get("name")
+                data[alias] = {"defaultBranchRef": {"name": "main"}}
+                for blob in BLOB_PATTERN.finditer(query, field.end(), end):
+                    text = self.get_file(owner, name, blob.group(2))
+                    data[alias][blob.group(1)] = (
+                        None if text is None else {"text": text}
+                    )
+            else:
+                login = args.get("login")
+                num_sponsors = 0
+                if config.has_signal("sponsors", login):
+                    num_sponsors = random.Random(login).randint(1, 20)
+                data[alias] = {
+                    "sponsors": {
+                        "totalCount": num_sponsors,
+                        "edges": [
+                            {"node": {"id": str(i), "email": None}}
+                            for i in range(num_sponsors)
+                        ],
+                    }
+                }
+        return data
+
+    def log_message(self, *args):
+        pass
+
+
+class RedirectAdapter(HTTPAdapter):
+    """
+    Transport adapter sending requests for the stubbed hosts to a stub server
+    """
+
+    def __init__(self, stub_url: str, **kwargs):
+        """
+        :param stub_url: Base URL of the stub server
+        :param kwargs: Keyword arguments passed through to `HTTPAdapter`
+        """
+        super().__init__(**kwargs)
+        self.stub_url = stub_url
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        parts = urlsplit(request.url)
+        request.headers["Host"] = parts.hostname
+        request.url = (
+            self.stub_url + parts.path + (f"?{parts.query}" if parts.query else "")
+        )
+        return super().send(request, **kwargs)
+
+
+def redirect_session(session: requests.Session, stub_url: str) -> None:
+    """
+    Makes a session send its requests for the stubbed hosts to a stub server
+    :param session: requests session, e.g. the finders' shared session
+    :param stub_url: Base URL of the stub server
+    :return: None
+    """
+    adapter = RedirectAdapter(stub_url, pool_maxsize=POOL_MAXSIZE)
+    for host in STUB_HOSTS:
+        session.mount(f"https://{host}/", adapter)
@@ -1,39 +1,440 @@
 # Retrieves all funding information for a project from supported sources
 
 import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
 from datetime import datetime
+from typing import TYPE_CHECKING, Union
 
-from sources.config import PRODUCTION_FINDERS
+from funderfinder.sources import config
+from funderfinder.utils.http_cache import CACHE_DIR_ENV
+from funderfinder.utils.lookup_context import LookupContext
+from funderfinder.utils.result_cache import ResultCache, open_result_cache
 
+if TYPE_CHECKING:
+    import aiohttp
 
-def get_project_funders(repo_name: str) -> list:
+# The HTTP stack (requests, aiohttp, bs4) is only imported once a finder that makes requests runs, so that lookups
+# against the offline finders start quickly
+
+
+def run_finder(
+    finder_class, repo_name: str, context: Union[LookupContext, None] = None
+) -> list:
     """
-    Attempts to retrieve funding data from each source for matching projects. When funding sources are found, adds the
-    source's name, a boolean is_funded field with value True, and the date the funding data was retrieved to the
-    metadata of each source of funding that was found
+    Runs a single finder against a project and adds the source's name, a boolean is_funded field with value True,
+    and the date the funding data was retrieved to the metadata of each source of funding that was found
+    :param finder_class: Finder subclass to run
+    :param repo_name: Github identifier for the project (e.g. georgetown-cset/funder-finder)
+    :param context: Lookup context shared with the other finders run against this project, if any
+    :return: An array of funding metadata from this finder
+    """
+    finder = finder_class()
+    if context is not None:
+        finder.context = context
+    funding = finder.run(repo_name)
+    return annotate_funding(finder_class, funding)
+
+
+async def arun_finder(
+    finder_class,
+    repo_name: str,
+    session: Union["aiohttp.ClientSession", None] = None,
+    context: Union[LookupContext, None] = None,
+) -> list:
+    """
+    Async version of `run_finder`
+    :param finder_class: Finder subclass to run
     :param repo_name: Github identifier for the project (e.g. georgetown-cset/funder-finder)
+    :param session: aiohttp session the finder should make requests with
+    :param context: Lookup context shared with the other finders run against this project, if any
+    :return: An array of funding metadata from this finder
+    """
+    finder = finder_class()
+    if context is not None:
+        finder.context = context
+    funding = await finder.arun(repo_name, session)
+    return annotate_funding(finder_class, funding)
+
+
+def annotate_funding(finder_class, funding: list) -> list:
+    """
+    Adds the source's name, a boolean is_funded field with value True, and the date the funding data was
+    retrieved to the metadata of each source of funding a finder found
+    :param finder_class: Finder subclass that found the funding
+    :param funding: Array of funding metadata returned by the finder
     :return: An array of funding metadata
     """
     project_funders = []
-    for finder_class in PRODUCTION_FINDERS:
-        finder = finder_class()
-        funding = finder.run(repo_name)
-        if funding:
-            for source in funding:
-                source["type"] = finder_class.name
-                source["is_funded"] = True
-                source["date_of_data_collection"] = datetime.now().strftime("%Y-%m-%d")
-                project_funders.append(source)
+    if funding:
+        for source in funding:
+            source["type"] = finder_class.name
+            source["is_funded"] = True
+            source["date_of_data_collection"] = datetime.now().strftime("%Y-%m-%d")
+            project_funders.append(source)
+    return project_funders
+
+
+def get_finder_result(
+    future, start_times: dict, key: int, timeout: Union[float, None]
+) -> Union[list, None]:
+    """
+    Waits for a finder's result. The timeout is counted from when the finder started running rather than from
+    when it was submitted, so finders that are queued behind others (when there are fewer workers than finders)
+    still get their full time budget
+    :param future: Future returned when the finder was submitted to the executor
+    :param start_times: Dict mapping each submitted finder's key to the time it started running
+    :param key: Key of this finder in `start_times`
+    :param timeout: Number of seconds the finder may run for, or None to wait indefinitely
+    :return: The finder's result, or None if it timed out
+    """
+    if timeout is None:
+        return future.result()
+    while True:
+        start_time = start_times.get(key)
+        remaining = (
+            timeout if start_time is None else start_time + timeout - time.monotonic()
+        )
+        try:
+            return future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            # If the finder was still queued when we started waiting, wait again now that we know its start time
+            if start_time is not None:
+                return None
+
+
+def get_project_funders(
+    repo_name: str,
+    max_workers: Union[int, None] = None,
+    timeout: Union[float, None] = None,
+    cache: Union[ResultCache, None] = None,
+    run_context: Union[LookupContext, None] = None,
+    finders: Union[list, None] = None,
+) -> list:
+    """
+    Attempts to retrieve funding data from each source for matching projects. Sources are queried concurrently, but
+    results are returned in the same order as `finders`. When funding sources are found, adds the
+    source's name, a boolean is_funded field with value True, and the date the funding data was retrieved to the
+    metadata of each source of funding that was found. The finders share a `LookupContext`, so artifacts that several
+    of them need are only retrieved once
+    :param repo_name: Github identifier for the project (e.g. georgetown-cset/funder-finder)
+    :param max_workers: Number of finders to run at once. Defaults to running every finder at once; set to 1 to
+        query sources one after another
+    :param timeout: Number of seconds each finder may run for before its results are skipped. Defaults to no timeout
+    :param cache: If provided, finders whose results for this project are cached aren't run, and the results of
+        the others are added to the cache
+    :param run_context: Lookup context shared by every project in a run, so that lookups that only depend on the
+        project's owner are made once per owner
+    :param finders: Finder subclasses to run, see `config.get_finders`. Defaults to PRODUCTION_FINDERS
+    :return: An array of funding metadata
+    """
+    finders = config.PRODUCTION_FINDERS if finders is None else finders
+    if not finders:
+        return []
+    start_times = {}
+    context = LookupContext(run_context)
+    cached = get_cached_results(cache, repo_name, finders)
+
+    def timed_run(key: int, finder_class) -> list:
+        start_times[key] = time.monotonic()
+        return run_finder(finder_class, repo_name, context)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(finders))
+    try:
+        futures = {
+            key: executor.submit(timed_run, key, finder_class)
+            for key, finder_class in enumerate(finders)
+            if cached[key] is None
+        }
+        project_funders = []
+        for key, finder_class in enumerate(finders):
+            if cached[key] is not None:
+                project_funders.extend(cached[key])
+                continue
+            funding = get_finder_result(futures[key], start_times, key, timeout)
+            if funding is None:
+                logging.warning(
+                    f"{finder_class.name} timed out after {timeout}s for {repo_name}"
+                )
+                continue
+            if cache is not None:
+                cache.set(finder_class, repo_name, funding)
+            project_funders.extend(funding)
+    finally:
+        # Don't block on finders that timed out; they will finish (and be discarded) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
     return project_funders
 
 
+def get_cached_results(
+    cache: Union[ResultCache, None], repo_name: str, finders: list
+) -> list:
+    """
+    Reads each finder's cached results for a project
+    :param cache: Result cache, if any
+    :param repo_name: Github identifier for the project (e.g. georgetown-cset/funder-finder)
+    :param finders: Finder subclasses
+    :return: List with the cached results of each finder, or None for finders that must run
+    """
+    if cache is None:
+        return [None] * len(finders)
+    return [cache.get(finder_class, repo_name) for finder_class in finders]
+
+
+def requires_network(finders: list) -> bool:
+    """
+    Checks whether any of a list of finders makes network requests
+    :param finders: Finder subclasses
+    :return: True if any of the finders makes network requests
+    """
+    return any(finder_class.requires_network for finder_class in finders)
+
+
+async def aget_project_funders(
+    repo_name: str,
+    timeout: Union[float, None] = None,
+    session: Union["aiohttp.ClientSession", None] = None,
+    cache: Union[ResultCache, None] = None,
+    run_context: Union[LookupContext, None] = None,
+    finders: Union[list, None] = None,
+) -> list:
+    """
+    Async version of `get_project_funders`. Every finder is awaited concurrently on the running event loop, so
+    many projects can be looked up at once without a thread per request
+    :param repo_name: Github identifier for the project (e.g. georgetown-cset/funder-finder)
+    :param timeout: Number of seconds each finder may run for before its results are skipped. Defaults to no timeout
+    :param session: aiohttp session to make requests with. Pass a session from `transport.create_async_session`
+        when looking up many projects so they share connections; otherwise one is opened for this project
+    :param cache: If provided, finders whose results for this project are cached aren't run, and the results of
+        the others are added to the cache
+    :param run_context: Lookup context shared by every project in a run, see `get_project_funders`
+    :param finders: Finder subclasses to run, see `config.get_finders`. Defaults to PRODUCTION_FINDERS
+    :return: An array of funding metadata
+    """
+    finders = config.PRODUCTION_FINDERS if finders is None else finders
+    context = LookupContext(run_context)
+    cached = get_cached_results(cache, repo_name, finders)
+
+    async def run_with_timeout(key: int, finder_class, session) -> list:
+        if cached[key] is not None:
+            return cached[key]
+        try:
+            funding = await asyncio.wait_for(
+                arun_finder(finder_class, repo_name, session, context), timeout
+            )
+        except asyncio.TimeoutError:
+            logging.warning(
+                f"{finder_class.name} timed out after {timeout}s for {repo_name}"
+            )
+            return []
+        if cache is not None:
+            cache.set(finder_class, repo_name, funding)
+        return funding
+
+    async def run_all(session) -> list:
+        return await asyncio.gather(
+            *[
+                run_with_timeout(key, finder_class, session)
+                for key, finder_class in enumerate(finders)
+            ]
+        )
+
+    if requires_network(finders):
+        from funderfinder.utils.transport import async_session
+
+        async with async_session(session) as session:
+            results = await run_all(session)
+    else:
+        results = await run_all(session)
+    return [source for funding in results for source in funding]
+
+
+def read_repo_names(lines: iter) -> iter:
+    """
+    Reads GitHub identifiers from an iterable of lines (e.g. an open file), skipping blank lines and comments
+    :param lines: Iterable of lines, one GitHub identifier per line
+    :return: A generator of GitHub identifiers
+    """
+    for line in lines:
+        repo_name = line.strip()
+        if repo_name and not repo_name.startswith("#"):
+            yield repo_name
+
+
+def get_batch_project_funders(
+    repo_names: iter,
+    max_concurrent_repos: int = 10,
+    max_workers: Union[int, None] = None,
+    timeout: Union[float, None] = None,
+    cache: Union[ResultCache, None] = None,
+    finders: Union[list, None] = None,
+) -> iter:
+    """
+    Retrieves funding data for many projects, a bounded number at a time. Repo names are consumed lazily and
+    results are yielded as soon as each project finishes, so neither the input nor the output is held in memory.
+    Results are therefore not necessarily in the same order as the input. GitHub lookups of concurrently running
+    projects are batched together, see `github_signals.batching`
+    :param repo_names: Iterable of Github identifiers (e.g. georgetown-cset/funder-finder)
+    :param max_concurrent_repos: Number of projects to look up at once
+    :param max_workers: Number of finders to run at once for each project, see `get_project_funders`
+    :param timeout: Number of seconds each finder may run for, see `get_project_funders`
+    :param cache: Result cache shared by every project, see `get_project_funders`
+    :param finders: Finder subclasses to run, see `config.get_finders`. Defaults to PRODUCTION_FINDERS
+    :return: A generator of dicts containing the `repo_name` and either its `funders` or, if the lookup
+        failed, an `error` message
+    """
+    finders = config.PRODUCTION_FINDERS if finders is None else finders
+    run_context = LookupContext()
+    if requires_network(finders):
+        from funderfinder.utils.github_signals import batching
+
+        lookups = batching()
+    else:
+        lookups = contextlib.nullcontext()
+    with lookups, ThreadPoolExecutor(max_workers=max_concurrent_repos) as executor:
+        pending = {}
+        repo_names = iter(repo_names)
+        while True:
+            # Keep one extra batch of projects queued so workers never wait on us to read more input
+            for repo_name in repo_names:
+                future = executor.submit(
+                    get_project_funders,
+                    repo_name,
+                    max_workers,
+                    timeout,
+                    cache,
+                    run_context,
+                    finders,
+                )
+                pending[future] = repo_name
+                if len(pending) >= 2 * max_concurrent_repos:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                repo_name = pending.pop(future)
+                try:
+                    result = {"repo_name": repo_name, "funders": future.result()}
+                except Exception as e:
+                    logging.warning(
+                        f"Exception when retrieving funders for {repo_name}: {e}"
+                    )
+                    result = {
+                        "repo_name": repo_name,
+                        "error": f"{type(e).__name__}: {e}",
+                    }
+                yield result
+
+
+def write_batch_project_funders(
+    input_file: str, output_file: Union[str, None] = None, **kwargs
+) -> None:
+    """
+    Retrieves funding data for each GitHub identifier in `input_file` and writes one line of JSON per project
+    to `output_file` as soon as the project finishes
+    :param input_file: File containing one GitHub identifier per line, or "-" to read from stdin
+    :param output_file: File where jsonl of funding data should be written. Defaults to stdout
+    :param kwargs: Keyword arguments passed through to `get_batch_project_funders`
+    :return: None
+    """
+    infile = sys.stdin if input_file == "-" else open(input_file)
+    out = sys.stdout if output_file is None else open(output_file, mode="w")
+    try:
+        for result in get_batch_project_funders(read_repo_names(infile), **kwargs):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if out is not sys.stdout:
+            out.close()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "repo_name",
+        nargs="?",
         help="Identifier for GitHub repo, in the form `owner_name/repo_name` "
         "(e.g. georgetown-cset/funder-finder)",
     )
+    parser.add_argument(
+        "--input_file",
+        help="Batch mode: file containing one GitHub identifier per line, or `-` to read from stdin. "
+        "One line of JSON is written per repo as soon as it finishes",
+    )
+    parser.add_argument(
+        "--output_file",
+        help="Batch mode: file where jsonl of funding data should be written. Defaults to stdout",
+    )
+    parser.add_argument(
+        "--max_concurrent_repos",
+        type=int,
+        default=10,
+        help="Batch mode: number of repos to look up at once",
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        help="Number of sources to query at once. Defaults to querying all sources at once",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Number of seconds to wait for each source before skipping it. Defaults to no timeout",
+    )
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=list(config.FINDERS),
+        help="Sources to query. Defaults to all sources",
+    )
+    parser.add_argument(
+        "--exclude_sources",
+        "--exclude-sources",
+        nargs="+",
+        choices=list(config.FINDERS),
+        help="Sources not to query",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory to cache HTTP responses and finder results in between runs. Defaults to "
+        "$FUNDERFINDER_CACHE_DIR if set, otherwise results are only cached for the duration of the run",
+    )
     args = parser.parse_args()
 
-    print(get_project_funders(args.repo_name))
+    if bool(args.repo_name) == bool(args.input_file):
+        parser.error("Please specify exactly one of repo_name or --input_file")
+    finders = config.get_finders(args.sources, args.exclude_sources)
+    if not finders:
+        parser.error("--exclude_sources excludes every selected source")
+    if args.cache_dir and requires_network(finders):
+        from funderfinder.utils.transport import set_cache
+
+        set_cache(args.cache_dir)
+    cache = open_result_cache(args.cache_dir or os.environ.get(CACHE_DIR_ENV))
+    if args.input_file:
+        write_batch_project_funders(
+            args.input_file,
+            args.output_file,
+            max_concurrent_repos=args.max_concurrent_repos,
+            max_workers=args.max_workers,
+            timeout=args.timeout,
+            cache=cache,
+            finders=finders,
+        )
+    else:
+        print(
+            get_project_funders(
+                args.repo_name, args.max_workers, args.timeout, cache, finders=finders
+            )
+        )
@@ -1,8 +1,66 @@
-from typing import Union
+import asyncio
+from typing import TYPE_CHECKING, Union
+
+from funderfinder.utils.datasets import get_dataset_version
+from funderfinder.utils.lookup_context import LookupContext
+
+if TYPE_CHECKING:
+    # The HTTP stack is only imported by finders that make requests, so offline finders start quickly
+    import aiohttp
+    import requests
 
 
 class Finder:
     name = "Abstract Funder Finder"
+    # Number of seconds this finder's results may be reused for, see `result_cache`
+    cache_ttl = 24 * 60 * 60
+    # Bundled dataset this finder matches projects against, if any (see `datasets`)
+    DATA_FILE = None
+    # Whether this finder makes network requests
+    requires_network = True
+    _session = None
+    _context = None
+
+    @property
+    def session(self) -> "requests.Session":
+        """
+        HTTP session used for this finder's requests. Unless one is assigned, this is the pooled session shared by
+        every finder in the process, so connections to a host are reused across requests and finders
+        :return: requests Session
+        """
+        if self._session is not None:
+            return self._session
+        from funderfinder.utils.transport import get_session
+
+        return get_session()
+
+    @session.setter
+    def session(self, session: "requests.Session") -> None:
+        self._session = session
+
+    @property
+    def context(self) -> LookupContext:
+        """
+        Memo of artifacts shared with the other finders looking up the same project. get_funders.py assigns one
+        context to all the finders of a lookup; otherwise this finder gets a context of its own
+        :return: Lookup context
+        """
+        if self._context is None:
+            self._context = LookupContext()
+        return self._context
+
+    @context.setter
+    def context(self, context: LookupContext) -> None:
+        self._context = context
+
+    @classmethod
+    def get_cache_version(cls) -> str:
+        """
+        Returns an identifier of the data this finder's results depend on, besides the sources it queries. Cached
+        results are discarded when it changes
+        :return: Version of the finder's bundled dataset, or an empty string if it doesn't use one
+        """
+        return "" if cls.DATA_FILE is None else get_dataset_version(cls.DATA_FILE)
 
     @staticmethod
     def get_repo_name(project: str) -> str:
@@ -63,3 +121,18 @@ class Finder:
         :return: A dict of metadata about the project's funding, if funded, else None
         """
         return []
+
+    async def arun(
+        self,
+        gh_project_slug: Union[str, None] = None,
+        session: Union["aiohttp.ClientSession", None] = None,
+    ) -> list:
+        """
+        Async version of `run`, returning the same results. Subclasses that make network requests should override
+        this with a native async implementation; by default, `run` is called in a worker thread so that finders
+        that only read local data can still be awaited alongside the others
+        :param gh_project_slug: Identifier for the project owner and repo, e.g. georgetown-cset/funder-finder
+        :param session: aiohttp session to make requests with. If not provided, a session is opened for this call
+        :return: A dict of metadata about the project's funding, if funded, else None
+        """
+        return await asyncio.to_thread(self.run, gh_project_slug)
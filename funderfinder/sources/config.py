@@ -1,13 +1,55 @@
-from .github_sponsors import GitHubSponsorsFinder
-from .gsoc import GSOCFinder
-from .numfocus import NumFocusFinder
-from .opencollective import OpenCollectiveFinder
-from .tidelift import TideliftFinder
-
-PRODUCTION_FINDERS = [
-    GitHubSponsorsFinder,
-    NumFocusFinder,
-    OpenCollectiveFinder,
-    TideliftFinder,
-    GSOCFinder,
-]
+"""
+Registry of the finders get_funders.py runs. Finders are imported by name on first use, so that selecting a few
+sources (e.g. only the offline GSOC and NumFOCUS finders) doesn't import the others or their dependencies.
+`PRODUCTION_FINDERS` is still available as a module attribute, and imports every finder.
+"""
+
+import importlib
+from typing import Union
+
+# Maps each finder's name on the command line to its module and class, in the order results are reported
+FINDERS = {
+    "github_sponsors": ("funderfinder.sources.github_sponsors", "GitHubSponsorsFinder"),
+    "numfocus": ("funderfinder.sources.numfocus", "NumFocusFinder"),
+    "opencollective": ("funderfinder.sources.opencollective", "OpenCollectiveFinder"),
+    "tidelift": ("funderfinder.sources.tidelift", "TideliftFinder"),
+    "gsoc": ("funderfinder.sources.gsoc", "GSOCFinder"),
+}
+
+
+def get_finder_class(name: str):
+    """
+    Imports a finder by name
+    :param name: Name of the finder, one of FINDERS
+    :return: Finder subclass
+    """
+    if name not in FINDERS:
+        raise ValueError(
+            f"Unknown source {name}, please choose from {', '.join(FINDERS)}"
+        )
+    module_name, class_name = FINDERS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_finders(
+    sources: Union[list, None] = None, exclude_sources: Union[list, None] = None
+) -> list:
+    """
+    Imports the selected finders
+    :param sources: Names of the finders to use. Defaults to all finders
+    :param exclude_sources: Names of finders not to use
+    :return: List of Finder subclasses, in the order of FINDERS
+    """
+    selected = set(FINDERS if sources is None else sources) - set(exclude_sources or [])
+    for name in selected | set(exclude_sources or []):
+        if name not in FINDERS:
+            raise ValueError(
+                f"Unknown source {name}, please choose from {', '.join(FINDERS)}"
+            )
+    return [get_finder_class(name) for name in FINDERS if name in selected]
+
+
+def __getattr__(name: str):
+    if name == "PRODUCTION_FINDERS":
+        return get_finders()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
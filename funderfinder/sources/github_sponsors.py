@@ -1,11 +1,18 @@
 import argparse
-import json
 import os
 from typing import Any, Union
 
-import requests
+import aiohttp
 
-from funderfinder.utils.github_sources import get_funding_sources
+from funderfinder.utils.github_signals import (
+    aget_repo_signals,
+    aget_top_contributors,
+    get_headers,
+    get_repo_signals,
+    get_top_contributors,
+)
+from funderfinder.utils.github_sources import aget_funding_sources, get_funding_sources
+from funderfinder.utils.transport import async_session
 
 from ._finder import Finder
 
@@ -13,6 +20,39 @@ from ._finder import Finder
 class GitHubSponsorsFinder(Finder):
     name = "Github Sponsors"
     API_KEY = "GITHUB_TOKEN"
+    GRAPHQL_URL = "https://api.github.com/graphql"
+    ORG_SPONSORS_QUERY = """
+        query ($org: String!) {
+          viewer {
+            login
+          }
+          organization(login: $org) {
+            sponsors {
+              totalCount
+            }
+          }
+        }
+    """
+    USER_SPONSORS_QUERY = """
+        query ($user: String!) {
+            user(login: $user) {
+                sponsors(first: 100) {
+                edges {
+                    node {
+                    ... on Organization {
+                        id
+                        email
+                    }
+                    ... on User {
+                        id
+                        email
+                    }
+                    }
+                }
+                }
+            }
+        }
+    """
 
     def __init__(self, run_checks=True):
         if run_checks:
@@ -23,36 +63,43 @@ class GitHubSponsorsFinder(Finder):
                 "GITHUB_USERNAME"
             ), "Please `export GITHUB_USERNAME=<your GitHub username>"
 
+    def get_graphql_headers(self) -> dict:
+        """
+        Returns headers needed to authenticate to GitHub's GraphQL API
+        :return: Dict of headers
+        """
+        return get_headers()
+
     def get_gh_org_funding_json(self, org: str) -> Any:
         """
         Retrieves GitHub sponsors JSON for a GitHub organization. See:
         :param org: identifier for the GitHub organization
         :return: JSON
         """
-        query = """
-            query ($org: String!) {
-              viewer {
-                login
-              }
-              organization(login: $org) {
-                sponsors {
-                  totalCount
-                }
-              }
-            }
-        """
-        variables = {"org": org}
-        # adding bearer before the token is a suprising but necessary requirement
-        # see SO: https://stackoverflow.com/questions/70693292/github-graphql-api-this-endpoint-requires-you-to-be-authenticated
-        headers = {"Authorization": "bearer " + os.environ.get(self.API_KEY)}
-        result = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": variables},
-            headers=headers,
+        result = self.session.post(
+            self.GRAPHQL_URL,
+            json={"query": self.ORG_SPONSORS_QUERY, "variables": {"org": org}},
+            headers=self.get_graphql_headers(),
         )
         data = result.json()
         return data
 
+    async def aget_gh_org_funding_json(
+        self, session: aiohttp.ClientSession, org: str
+    ) -> Any:
+        """
+        Async version of `get_gh_org_funding_json`
+        :param session: aiohttp session used to make the request
+        :param org: identifier for the GitHub organization
+        :return: JSON
+        """
+        async with session.post(
+            self.GRAPHQL_URL,
+            json={"query": self.ORG_SPONSORS_QUERY, "variables": {"org": org}},
+            headers=self.get_graphql_headers(),
+        ) as result:
+            return await result.json(content_type=None)
+
     def get_org_funder_count(self, org: str) -> int:
         """
         Retrieves GitHub sponsors statistics for a GitHub organization.
@@ -60,10 +107,31 @@ class GitHubSponsorsFinder(Finder):
         :return: Count of funding stats
         """
         stats = self.get_gh_org_funding_json(org)
+        return self.parse_gh_org_funding_json(stats)
+
+    async def aget_org_funder_count(
+        self, session: aiohttp.ClientSession, org: str
+    ) -> int:
+        """
+        Async version of `get_org_funder_count`
+        :param session: aiohttp session used to make the request
+        :param org: identifier for the GitHub organization
+        :return: Count of funding stats
+        """
+        stats = await self.aget_gh_org_funding_json(session, org)
+        return self.parse_gh_org_funding_json(stats)
+
+    @staticmethod
+    def parse_gh_org_funding_json(gh_org_funding_json: Any) -> int:
+        """
+        Retrieves the number of GitHub sponsors of a GitHub organization from its GitHub sponsors JSON
+        :param gh_org_funding_json: JSON of GitHub organization GitHub sponsor info
+        :return: Count of funding stats
+        """
         count = (
             0
-            if not stats["data"]["organization"]
-            else stats["data"]["organization"]["sponsors"]["totalCount"]
+            if not gh_org_funding_json["data"]["organization"]
+            else gh_org_funding_json["data"]["organization"]["sponsors"]["totalCount"]
         )
         return count
 
@@ -71,33 +139,32 @@ class GitHubSponsorsFinder(Finder):
         self, gh_url: str, num_top_contribs: int = 3
     ) -> list:
         """
-        Retrieves JSON of top contributors to a GitHub repo and whether these
-        contributors have GitHub sponsors. Needs to use GitHub REST API because
-        GraphQL API doesn't return contributors (as of Dec. 2022).
+        Retrieves the usernames of the top contributors to a GitHub repo
         :param gh_url: GitHub repository URL
         :param num_top_contribs: number of contributors to check
         :return: list
         """
-        org_and_owner = self.get_owner_and_repo_name_from_github_url(gh_url)
-        response = requests.get(
-            "https://api.github.com/repos/"
-            + org_and_owner
-            + "/contributors?page=1"
-            + "&per_page="
-            + str(num_top_contribs),
-            auth=(os.environ.get("GITHUB_USERNAME"), os.environ.get("GITHUB_TOKEN")),
+        return get_top_contributors(
+            self.get_owner_and_repo_name_from_github_url(gh_url),
+            self.session,
+            num_top_contribs,
         )
 
-        if response.ok:
-            contributors = json.loads(response.text or response.content)
-        else:
-            return []
-
-        top_contribs = []
-        for contributor in contributors:
-            top_contribs.append(contributor["login"])
-
-        return top_contribs
+    async def aget_gh_top_contributors_json(
+        self, session: aiohttp.ClientSession, gh_url: str, num_top_contribs: int = 3
+    ) -> list:
+        """
+        Async version of `get_gh_top_contributors_json`
+        :param session: aiohttp session used to make the request
+        :param gh_url: GitHub repository URL
+        :param num_top_contribs: number of contributors to check
+        :return: list
+        """
+        return await aget_top_contributors(
+            session,
+            self.get_owner_and_repo_name_from_github_url(gh_url),
+            num_top_contribs,
+        )
 
     def get_gh_user_gh_sponsors(self, user: str) -> Any:
         """
@@ -105,38 +172,30 @@ class GitHubSponsorsFinder(Finder):
         :param user: identifier a GitHub user
         :return: JSON
         """
-        query = """
-            query ($user: String!) {
-                user(login: $user) {
-                    sponsors(first: 100) {
-                    edges {
-                        node {
-                        ... on Organization {
-                            id
-                            email
-                        }
-                        ... on User {
-                            id
-                            email
-                        }
-                        }
-                    }
-                    }
-                }
-            }
-        """
-        variables = {"user": user}
-        # adding bearer before the token is a suprising but necessary requirement
-        # see SO: https://stackoverflow.com/questions/70693292/github-graphql-api-this-endpoint-requires-you-to-be-authenticated
-        headers = {"Authorization": "bearer " + os.environ.get(self.API_KEY)}
-        result = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": variables},
-            headers=headers,
+        result = self.session.post(
+            self.GRAPHQL_URL,
+            json={"query": self.USER_SPONSORS_QUERY, "variables": {"user": user}},
+            headers=self.get_graphql_headers(),
         )
         data = result.json()
         return data
 
+    async def aget_gh_user_gh_sponsors(
+        self, session: aiohttp.ClientSession, user: str
+    ) -> Any:
+        """
+        Async version of `get_gh_user_gh_sponsors`
+        :param session: aiohttp session used to make the request
+        :param user: identifier a GitHub user
+        :return: JSON
+        """
+        async with session.post(
+            self.GRAPHQL_URL,
+            json={"query": self.USER_SPONSORS_QUERY, "variables": {"user": user}},
+            headers=self.get_graphql_headers(),
+        ) as result:
+            return await result.json(content_type=None)
+
     @staticmethod
     def parse_gh_user_gh_sponsors_json(gh_user_gh_sponsors_json: Any) -> int:
         """
@@ -179,7 +238,43 @@ class GitHubSponsorsFinder(Finder):
         :param top_contribs: List of top contributors
         :return: True if has other "sponsor this project" sponsors, False otherwise
         """
-        sources = get_funding_sources(repo)
+        sources = get_funding_sources(repo, self.context)
+        return self.has_other_sponsor_links(
+            repo, sources, num_org_funders, top_contribs
+        )
+
+    async def ahas_sponsor_this_project(
+        self,
+        session: aiohttp.ClientSession,
+        repo: str,
+        num_org_funders: int,
+        top_contribs: list,
+    ) -> bool:
+        """
+        Async version of `has_sponsor_this_project`
+        :param session: aiohttp session used to make the request
+        :param repo: GitHub repo slug
+        :param num_org_funders: Number of organizational funders this project has
+        :param top_contribs: List of top contributors
+        :return: True if has other "sponsor this project" sponsors, False otherwise
+        """
+        sources = await aget_funding_sources(session, repo, self.context)
+        return self.has_other_sponsor_links(
+            repo, sources, num_org_funders, top_contribs
+        )
+
+    def has_other_sponsor_links(
+        self, repo: str, sources: list, num_org_funders: int, top_contribs: list
+    ) -> bool:
+        """
+        Filters links listed under "sponsor this project" to those that are (a) github sponsor links and (b) are
+        not organizational or user pages we've already detected.
+        :param repo: GitHub repo slug
+        :param sources: Links listed under "sponsor this project"
+        :param num_org_funders: Number of organizational funders this project has
+        :param top_contribs: List of top contributors
+        :return: True if has other "sponsor this project" sponsors, False otherwise
+        """
         for source in sources:
             # Check whether we're looking at a github sponsors link
             if "github.com/sponsors" not in source:
@@ -192,31 +287,51 @@ class GitHubSponsorsFinder(Finder):
             # If the sponsored entity is one of the top contributors, then we're already counting them and can skip
             return sponsored_entity not in top_contribs
 
-    def run(self, gh_project_slug: Union[str, None] = None) -> list:
+    def get_signal_sources(self, signals: dict) -> list:
+        """
+        Determines organizational and contributor-level funding from a repo's GitHub signals
+        :param signals: Dict of GitHub signals, see `github_signals.fetch_github_signals`
+        :return: List of funding sources
+        """
         sources = []
-        org = self.get_owner_name(gh_project_slug)
-        num_org_funders = self.get_org_funder_count(org)
-        if num_org_funders:
+        if signals["org_sponsors"]:
             sources.append(
-                {"funding_type": "organizational", "num_contributors": num_org_funders}
+                {
+                    "funding_type": "organizational",
+                    "num_contributors": signals["org_sponsors"],
+                }
             )
-        top_contribs = self.get_gh_top_contributors_json(gh_project_slug)
-        has_contributor_sponsors = False
-        for contrib in top_contribs:
-            sponsors_json = self.get_gh_user_gh_sponsors(contrib)
-            num_sponsors = self.parse_gh_user_gh_sponsors_json(sponsors_json)
-            if num_sponsors:
-                has_contributor_sponsors = True
-        if has_contributor_sponsors:
+        if any(signals["user_sponsors"].values()):
             # num_contributors is tricky to include here because we would have to deduplicate across users
             sources.append({"funding_type": "individual"})
-        is_sponsor_this_project = self.has_sponsor_this_project(
-            gh_project_slug, num_org_funders, sources
-        )
-        if is_sponsor_this_project:
+        return sources
+
+    def run(self, gh_project_slug: Union[str, None] = None) -> list:
+        # Shared with the other finders of this lookup, see `github_signals.get_repo_signals`
+        signals = get_repo_signals(gh_project_slug, self.session, self.context)
+        sources = self.get_signal_sources(signals)
+        # GitHub only shows "sponsor this project" links for repos with a FUNDING.yml, so we only need to scrape
+        # the repo's page if it has one
+        if signals["funding_yml"] and self.has_sponsor_this_project(
+            gh_project_slug, signals["org_sponsors"], sources
+        ):
             sources.append({"funding_type": "sponsor_this_project"})
         return sources
 
+    async def arun(
+        self,
+        gh_project_slug: Union[str, None] = None,
+        session: Union[aiohttp.ClientSession, None] = None,
+    ) -> list:
+        async with async_session(session) as session:
+            signals = await aget_repo_signals(session, gh_project_slug, self.context)
+            sources = self.get_signal_sources(signals)
+            if signals["funding_yml"] and await self.ahas_sponsor_this_project(
+                session, gh_project_slug, signals["org_sponsors"], sources
+            ):
+                sources.append({"funding_type": "sponsor_this_project"})
+        return sources
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -1,8 +1,8 @@
 import argparse
-import json
-import os
 from typing import Union
 
+from funderfinder.utils.datasets import get_dataset_index
+
 from ._finder import Finder
 
 """
@@ -18,6 +18,65 @@ updated on a weekly basis via a Github Action (.github/workflows/update_datasets
 class GSOCFinder(Finder):
     name = "Google Summer of Code"
 
+    # Results only change with the dataset, and are discarded when it does
+    cache_ttl = 30 * 24 * 60 * 60
+    requires_network = False
+    DATA_FILE = "gsoc.jsonl"
+    # Years are stored as bits of an integer, counting from this year
+    FIRST_YEAR = 2000
+
+    @classmethod
+    def build_index(cls, projects: iter) -> dict:
+        """
+        Indexes the years each repo or owner participated in GSOC, keyed by both the exact repo (or org) identifiers
+        listed in our dataset and by their owners
+        :param projects: Iterable of GSOC project metadata
+        :return: Dict mapping "repos" and "owners" to dicts from identifiers to a bitmask of the years they
+            participated, see `get_years`
+        """
+        index = {"repos": {}, "owners": {}}
+        for project_metadata in projects:
+            year_bit = 1 << (project_metadata["year"] - cls.FIRST_YEAR)
+            for proj in project_metadata["repos"]:
+                index["repos"][proj] = index["repos"].get(proj, 0) | year_bit
+                owner = cls.get_owner_name(proj)
+                index["owners"][owner] = index["owners"].get(owner, 0) | year_bit
+        return index
+
+    @classmethod
+    def get_years(cls, years_mask: int) -> list:
+        """
+        Converts a bitmask of years from our index to a list of years
+        :param years_mask: Bitmask where bit i is set if the project participated in year FIRST_YEAR + i
+        :return: Sorted list of years
+        """
+        return [
+            cls.FIRST_YEAR + i
+            for i in range(years_mask.bit_length())
+            if years_mask >> i & 1
+        ]
+
+    def get_index(self) -> dict:
+        """
+        Returns the index of our GSOC dataset, loading it on first use
+        :return: Dict of GSOC participation, see `build_index`
+        """
+        return get_dataset_index(self.DATA_FILE, self.build_index)
+
+    def get_years_matched(self, slug: str) -> list:
+        """
+        Retrieves the years a project participated in GSOC. A project matches if its slug exactly matches a repo or
+        org in our dataset, or if the slug is an owner and any of its repos are in our dataset
+        :param slug: Project owner or slug (owner/repo)
+        :return: Sorted list of years
+        """
+        index = self.get_index()
+        slug_is_org = "/" not in slug
+        years_mask = index["repos"].get(slug, 0)
+        if slug_is_org:
+            years_mask |= index["owners"].get(slug, 0)
+        return self.get_years(years_mask)
+
     def get_funding_stats(self, search_params: dict) -> Union[dict, None]:
         """
         Determines whether a project is sponsored or affiliated with GSOC based on our scraped dataset and
@@ -25,27 +84,13 @@ class GSOCFinder(Finder):
         :param search_params: Dict of user-provided metadata that we can use to match a GSOC project
         :return: Dict of funding stats
         """
-        listing_file = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "..", "data", "gsoc.jsonl"
-        )
-        years_matched = set()
-        slug = search_params["slug"]
-        slug_is_org = "/" not in slug
-        with open(listing_file) as f:
-            for line in f:
-                project_metadata = json.loads(line.strip())
-                is_exact_match = slug in project_metadata["repos"]
-                is_owner_match = slug in [
-                    self.get_owner_name(proj) for proj in project_metadata["repos"]
-                ]
-                if is_exact_match or (slug_is_org and is_owner_match):
-                    years_matched.add(project_metadata["year"])
+        years_matched = self.get_years_matched(search_params["slug"])
         if years_matched:
             # Put the "contribution date" in May since this is when GSOC starts
             return {
                 "contributions": [
                     {"date_contribution_made": f"{year}-05-01"}
-                    for year in sorted(years_matched)
+                    for year in years_matched
                 ]
             }
 
@@ -1,8 +1,8 @@
 import argparse
-import json
-import os
 from typing import Union
 
+from funderfinder.utils.datasets import get_dataset_index
+
 from ._finder import Finder
 
 """
@@ -18,6 +18,34 @@ updated on a weekly basis via a Github Action (.github/workflows/update_datasets
 class NumFocusFinder(Finder):
     name = "NumFOCUS"
 
+    # Results only change with the dataset, and are discarded when it does
+    cache_ttl = 30 * 24 * 60 * 60
+    requires_network = False
+    DATA_FILE = "numfocus.jsonl"
+
+    @staticmethod
+    def build_index(projects: iter) -> dict:
+        """
+        Indexes the lowercased value of each metadata field (name, slug, github_name, ...) of every NumFOCUS project
+        :param projects: Iterable of NumFOCUS project metadata
+        :return: Dict mapping each metadata field to a dict whose keys are the field's (non-null) lowercased values
+        """
+        index = {}
+        for project_metadata in projects:
+            for key, value in project_metadata.items():
+                values = index.setdefault(key, {})
+                if value:
+                    values[value.lower()] = 1
+        return index
+
+    @staticmethod
+    def get_index() -> dict:
+        """
+        Returns the index of our NumFOCUS dataset, loading it on first use
+        :return: Dict of NumFOCUS project metadata values, see `build_index`
+        """
+        return get_dataset_index(NumFocusFinder.DATA_FILE, NumFocusFinder.build_index)
+
     @staticmethod
     def get_funding_stats(search_params: dict) -> Union[dict, None]:
         """
@@ -26,28 +54,20 @@ class NumFocusFinder(Finder):
         :param search_params: Dict of user-provided metadata that we can use to match a numfocus project
         :return: Dict of funding stats
         """
+        index = NumFocusFinder.get_index()
         is_affiliated = False
-        listing_file = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "..", "data", "numfocus.jsonl"
-        )
-        with open(listing_file) as f:
-            for line in f:
-                project_metadata = json.loads(line.strip())
-                for key in search_params:
-                    # In this block, we iterate through metadata fields provided by the user to match a numfocus project.
-                    # Some of these fields may be null either in the user-provided input (`search_params`), or in the
-                    # metadata we have for the current numfocus project (`project_metadata`). If either of these values
-                    # are null, run no further checks
-                    if not (project_metadata[key] and search_params[key]):
-                        continue
-                    is_affiliated |= (
-                        project_metadata[key].lower() == search_params[key].lower()
-                    )
-                    # In some cases the NumFOCUS affiliation is at the GitHub organization level rather than at the repo
-                    # level. So also allow match on repo owner
-                    if key == "github_name":
-                        owner = search_params[key].split("/")[0].lower()
-                        is_affiliated |= project_metadata[key].lower() == owner
+        for key in search_params:
+            # In this block, we check the metadata fields provided by the user against each numfocus project.
+            # Some of these fields may be null either in the user-provided input (`search_params`), or in the
+            # metadata we have for a numfocus project, in which case they never match
+            if not search_params[key]:
+                continue
+            is_affiliated |= search_params[key].lower() in index[key]
+            # In some cases the NumFOCUS affiliation is at the GitHub organization level rather than at the repo
+            # level. So also allow match on repo owner
+            if key == "github_name":
+                owner = search_params[key].split("/")[0].lower()
+                is_affiliated |= owner in index[key]
         if is_affiliated:
             return {
                 "is_funded": True,
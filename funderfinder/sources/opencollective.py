@@ -2,7 +2,9 @@ import argparse
 import os
 from typing import Union
 
-import requests
+import aiohttp
+
+from funderfinder.utils.transport import async_session
 
 from ._finder import Finder
 
@@ -15,6 +17,19 @@ an OPENCOLLECTIVE_API_KEY environment variable. See: https://graphql-docs-v2.ope
 class OpenCollectiveFinder(Finder):
     name = "Open Collective"
     API_KEY_NAME = "OPENCOLLECTIVE_API_KEY"
+    QUERY = """
+      query ($slug: String) {
+        collective (slug: $slug) {
+          totalFinancialContributors
+          stats {
+            totalAmountReceived {
+              currency
+              value
+            }
+          }
+        }
+      }
+    """
 
     def __init__(self):
         assert os.environ.get(
@@ -28,26 +43,34 @@ class OpenCollectiveFinder(Finder):
         :param project_slug: identifier for the project (like 'babel' in 'https://opencollective.com/babel')
         :return: Dict of funding stats
         """
-        query = """
-          query ($slug: String) {
-            collective (slug: $slug) {
-              totalFinancialContributors
-              stats {
-                totalAmountReceived {
-                  currency
-                  value
-                }
-              }
-            }
-          }
-        """
-        variables = {"slug": project_slug}
-
-        result = requests.post(
+        result = self.session.post(
             f"https://api.opencollective.com/graphql/v2/{self.api_key}",
-            json={"query": query, "variables": variables},
+            json={"query": self.QUERY, "variables": {"slug": project_slug}},
         )
-        data = result.json()
+        return self.parse_funding_stats(result.json())
+
+    async def aget_funding_stats(
+        self, session: aiohttp.ClientSession, project_slug: str
+    ) -> dict:
+        """
+        Async version of `get_funding_stats`
+        :param session: aiohttp session used to make the request
+        :param project_slug: identifier for the project (like 'babel' in 'https://opencollective.com/babel')
+        :return: Dict of funding stats
+        """
+        async with session.post(
+            f"https://api.opencollective.com/graphql/v2/{self.api_key}",
+            json={"query": self.QUERY, "variables": {"slug": project_slug}},
+        ) as result:
+            return self.parse_funding_stats(await result.json(content_type=None))
+
+    @staticmethod
+    def parse_funding_stats(data: dict) -> dict:
+        """
+        Extracts funding statistics from an Open Collective API response
+        :param data: JSON returned by the Open Collective collective query
+        :return: Dict of funding stats
+        """
         stats = data["data"]["collective"]
         if stats:
             return {
@@ -59,6 +82,17 @@ class OpenCollectiveFinder(Finder):
         stats = self.get_funding_stats(self.get_repo_name(gh_project_slug))
         return [stats] if stats else []
 
+    async def arun(
+        self,
+        gh_project_slug: Union[str, None] = None,
+        session: Union[aiohttp.ClientSession, None] = None,
+    ) -> list:
+        async with async_session(session) as session:
+            stats = await self.aget_funding_stats(
+                session, self.get_repo_name(gh_project_slug)
+            )
+        return [stats] if stats else []
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -1,53 +1,84 @@
 """Retrieve funding stats related to Tidelift funding."""
 import argparse
+import os
 from typing import Union
 
-import requests
+import aiohttp
 
-from funderfinder.utils.github_sources import get_funding_sources
+from funderfinder.utils.github_signals import (
+    API_KEY,
+    aget_repo_signals,
+    areadme_contains,
+    get_repo_signals,
+    readme_contains,
+)
+from funderfinder.utils.github_sources import aget_funding_sources, get_funding_sources
+from funderfinder.utils.transport import async_session
 
 from ._finder import Finder
 
 
 class TideliftFinder(Finder):
     name = "Tidelift"
+    keyword = "tidelift"
 
-    @staticmethod
-    def is_funded(text: str) -> bool:
+    def __init__(self, run_checks=True):
+        # READMEs and FUNDING.yml files are retrieved with GitHub's GraphQL API, which requires a token. Checked
+        # explicitly rather than with an assert, so that the check isn't skipped under `python -O`
+        if run_checks and not os.environ.get(API_KEY):
+            raise ValueError(
+                f"The Tidelift finder needs a GitHub token, please `export {API_KEY}=<your GitHub token>`"
+            )
+
+    @classmethod
+    def is_funded(cls, text: str) -> bool:
         """
         Checks whether text indicates that project is funded by Tidelift
         :param text: Text that may include tidelift funding statement
         :return: True if project is funded by tidelift
         """
-        return "tidelift" in text.lower()
+        return cls.keyword in text.lower()
 
     def get_funding_stats(self, params: dict) -> dict:
         """
-        Retrieve tidelift funding. Check README for tidelift
+        Retrieve tidelift funding. Check README for tidelift, then the links listed under "Sponsor this project"
         e.g. https://github.com/georgetown-cset/funder-finder -> georgetown-cset/funder-finder
         :param params: Dict of user-provided metadata
         :return: dict
         """
-        # try most likely README names
-        readme_names = [
-            "README.md",
-            "Readme.md",
-            "readme.md",
-            "README.rst",
-            "Readme.rst",
-            "readme.rst",
-        ]
-        for name in readme_names:
-            for branch in ["main", "master"]:
-                r = requests.get(
-                    f"https://raw.githubusercontent.com/{params['owner']}/{params['repo']}/{branch}/{name}"
-                )
-                if r.status_code != 200:
-                    continue
-                params["is_funded"] = self.is_funded(r.text)
-                if params["is_funded"]:
-                    return params
-        sponsor_links = get_funding_sources(f"{params['owner']}/{params['repo']}")
+        repo = f"{params['owner']}/{params['repo']}"
+        signals = get_repo_signals(repo, self.session, self.context)
+        params["is_funded"] = self.is_funded(signals["readme"] or "")
+        if signals["readme"] is None and signals["default_branch"] is not None:
+            # The repo exists but its README doesn't have one of the usual names, so ask GitHub where it is. The
+            # badge is usually near the top, so only download as much of the README as needed to find it
+            params["is_funded"] = readme_contains(repo, self.keyword, self.session)
+        # GitHub only shows "sponsor this project" links for repos with a FUNDING.yml, so we only need to scrape
+        # the repo's page if it has one
+        if params["is_funded"] or not signals["funding_yml"]:
+            return params
+        sponsor_links = get_funding_sources(repo, self.context)
+        for link in sponsor_links:
+            params["is_funded"] |= self.is_funded(link)
+        return params
+
+    async def aget_funding_stats(
+        self, session: aiohttp.ClientSession, params: dict
+    ) -> dict:
+        """
+        Async version of `get_funding_stats`
+        :param session: aiohttp session used to make the requests
+        :param params: Dict of user-provided metadata
+        :return: dict
+        """
+        repo = f"{params['owner']}/{params['repo']}"
+        signals = await aget_repo_signals(session, repo, self.context)
+        params["is_funded"] = self.is_funded(signals["readme"] or "")
+        if signals["readme"] is None and signals["default_branch"] is not None:
+            params["is_funded"] = await areadme_contains(session, repo, self.keyword)
+        if params["is_funded"] or not signals["funding_yml"]:
+            return params
+        sponsor_links = await aget_funding_sources(session, repo, self.context)
         for link in sponsor_links:
             params["is_funded"] |= self.is_funded(link)
         return params
@@ -62,6 +93,22 @@ class TideliftFinder(Finder):
         )
         return [stats] if stats["is_funded"] else []
 
+    async def arun(
+        self,
+        gh_project_slug: Union[str, None] = None,
+        session: Union[aiohttp.ClientSession, None] = None,
+    ) -> list:
+        async with async_session(session) as session:
+            stats = await self.aget_funding_stats(
+                session,
+                {
+                    "owner": self.get_owner_name(gh_project_slug),
+                    "repo": self.get_repo_name(gh_project_slug),
+                    "is_funded": False,
+                },
+            )
+        return [stats] if stats["is_funded"] else []
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
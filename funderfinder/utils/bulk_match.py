@@ -0,0 +1,104 @@
+"""
+Matches a large list of GitHub repos against our GSOC and NumFOCUS datasets in a single pass, without running
+the finders (or making any network requests) one repo at a time. Matching is the same as in `GSOCFinder` and
+`NumFocusFinder`, but each dataset is indexed once and every repo is then a handful of dict lookups.
+
+Input is either a file with one `owner/repo` slug per line, or a CSV file with a header row (specify the column
+containing slugs with --column). Output is a CSV file with one row per input slug:
+
+  * slug - the input slug
+  * gsoc_years - years the repo (or its owner, if the slug is an owner) participated in GSOC, separated by ";"
+  * is_numfocus - True if the repo or its owner is affiliated with NumFOCUS
+"""
+
+import argparse
+import csv
+import sys
+from typing import Union
+
+from funderfinder.sources.gsoc import GSOCFinder
+from funderfinder.sources.numfocus import NumFocusFinder
+
+OUTPUT_FIELDS = ["slug", "gsoc_years", "is_numfocus"]
+
+
+def read_slugs(lines: iter, column: Union[str, None] = None) -> iter:
+    """
+    Reads slugs from a list of slugs, or from one column of a CSV file
+    :param lines: Iterable of lines (e.g. an open file)
+    :param column: Name of the CSV column containing slugs, or None if there is one slug per line
+    :return: A generator of slugs
+    """
+    if column:
+        lines = (row[column] for row in csv.DictReader(lines))
+    for line in lines:
+        slug = line.strip() if line else ""
+        if slug:
+            yield slug
+
+
+def match_slugs(slugs: iter) -> iter:
+    """
+    Matches each slug against the GSOC and NumFOCUS datasets
+    :param slugs: Iterable of GitHub slugs (owner/repo or owner)
+    :return: A generator of dicts containing OUTPUT_FIELDS for each slug
+    """
+    gsoc_finder = GSOCFinder()
+    for slug in slugs:
+        numfocus_stats = NumFocusFinder.get_funding_stats(
+            {
+                "name": None,
+                "slug": NumFocusFinder.get_repo_name(slug),
+                "github_name": slug,
+            }
+        )
+        yield {
+            "slug": slug,
+            "gsoc_years": ";".join(
+                str(year) for year in gsoc_finder.get_years_matched(slug)
+            ),
+            "is_numfocus": numfocus_stats is not None,
+        }
+
+
+def write_matches(
+    input_file: str,
+    output_file: Union[str, None] = None,
+    column: Union[str, None] = None,
+) -> None:
+    """
+    Matches each slug in `input_file` against the GSOC and NumFOCUS datasets and writes a CSV of the results
+    :param input_file: File containing slugs, or "-" to read from stdin
+    :param output_file: File the CSV of results should be written to. Defaults to stdout
+    :param column: Name of the CSV column containing slugs, or None if there is one slug per line
+    :return: None
+    """
+    infile = sys.stdin if input_file == "-" else open(input_file, newline="")
+    out = sys.stdout if output_file is None else open(output_file, mode="w", newline="")
+    try:
+        writer = csv.DictWriter(out, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        writer.writerows(match_slugs(read_slugs(infile, column)))
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "input_file",
+        help="File containing one GitHub slug (e.g. nipy/nibabel) per line, or a CSV file if --column is "
+        "specified. Use `-` to read from stdin",
+    )
+    parser.add_argument(
+        "--column", help="Name of the column containing GitHub slugs in a CSV file"
+    )
+    parser.add_argument(
+        "--output_file", help="File to write CSV of results to. Defaults to stdout"
+    )
+    args = parser.parse_args()
+
+    write_matches(args.input_file, args.output_file, args.column)
@@ -0,0 +1,376 @@
+"""
+Crawl engine for the dataset builders (list_gsoc and list_numfocus). Requests are added to a frontier of pending
+requests, grouped by host, and a pool of fetcher threads takes the next request from whichever host is ready. This
+means different hosts are crawled in parallel, while each host gets at most `max_per_host` concurrent requests,
+started at least `delay` seconds apart. Requests that fail with a connection error, a timeout, or a 429 or 5xx
+response are retried with exponential backoff, during which the whole host is paused.
+
+Builders describe their work as tasks (e.g. "retrieve this organization and its student projects") and run them
+with `Crawler.map`, fetching pages with `Crawler.fetch` or, to fetch several at once, `Crawler.submit`. Parsing
+pages and extracting links from them is CPU-bound, so tasks hand it to a process pool with `Crawler.parse` (or
+`Crawler.submit_parse`), which keeps it off the fetching threads and out of the GIL. At most `max_parse_queue` pages
+wait to be parsed at a time, so tasks that fetch faster than pages can be parsed wait instead of piling up pages in
+memory. Crawlers
+made with `create_crawler` can also store every page they fetch in a `PageArchive`, or fetch pages from one instead
+of the network.
+"""
+
+import argparse
+import collections
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from funderfinder.utils.page_archive import ArchiveSession, PageArchive
+from funderfinder.utils.transport import PooledSession
+from funderfinder.utils.utils import SCRAPE_DELAY
+
+MAX_FETCHERS = 16
+MAX_PER_HOST = 2
+# Number of tasks each call to `Crawler.map` runs at once
+MAX_TASKS = 16
+MAX_RETRIES = 3
+# Number of processes to parse pages in
+PARSE_WORKERS = os.cpu_count() or 1
+# Number of pages per parse process that may wait to be parsed
+PARSE_QUEUE_PER_WORKER = 4
+TIMEOUT = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LOGGER = logging.getLogger("crawler")
+
+_crawler = None
+_crawler_lock = threading.Lock()
+
+
+class CrawlRequest:
+    """
+    A request in the frontier
+    """
+
+    def __init__(self, url: str, kwargs: dict, key: tuple, future: Future):
+        self.url = url
+        self.kwargs = kwargs
+        self.key = key
+        self.future = future
+        self.attempt = 0
+
+
+class Host:
+    """
+    Crawl state of one host
+    """
+
+    def __init__(self):
+        self.pending = collections.deque()
+        self.in_flight = 0
+        self.next_start = 0.0
+
+
+class Crawler:
+    """
+    Fetches pages concurrently across hosts while keeping each host's load polite. Safe to share between threads
+    """
+
+    def __init__(
+        self,
+        max_fetchers: int = MAX_FETCHERS,
+        max_per_host: int = MAX_PER_HOST,
+        delay: float = SCRAPE_DELAY,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = SCRAPE_DELAY,
+        timeout: Union[float, tuple] = TIMEOUT,
+        session: Union[requests.Session, None] = None,
+        archive: Union[PageArchive, None] = None,
+        parse_workers: int = PARSE_WORKERS,
+        max_parse_queue: Union[int, None] = None,
+    ):
+        """
+        :param max_fetchers: Number of requests to make at once, across all hosts
+        :param max_per_host: Number of requests to make at once to any one host
+        :param delay: Number of seconds between the starts of two requests to the same host
+        :param max_retries: Number of times to retry a failed request
+        :param backoff: Number of seconds to pause a host for after a failed request, doubling with each retry
+        :param timeout: Default timeout of requests, see `requests.request`
+        :param session: Session to make requests with. Defaults to a new `PooledSession`. Closed with the crawler
+        :param archive: Archive to store fetched pages in, if any. Closed with the crawler
+        :param parse_workers: Number of processes to parse pages in. If 0, pages are parsed in the calling thread
+        :param max_parse_queue: Number of pages that may wait to be parsed. Defaults to `PARSE_QUEUE_PER_WORKER`
+            per parse process
+        """
+        self.max_fetchers = max_fetchers
+        self.max_per_host = max_per_host
+        self.delay = delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or PooledSession(
+            timeout=timeout, pool_maxsize=max_per_host
+        )
+        self.archive = archive
+        self.parse_workers = parse_workers
+        self.parse_queue = threading.BoundedSemaphore(
+            max_parse_queue or PARSE_QUEUE_PER_WORKER * max(parse_workers, 1)
+        )
+        self.parse_pool = None
+        self.condition = threading.Condition()
+        self.hosts = {}
+        # Maps each request that hasn't been answered yet to its future, so that duplicate requests share it
+        self.frontier = {}
+        self.fetchers = []
+        self.closed = False
+
+    def __enter__(self) -> "Crawler":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def submit(self, url: str, **kwargs) -> Future:
+        """
+        Adds a GET request to the frontier
+        :param url: URL to request
+        :param kwargs: Keyword arguments passed through to `requests.Session.get`, e.g. `headers`
+        :return: Future of the response. Responses with an error status are returned once retries are exhausted;
+            requests that still raise an exception then set it on the future
+        """
+        key = (url, repr(sorted(kwargs.items())))
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Cannot submit requests to a closed crawler")
+            if key in self.frontier:
+                return self.frontier[key]
+            future = Future()
+            self.frontier[key] = future
+            host = self.hosts.setdefault(urlsplit(url).netloc, Host())
+            host.pending.append(CrawlRequest(url, kwargs, key, future))
+            if len(self.fetchers) < self.max_fetchers:
+                fetcher = threading.Thread(target=self.run_fetcher, daemon=True)
+                fetcher.start()
+                self.fetchers.append(fetcher)
+            self.condition.notify()
+        return future
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        """
+        Makes a GET request through the frontier and waits for its response
+        :param url: URL to request
+        :param kwargs: Keyword arguments passed through to `requests.Session.get`, e.g. `headers`
+        :return: Response
+        """
+        return self.submit(url, **kwargs).result()
+
+    def map(self, func: Callable, items: iter, max_workers: int = MAX_TASKS) -> iter:
+        """
+        Starts running a task for each item concurrently. Tasks fetch pages through the crawler, so many tasks can
+        wait on the same host without taking up its fetchers, and tasks can themselves call `map`
+        :param func: Task, taking an item as its argument
+        :param items: Items to run the task on
+        :param max_workers: Number of tasks to run at once
+        :return: A generator of the tasks' results, in the order of `items`, yielding each result as soon as it
+            and the results before it are ready
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        results = executor.map(func, items)
+        # The executor's threads exit once they have run every task
+        executor.shutdown(wait=False)
+        return results
+
+    def submit_parse(self, func: Callable, *args) -> Future:
+        """
+        Adds a parsing job to the parse queue, waiting for room in the queue if it is full
+        :param func: Module-level function to run, so that it can be sent to the parse processes
+        :param args: Picklable arguments of the function, e.g. the page's text
+        :return: Future of the function's result
+        """
+        self.parse_queue.acquire()
+        try:
+            if self.parse_workers == 0:
+                future = Future()
+                try:
+                    future.set_result(func(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                with self.condition:
+                    if self.closed:
+                        raise RuntimeError("Cannot parse pages with a closed crawler")
+                    if self.parse_pool is None:
+                        # Fetcher threads may hold locks while the pool starts its processes, so don't fork them
+                        self.parse_pool = ProcessPoolExecutor(
+                            self.parse_workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    future = self.parse_pool.submit(func, *args)
+        except BaseException:
+            self.parse_queue.release()
+            raise
+        future.add_done_callback(lambda _: self.parse_queue.release())
+        return future
+
+    def parse(self, func: Callable, *args) -> object:
+        """
+        Runs a parsing job in the parse processes and waits for its result
+        :param func: Module-level function to run, so that it can be sent to the parse processes
+        :param args: Picklable arguments of the function, e.g. the page's text
+        :return: The function's result
+        """
+        return self.submit_parse(func, *args).result()
+
+    def next_request(self) -> tuple:
+        """
+        Waits until a host is ready for another request, and takes its next request from the frontier. Must be
+        called with the condition held
+        :return: Tuple of the host and the request, or (None, None) once the crawler is closed
+        """
+        while not self.closed:
+            now = time.monotonic()
+            wait = None
+            for host in self.hosts.values():
+                if not host.pending or host.in_flight >= self.max_per_host:
+                    continue
+                if host.next_start <= now:
+                    host.in_flight += 1
+                    host.next_start = now + self.delay
+                    return host, host.pending.popleft()
+                wait = min(wait or host.next_start - now, host.next_start - now)
+            self.condition.wait(wait)
+        return None, None
+
+    def run_fetcher(self) -> None:
+        """
+        Makes requests from the frontier until the crawler is closed
+        :return: None
+        """
+        while True:
+            with self.condition:
+                host, request = self.next_request()
+            if request is None:
+                return
+            self.make_request(host, request)
+
+    def make_request(self, host: Host, request: CrawlRequest) -> None:
+        """
+        Makes a request, putting it back at the front of its host's queue if it should be retried
+        :param host: Host of the request
+        :param request: Request
+        :return: None
+        """
+        response = error = None
+        try:
+            response = self.session.get(
+                request.url, **{"timeout": self.timeout, **request.kwargs}
+            )
+        except requests.exceptions.RequestException as e:
+            error = e
+        with self.condition:
+            host.in_flight -= 1
+            retry = (
+                not self.closed
+                and request.attempt < self.max_retries
+                and (error is not None or response.status_code in RETRY_STATUSES)
+            )
+            if retry:
+                request.attempt += 1
+                backoff = self.backoff * 2 ** (request.attempt - 1)
+                retry_after = (
+                    None if response is None else response.headers.get("Retry-After")
+                )
+                if retry_after is not None and retry_after.isdigit():
+                    backoff = max(backoff, int(retry_after))
+                host.next_start = max(host.next_start, time.monotonic() + backoff)
+                host.pending.appendleft(request)
+                LOGGER.warning(
+                    f"Retrying {request.url} in {backoff}s after "
+                    f"{error or response.status_code} (attempt {request.attempt})"
+                )
+            else:
+                self.frontier.pop(request.key, None)
+            self.condition.notify_all()
+        if retry:
+            return
+        if response is not None and self.archive is not None:
+            self.archive.add(response)
+        if error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(response)
+
+    def close(self) -> None:
+        """
+        Stops the fetchers and parse processes, cancelling requests that haven't been made yet, and closes the
+        session and archive
+        :return: None
+        """
+        with self.condition:
+            self.closed = True
+            for host in self.hosts.values():
+                for request in host.pending:
+                    request.future.cancel()
+                host.pending.clear()
+            self.frontier.clear()
+            self.condition.notify_all()
+        for fetcher in self.fetchers:
+            if fetcher is not threading.current_thread():
+                fetcher.join()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(cancel_futures=True)
+        self.session.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+def create_crawler(
+    archive_file: Union[str, None] = None, reextract: bool = False
+) -> Crawler:
+    """
+    Creates a crawler for a dataset builder run
+    :param archive_file: Path to the page archive, if any
+    :param reextract: If True, fetch pages from the archive instead of the network. Pages missing from the archive
+        raise `PageNotArchived`
+    :return: Crawler. Stores the pages it fetches in the archive, unless re-extracting
+    """
+    if archive_file is None:
+        if reextract:
+            raise ValueError("Re-extracting requires a page archive")
+        return Crawler()
+    if reextract:
+        # Reading from the archive is fast and can't fail transiently, so there's no need to pace or retry
+        return Crawler(
+            delay=0, max_retries=0, session=ArchiveSession(PageArchive(archive_file))
+        )
+    return Crawler(archive=PageArchive(archive_file))
+
+
+def get_crawler() -> Crawler:
+    """
+    Returns the process-wide crawler shared by the dataset builders, creating it on first use
+    :return: Shared crawler
+    """
+    global _crawler
+    if _crawler is None:
+        with _crawler_lock:
+            if _crawler is None:
+                _crawler = Crawler()
+    return _crawler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="+", help="URLs to fetch")
+    parser.add_argument("--max_per_host", type=int, default=MAX_PER_HOST)
+    parser.add_argument("--delay", type=float, default=SCRAPE_DELAY)
+    args = parser.parse_args()
+
+    with Crawler(max_per_host=args.max_per_host, delay=args.delay) as crawler:
+        start = time.monotonic()
+        for url, response in zip(args.urls, crawler.map(crawler.fetch, args.urls)):
+            print(f"{response.status_code} {len(response.content)} bytes {url}")
+        print(f"Fetched {len(args.urls)} pages in {time.monotonic() - start:.1f}s")
@@ -0,0 +1,450 @@
+"""
+Loads the datasets bundled in ../data once per process. Each dataset is turned into an index: a dict mapping table
+names to lookup tables keyed by normalized identifiers (e.g. {"repos": {"owner/repo": ...}, "owners": {...}}), built
+by a function that knows the dataset's format.
+
+Indexes can also be compiled ahead of time into a single binary file (../data/datasets.bin) by running this module:
+
+  python -m funderfinder.utils.datasets
+
+The compiled file stores each table as a sorted key table that is binary searched in place, so when it is present
+and up to date, processes memory-map it instead of parsing any JSON, and forked workers share one page-cache copy.
+If the compiled file is missing, or was compiled from an older version of a dataset, we fall back to building the
+index from the dataset itself.
+
+The dataset builders publish datasets with `write_dataset`, which streams records to a temporary file and renames it
+into place once it is complete and synced to disk, so readers never see a partially written dataset. It then writes
+a version stamp (e.g. gsoc.jsonl.version) holding the dataset's sha256, so that checking whether a dataset has
+changed (see `get_dataset_version`) doesn't require hashing it.
+
+Compiled file layout (all integers little-endian):
+
+  * header: magic, format version, number of datasets, number of tables
+  * one entry per dataset: file name, sha256 of the file it was compiled from
+  * one entry per table: dataset file name, table name, value type, number of keys, offset of the key entries,
+    offset of the string blob
+  * for each table, `count` fixed-size key entries sorted by key, followed by a blob of utf-8 strings that the
+    entries point into. Each entry holds the key's offset and length in the blob, and either an unsigned 64-bit
+    integer value, or the offset and length of a string value in the blob
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Union
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+COMPILED_FILE = "datasets.bin"
+VERSION_SUFFIX = ".version"
+
+MAGIC = b"FFDS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHII")
+DATASET_ENTRY = struct.Struct("<64s32s")
+TABLE_ENTRY = struct.Struct("<64s32sBIQQ")
+KEY_ENTRY = struct.Struct("<IIQ")
+INT_VALUE = 0
+STR_VALUE = 1
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_compiled = {}
+_compiled_lock = threading.Lock()
+_versions = {}
+
+
+def get_dataset_path(file_name: str) -> str:
+    """
+    Returns the path to one of the bundled datasets
+    :param file_name: Name of the dataset file, e.g. gsoc.jsonl
+    :return: Path to the dataset file
+    """
+    return os.path.join(DATA_DIR, file_name)
+
+
+def read_jsonl(path: str) -> iter:
+    """
+    Reads records from a jsonl file
+    :param path: Path to the jsonl file
+    :return: A generator of records
+    """
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line.strip())
+
+
+def read_dataset(path: str) -> Any:
+    """
+    Reads a dataset. jsonl files are read as an iterable of records; any other file is read as a single JSON value
+    :param path: Path to the dataset
+    :return: Dataset contents
+    """
+    if path.endswith(".jsonl"):
+        return read_jsonl(path)
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_file_digest(path: str) -> bytes:
+    """
+    Returns the sha256 digest of a file
+    :param path: Path to the file
+    :return: Digest
+    """
+    with open(path, mode="rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def get_version_path(path: str) -> str:
+    """
+    Returns the path to a dataset's version stamp
+    :param path: Path to the dataset
+    :return: Path to the version stamp
+    """
+    return path + VERSION_SUFFIX
+
+
+def read_version_stamp(path: str) -> Union[dict, None]:
+    """
+    Reads a dataset's version stamp, if it describes the dataset's current contents. A stamp is only trusted if it
+    records the dataset's current size and was written after the dataset was last modified
+    :param path: Path to the dataset
+    :return: Dict with the dataset's "sha256", "size", "records" and "written_at", or None if there is no current
+        stamp
+    """
+    version_path = get_version_path(path)
+    try:
+        stat = os.stat(path)
+        stamp_stat = os.stat(version_path)
+        with open(version_path) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if stamp.get("size") != stat.st_size or stamp_stat.st_mtime_ns < stat.st_mtime_ns:
+        return None
+    return stamp
+
+
+def get_dataset_version(file_name: str) -> str:
+    """
+    Returns an identifier of the current contents of a bundled dataset, which changes whenever the file does. This
+    is read from the dataset's version stamp if it is current, and otherwise the file is hashed, only hashing it
+    again when its size or modification time changes
+    :param file_name: Name of the dataset file, e.g. gsoc.jsonl
+    :return: Hex sha256 digest of the file
+    """
+    path = get_dataset_path(file_name)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _versions:
+        stamp = read_version_stamp(path)
+        _versions[key] = (
+            stamp["sha256"] if stamp is not None else get_file_digest(path).hex()
+        )
+    return _versions[key]
+
+
+@contextlib.contextmanager
+def atomic_write(path: str) -> iter:
+    """
+    Opens a temporary file to write a file's new contents to. Once the block exits without an exception, the
+    temporary file is synced to disk and renamed into place, otherwise it is removed and the file is left as it was
+    :param path: Path to the file
+    :return: A context manager yielding the temporary file, opened in binary mode
+    """
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, mode="wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_file)
+        raise
+    if os.name == "posix":
+        # Make the rename itself durable
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_dataset(path: str, records: iter) -> dict:
+    """
+    Publishes a jsonl dataset atomically, streaming its records to disk as they are produced, then writes its
+    version stamp
+    :param path: Path to the dataset
+    :param records: Iterable of JSON-serializable records
+    :return: The dataset's version stamp, see `read_version_stamp`
+    """
+    digest = hashlib.sha256()
+    num_records = 0
+    size = 0
+    with atomic_write(path) as out:
+        for record in records:
+            line = (json.dumps(record) + "\n").encode("utf-8")
+            digest.update(line)
+            out.write(line)
+            num_records += 1
+            size += len(line)
+    stamp = {
+        "sha256": digest.hexdigest(),
+        "size": size,
+        "records": num_records,
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with atomic_write(get_version_path(path)) as out:
+        out.write((json.dumps(stamp, indent=2) + "\n").encode("utf-8"))
+    return stamp
+
+
+class CompiledTable:
+    """
+    Read-only mapping over one table of a compiled datasets file. Lookups binary search the table's sorted key
+    entries in place
+    """
+
+    def __init__(
+        self, buf: mmap.mmap, value_type: int, count: int, entries: int, strings: int
+    ):
+        self.buf = buf
+        self.value_type = value_type
+        self.count = count
+        self.entries = entries
+        self.strings = strings
+
+    def _key_at(self, i: int) -> bytes:
+        key_offset, key_len, _ = KEY_ENTRY.unpack_from(
+            self.buf, self.entries + i * KEY_ENTRY.size
+        )
+        start = self.strings + key_offset
+        return self.buf[start : start + key_len]
+
+    def _value_at(self, i: int) -> Union[int, str]:
+        _, _, value = KEY_ENTRY.unpack_from(self.buf, self.entries + i * KEY_ENTRY.size)
+        if self.value_type == INT_VALUE:
+            return value
+        start = self.strings + (value >> 32)
+        return self.buf[start : start + (value & 0xFFFFFFFF)].decode("utf-8")
+
+    def _find(self, key: str) -> int:
+        target = key.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == target:
+            return lo
+        return -1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._find(key)
+        return default if i < 0 else self._value_at(i)
+
+    def __getitem__(self, key: str) -> Union[int, str]:
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._value_at(i)
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) >= 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> iter:
+        return (self._key_at(i).decode("utf-8") for i in range(self.count))
+
+
+class CompiledDatasets:
+    """
+    Memory-mapped compiled datasets file
+    """
+
+    def __init__(self, path: str):
+        with open(path, mode="rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_datasets, num_tables = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} datasets file")
+        offset = HEADER.size
+        self.digests = {}
+        for _ in range(num_datasets):
+            name, digest = DATASET_ENTRY.unpack_from(self.buf, offset)
+            self.digests[name.rstrip(b"\0").decode("utf-8")] = digest
+            offset += DATASET_ENTRY.size
+        self.indexes = {}
+        for _ in range(num_tables):
+            (
+                dataset,
+                table,
+                value_type,
+                count,
+                entries,
+                strings,
+            ) = TABLE_ENTRY.unpack_from(self.buf, offset)
+            index = self.indexes.setdefault(dataset.rstrip(b"\0").decode("utf-8"), {})
+            index[table.rstrip(b"\0").decode("utf-8")] = CompiledTable(
+                self.buf, value_type, count, entries, strings
+            )
+            offset += TABLE_ENTRY.size
+
+    def is_current(self, file_name: str) -> bool:
+        """
+        Checks whether a dataset was compiled from the current version of its file
+        :param file_name: Name of the dataset file, e.g. gsoc.jsonl
+        :return: True if the compiled index for this dataset can be used
+        """
+        return (file_name in self.digests) and (
+            self.digests[file_name].hex() == get_dataset_version(file_name)
+        )
+
+
+def get_compiled_datasets() -> Union[CompiledDatasets, None]:
+    """
+    Returns the memory-mapped compiled datasets file, opening it on first use
+    :return: Compiled datasets, or None if the file hasn't been compiled
+    """
+    path = get_dataset_path(COMPILED_FILE)
+    if path not in _compiled:
+        with _compiled_lock:
+            if path not in _compiled:
+                _compiled[path] = (
+                    CompiledDatasets(path) if os.path.exists(path) else None
+                )
+    return _compiled[path]
+
+
+def get_dataset_index(file_name: str, build_index: Callable[[Any], dict]) -> dict:
+    """
+    Returns an index over a bundled dataset. The index is read from the compiled datasets file if it was compiled
+    from the current version of the dataset, and is otherwise built from the dataset on first use
+    :param file_name: Name of the dataset file, e.g. gsoc.jsonl
+    :param build_index: Function that builds the index from the dataset's contents (see `read_dataset`)
+    :return: Dict mapping table names to mappings from keys to values
+    """
+    # Key on the underlying function, since a classmethod is bound anew to each subclass of its finder
+    key = (file_name, getattr(build_index, "__func__", build_index))
+    if key not in _indexes:
+        with _indexes_lock:
+            if key not in _indexes:
+                compiled = get_compiled_datasets()
+                if compiled is not None and compiled.is_current(file_name):
+                    _indexes[key] = compiled.indexes[file_name]
+                else:
+                    _indexes[key] = build_index(
+                        read_dataset(get_dataset_path(file_name))
+                    )
+    return _indexes[key]
+
+
+def pack_table(table: dict, offset: int) -> tuple:
+    """
+    Serializes a table as sorted key entries followed by a string blob
+    :param table: Dict mapping string keys to non-negative integers or strings
+    :param offset: Position in the output file where the table will be written
+    :return: Tuple of the table's value type, its entry and string blob offsets, and its serialized bytes
+    """
+    value_type = (
+        STR_VALUE if any(isinstance(v, str) for v in table.values()) else INT_VALUE
+    )
+    keys = sorted(table, key=lambda k: k.encode("utf-8"))
+    strings = bytearray()
+    entries = bytearray()
+    for k in keys:
+        key_bytes = k.encode("utf-8")
+        key_offset = len(strings)
+        strings += key_bytes
+        if value_type == STR_VALUE:
+            value_bytes = table[k].encode("utf-8")
+            value = (len(strings) << 32) | len(value_bytes)
+            strings += value_bytes
+        else:
+            value = table[k]
+        entries += KEY_ENTRY.pack(key_offset, len(key_bytes), value)
+    return value_type, offset, offset + len(entries), bytes(entries + strings)
+
+
+def compile_datasets(index_builders: dict, output_file: str) -> None:
+    """
+    Compiles the indexes of bundled datasets into a single memory-mappable file. The file is written with
+    `atomic_write`, so processes reading the old version are unaffected
+    :param index_builders: Dict mapping dataset file names to the functions that build their indexes
+    :param output_file: Path the compiled file should be written to
+    :return: None
+    """
+    tables = []
+    digests = []
+    for file_name, build_index in sorted(index_builders.items()):
+        path = get_dataset_path(file_name)
+        digests.append((file_name, bytes.fromhex(get_dataset_version(file_name))))
+        index = build_index(read_dataset(path))
+        for table_name, table in sorted(index.items()):
+            tables.append((file_name, table_name, table))
+    offset = (
+        HEADER.size + len(digests) * DATASET_ENTRY.size + len(tables) * TABLE_ENTRY.size
+    )
+    table_entries = []
+    table_data = []
+    for file_name, table_name, table in tables:
+        value_type, entries, strings, data = pack_table(table, offset)
+        table_entries.append(
+            TABLE_ENTRY.pack(
+                file_name.encode("utf-8"),
+                table_name.encode("utf-8"),
+                value_type,
+                len(table),
+                entries,
+                strings,
+            )
+        )
+        table_data.append(data)
+        offset += len(data)
+    with atomic_write(output_file) as out:
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(digests), len(tables)))
+        for file_name, digest in digests:
+            out.write(DATASET_ENTRY.pack(file_name.encode("utf-8"), digest))
+        for entry in table_entries + table_data:
+            out.write(entry)
+
+
+def get_index_builders() -> dict:
+    """
+    Returns the functions that build the index of each bundled dataset
+    :return: Dict mapping dataset file names to index builders
+    """
+    # Imported here because these modules import this one
+    from funderfinder.sources.gsoc import GSOCFinder
+    from funderfinder.sources.numfocus import NumFocusFinder
+    from funderfinder.utils.list_numfocus import (
+        GITHUB_OVERRIDES_FILE,
+        build_overrides_index,
+    )
+
+    return {
+        GSOCFinder.DATA_FILE: GSOCFinder.build_index,
+        NumFocusFinder.DATA_FILE: NumFocusFinder.build_index,
+        GITHUB_OVERRIDES_FILE: build_overrides_index,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output_file", default=get_dataset_path(COMPILED_FILE))
+    args = parser.parse_args()
+
+    compile_datasets(get_index_builders(), args.output_file)
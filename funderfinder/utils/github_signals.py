@@ -0,0 +1,798 @@
+"""
+Retrieves everything the GitHub-based finders need to know about a repo from a single aliased GraphQL query:
+
+  * the number of GitHub sponsors of the repo's owner, if the owner is an organization
+  * the number of GitHub sponsors of each of a list of users (e.g. the repo's top contributors)
+  * the repo's default branch
+  * the text of the repo's README, if it has one of the names in README_NAMES
+  * the text of the FUNDING.yml file that GitHub uses to render the repo's "Sponsor this project" links, either
+    from the repo itself or from its owner's `.github` repository
+
+Only counts are requested for sponsors, and README and FUNDING.yml files are read from the default branch (HEAD).
+READMEs with other names can be retrieved with one more request through the REST contents API (see `get_readme`),
+or searched as they are downloaded (see `readme_contains`).
+
+`get_repo_signals` retrieves a repo's signals together with those of its top contributors, and memoizes them in a
+lookup context, so that every finder looking up a project shares one query.
+
+In batch runs, lookups can instead go through a `SignalsBatcher` (see `batching`), which combines the lookups of
+many repos into a few queries, requesting each owner and user only once.
+"""
+
+import argparse
+import contextlib
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Union
+
+import aiohttp
+import requests
+
+from funderfinder.utils.lookup_context import LookupContext
+from funderfinder.utils.transport import aiter_text, get_session, iter_text
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+README_URL = "https://api.github.com/repos/{}/readme"
+CONTRIBUTORS_URL = "https://api.github.com/repos/{}/contributors?page=1&per_page={}"
+API_KEY = "GITHUB_TOKEN"
+# most likely README names
+README_NAMES = [
+    "README.md",
+    "Readme.md",
+    "readme.md",
+    "README.rst",
+    "Readme.rst",
+    "readme.rst",
+]
+# Number of bytes of a README after which to stop searching it
+MAX_README_BYTES = 1024 * 1024
+# GitHub reads FUNDING.yml from any of these paths in a repo, or in its owner's `.github` repository
+FUNDING_FILE_PATHS = [".github/FUNDING.yml", "FUNDING.yml", "docs/FUNDING.yml"]
+# Batched queries are kept well under GitHub's node limit and resource limits; each repo requests up to nine files
+MAX_REPOS_PER_QUERY = 20
+MAX_USERS_PER_QUERY = 100
+# Number of seconds a lookup may wait for others to be batched with it
+BATCH_WAIT = 0.05
+# Number of repos whose signals a batcher keeps after they were retrieved. Owners and users are always kept
+MAX_CACHED_REPOS = 1000
+# Number of top contributors whose sponsor counts `get_repo_signals` retrieves
+NUM_TOP_CONTRIBUTORS = 3
+# Key the owner's signals are memoized under in a lookup context
+OWNER_SIGNALS_KEY = "github_signals"
+
+_batcher = None
+
+
+def get_blob_fields(prefix: str, paths: list) -> str:
+    """
+    Returns aliased GraphQL fields that retrieve the text of files on a repo's default branch
+    :param prefix: Prefix of each field's alias; fields are numbered in the order of `paths`
+    :param paths: Paths of the files to retrieve
+    :return: GraphQL fields
+    """
+    return "\n".join(
+        f'{prefix}{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}'
+        for i, path in enumerate(paths)
+    )
+
+
+def get_repo_fields() -> str:
+    """
+    Returns the GraphQL fields retrieved for each repo
+    :return: GraphQL fields
+    """
+    return f"""
+        defaultBranchRef {{
+          name
+        }}
+        {get_blob_fields("readme", README_NAMES)}
+        {get_blob_fields("funding", FUNDING_FILE_PATHS)}
+    """
+
+
+def get_sponsor_count(entity: Union[dict, None]) -> int:
+    """
+    Returns the number of sponsors of an organization or user
+    :param entity: GraphQL result for the organization or user, or None if it wasn't found
+    :return: Number of sponsors
+    """
+    return 0 if not entity else entity["sponsors"]["totalCount"]
+
+
+def build_signals_query(
+    owner: str, repo: str, users: list, include_owner: bool = True
+) -> dict:
+    """
+    Builds the GraphQL query retrieving all signals for a repo. User logins are passed as variables and
+    referenced through numbered aliases
+    :param owner: Owner of the repo
+    :param repo: Name of the repo
+    :param users: GitHub users whose sponsor counts should be retrieved
+    :param include_owner: Whether to retrieve the owner's signals (organization sponsor count and owner-level
+        FUNDING.yml). These can be left out when they are already known from another repo of the same owner
+    :return: Dict with the query and its variables, ready to be posted as JSON
+    """
+    user_params = "".join(f", $user{i}: String!" for i in range(len(users)))
+    user_fields = "\n".join(
+        f"user{i}: user(login: $user{i}) {{ sponsors {{ totalCount }} }}"
+        for i in range(len(users))
+    )
+    owner_fields = (
+        f"""
+          organization(login: $owner) {{
+            sponsors {{
+              totalCount
+            }}
+          }}
+          ownerDefaults: repository(owner: $owner, name: ".github") {{
+            {get_blob_fields("funding", FUNDING_FILE_PATHS)}
+          }}"""
+        if include_owner
+        else ""
+    )
+    query = f"""
+        query ($owner: String!, $repo: String!{user_params}) {{
+          repository(owner: $owner, name: $repo) {{
+            {get_repo_fields()}
+          }}{owner_fields}
+          {user_fields}
+        }}
+    """
+    variables = {"owner": owner, "repo": repo}
+    variables.update({f"user{i}": user for i, user in enumerate(users)})
+    return {"query": query, "variables": variables}
+
+
+def get_first_blob_text(repository: Union[dict, None], prefix: str) -> Union[str, None]:
+    """
+    Returns the text of the first file found among a set of aliased blob fields
+    :param repository: GraphQL result for a repository, or None if the repository wasn't found
+    :param prefix: Prefix of the aliases of the blob fields (see `get_blob_fields`)
+    :return: Text of the first file found, or None
+    """
+    if not repository:
+        return None
+    i = 0
+    while f"{prefix}{i}" in repository:
+        blob = repository[f"{prefix}{i}"]
+        if blob and blob.get("text") is not None:
+            return blob["text"]
+        i += 1
+    return None
+
+
+def get_data(result: dict) -> dict:
+    """
+    Returns the data of a signals query's result
+    :param result: JSON returned by GitHub for a signals query
+    :return: The result's `data`. Entities that weren't found are null within it
+    """
+    data = result.get("data")
+    if data is None:
+        # Unlike missing entities, which come back as null data, this means the whole query failed (for example
+        # because we ran out of rate limit), and none of the repos in it should be reported as unfunded
+        raise ValueError(
+            f"GitHub GraphQL query failed: {result.get('errors') or result.get('message')}"
+        )
+    return data
+
+
+def parse_owner_signals(result: dict) -> dict:
+    """
+    Extracts the signals that only depend on a repo's owner from the result of a signals query
+    :param result: JSON returned by GitHub for a query built by `build_signals_query` with `include_owner`
+    :return: Dict containing the owner's organization sponsor count (`org_sponsors`) and the FUNDING.yml of its
+        `.github` repository (`funding_yml`), which is None if not found
+    """
+    data = get_data(result)
+    return {
+        "org_sponsors": get_sponsor_count(data.get("organization")),
+        "funding_yml": get_first_blob_text(data.get("ownerDefaults"), "funding"),
+    }
+
+
+def parse_signals(
+    result: dict, users: list, owner_signals: Union[dict, None] = None
+) -> dict:
+    """
+    Extracts signals from the result of a signals query. Entities that don't exist (for example, the
+    organization when the owner is a user) are reported by GitHub as errors alongside null data; these are
+    treated as having no sponsors or files. Raises ValueError if the whole query failed
+    :param result: JSON returned by GitHub for the query built by `build_signals_query`
+    :param users: GitHub users the query retrieved sponsor counts for
+    :param owner_signals: The owner's signals (see `parse_owner_signals`), if the query didn't retrieve them
+    :return: Dict of signals, see `fetch_github_signals`
+    """
+    data = get_data(result)
+    repository = data.get("repository")
+    default_branch = (repository or {}).get("defaultBranchRef")
+    if owner_signals is None:
+        owner_signals = parse_owner_signals(result)
+    return {
+        "org_sponsors": owner_signals["org_sponsors"],
+        "user_sponsors": {
+            user: get_sponsor_count(data.get(f"user{i}"))
+            for i, user in enumerate(users)
+        },
+        "default_branch": None if not default_branch else default_branch["name"],
+        "readme": get_first_blob_text(repository, "readme"),
+        "funding_yml": get_first_blob_text(repository, "funding")
+        or owner_signals["funding_yml"],
+    }
+
+
+def remember_owner_signals(
+    context: Union[LookupContext, None], owner: str, result: dict
+) -> dict:
+    """
+    Records the owner's signals from a successful signals query in a lookup context, so that lookups of the
+    owner's other repos in the same run can leave them out
+    :param context: Lookup context, if any
+    :param owner: Owner of the repo
+    :param result: JSON returned by GitHub for a query built by `build_signals_query` with `include_owner`
+    :return: The owner's signals
+    """
+    owner_signals = parse_owner_signals(result)
+    if context is not None:
+        context.set_owner_value(owner, OWNER_SIGNALS_KEY, owner_signals)
+    return owner_signals
+
+
+def get_headers() -> dict:
+    """
+    Returns headers needed to authenticate to GitHub's GraphQL API
+    :return: Dict of headers
+    """
+    assert os.environ.get(API_KEY), "Please `export GITHUB_TOKEN=<your GitHub token>"
+    # adding bearer before the token is a suprising but necessary requirement
+    # see SO: https://stackoverflow.com/questions/70693292/github-graphql-api-this-endpoint-requires-you-to-be-authenticated
+    return {"Authorization": "bearer " + os.environ.get(API_KEY)}
+
+
+def fetch_github_signals(
+    repo: str,
+    users: list = (),
+    session: Union[requests.Session, None] = None,
+    context: Union[LookupContext, None] = None,
+) -> dict:
+    """
+    Retrieves all signals for a repo with one GraphQL request. Raises ValueError if the query failed, rather than
+    reporting the repo as unfunded
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param users: GitHub users whose sponsor counts should be retrieved
+    :param session: Session to make the request with. Defaults to the shared session. Ignored while `batching` is
+        active, since the batcher makes the request
+    :param context: Lookup context. If provided, the owner's signals are only retrieved once per run
+    :return: Dict containing `org_sponsors` (int), `user_sponsors` (dict from user to int), and `default_branch`,
+        `readme`, and `funding_yml`, each of which is None if not found
+    """
+    if _batcher is not None:
+        return _batcher.get_signals(repo, users)
+    owner, name = repo.strip().split("/")[-2:]
+    users = list(users)
+    # Lookups of the owner's other repos running at the same time wait for this one to retrieve its signals
+    owner_signals = (
+        None if context is None else context.claim_owner_value(owner, OWNER_SIGNALS_KEY)
+    )
+    try:
+        response = (session or get_session()).post(
+            GRAPHQL_URL,
+            json=build_signals_query(owner, name, users, owner_signals is None),
+            headers=get_headers(),
+        )
+        result = response.json()
+        if owner_signals is None:
+            owner_signals = remember_owner_signals(context, owner, result)
+    except BaseException:
+        if context is not None and owner_signals is None:
+            context.release_owner_value(owner, OWNER_SIGNALS_KEY)
+        raise
+    return parse_signals(result, users, owner_signals)
+
+
+async def afetch_github_signals(
+    session: aiohttp.ClientSession,
+    repo: str,
+    users: list = (),
+    context: Union[LookupContext, None] = None,
+) -> dict:
+    """
+    Async version of `fetch_github_signals`
+    :param session: aiohttp session used to make the request
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param users: GitHub users whose sponsor counts should be retrieved
+    :param context: Lookup context. If provided, the owner's signals are only retrieved once per run
+    :return: Dict of signals, see `fetch_github_signals`
+    """
+    owner, name = repo.strip().split("/")[-2:]
+    users = list(users)
+    owner_signals = (
+        None
+        if context is None
+        else await context.aclaim_owner_value(owner, OWNER_SIGNALS_KEY)
+    )
+    try:
+        async with session.post(
+            GRAPHQL_URL,
+            json=build_signals_query(owner, name, users, owner_signals is None),
+            headers=get_headers(),
+        ) as response:
+            result = await response.json(content_type=None)
+        if owner_signals is None:
+            owner_signals = remember_owner_signals(context, owner, result)
+    except BaseException:
+        if context is not None and owner_signals is None:
+            context.release_owner_value(owner, OWNER_SIGNALS_KEY)
+        raise
+    return parse_signals(result, users, owner_signals)
+
+
+def get_context_key(repo: str) -> tuple:
+    """
+    Returns the key a repo's signals are memoized under in a lookup context
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :return: Lookup context key
+    """
+    return ("github_signals", repo.strip().lower())
+
+
+def get_top_contributors(
+    repo: str,
+    session: Union[requests.Session, None] = None,
+    num_top_contribs: int = NUM_TOP_CONTRIBUTORS,
+) -> list:
+    """
+    Retrieves the logins of a repo's top contributors. Needs to use GitHub's REST API because the GraphQL API
+    doesn't return contributors (as of Dec. 2022)
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param session: Session to make the request with. Defaults to the shared session
+    :param num_top_contribs: Number of contributors to list
+    :return: List of logins, empty if the contributors couldn't be retrieved
+    """
+    response = (session or get_session()).get(
+        CONTRIBUTORS_URL.format(repo.strip(), num_top_contribs), headers=get_headers()
+    )
+    if not response.ok:
+        return []
+    return [contributor["login"] for contributor in response.json()]
+
+
+async def aget_top_contributors(
+    session: aiohttp.ClientSession,
+    repo: str,
+    num_top_contribs: int = NUM_TOP_CONTRIBUTORS,
+) -> list:
+    """
+    Async version of `get_top_contributors`
+    :param session: aiohttp session used to make the request
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param num_top_contribs: Number of contributors to list
+    :return: List of logins, empty if the contributors couldn't be retrieved
+    """
+    async with session.get(
+        CONTRIBUTORS_URL.format(repo.strip(), num_top_contribs), headers=get_headers()
+    ) as response:
+        if not response.ok:
+            return []
+        contributors = await response.json(content_type=None)
+    return [contributor["login"] for contributor in contributors]
+
+
+def get_repo_signals(
+    repo: str,
+    session: Union[requests.Session, None] = None,
+    context: Union[LookupContext, None] = None,
+) -> dict:
+    """
+    Retrieves the signals of a repo and of its top contributors, with one REST request for the contributors and one
+    GraphQL request for everything else
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param session: Session to make the requests with. Defaults to the shared session
+    :param context: Lookup context. If provided, the signals are only retrieved once per context, whichever finder
+        asks for them first
+    :return: Dict of signals, see `fetch_github_signals`. `user_sponsors` is keyed by the top contributors' logins
+    """
+
+    def compute() -> dict:
+        users = get_top_contributors(repo, session)
+        return fetch_github_signals(repo, users, session, context)
+
+    if context is None:
+        return compute()
+    return context.get(get_context_key(repo), compute)
+
+
+async def aget_repo_signals(
+    session: aiohttp.ClientSession,
+    repo: str,
+    context: Union[LookupContext, None] = None,
+) -> dict:
+    """
+    Async version of `get_repo_signals`
+    :param session: aiohttp session used to make the requests
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param context: Lookup context. If provided, the signals are only retrieved once per context
+    :return: Dict of signals, see `fetch_github_signals`
+    """
+
+    async def compute() -> dict:
+        users = await aget_top_contributors(session, repo)
+        return await afetch_github_signals(session, repo, users, context)
+
+    if context is None:
+        return await compute()
+    return await context.aget(get_context_key(repo), compute)
+
+
+def get_readme(
+    repo: str, session: Union[requests.Session, None] = None
+) -> Union[str, None]:
+    """
+    Retrieves the README GitHub displays for a repo, whatever its name or location, through the REST contents API.
+    Used for the repos whose README wasn't found under any of README_NAMES by the signals query
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param session: Session to make the request with. Defaults to the shared session
+    :return: Text of the README, or None if the repo has none
+    """
+    response = (session or get_session()).get(
+        README_URL.format(repo.strip()),
+        headers={**get_headers(), "Accept": "application/vnd.github.raw"},
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.text
+
+
+async def aget_readme(session: aiohttp.ClientSession, repo: str) -> Union[str, None]:
+    """
+    Async version of `get_readme`
+    :param session: aiohttp session used to make the request
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :return: Text of the README, or None if the repo has none
+    """
+    async with session.get(
+        README_URL.format(repo.strip()),
+        headers={**get_headers(), "Accept": "application/vnd.github.raw"},
+    ) as response:
+        if response.status == 404:
+            return None
+        response.raise_for_status()
+        return await response.text()
+
+
+def search_chunk(tail: str, chunk: str, text: str) -> tuple:
+    """
+    Searches the next chunk of a streamed document for lowercase text, case-insensitively
+    :param tail: End of the previous chunks, as returned by the previous call, so that matches spanning two chunks
+        are found
+    :param chunk: Next chunk of the document
+    :param text: Lowercase text to search for
+    :return: Tuple of whether the text was found, and the tail to pass with the next chunk
+    """
+    window = tail + chunk.lower()
+    return text in window, window[len(window) - len(text) + 1 :]
+
+
+def readme_contains(
+    repo: str,
+    text: str,
+    session: Union[requests.Session, None] = None,
+    max_bytes: int = MAX_README_BYTES,
+) -> bool:
+    """
+    Checks whether the README GitHub displays for a repo mentions some text, like `get_readme`, but stops
+    downloading the README as soon as the text is found
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param text: Lowercase text to search for
+    :param session: Session to make the request with. Defaults to the shared session
+    :param max_bytes: Number of bytes of the README after which to stop searching
+    :return: True if the README contains the text (in any case), False if it doesn't or the repo has no README
+    """
+    with (session or get_session()).get(
+        README_URL.format(repo.strip()),
+        headers={**get_headers(), "Accept": "application/vnd.github.raw"},
+        stream=True,
+    ) as response:
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        tail = ""
+        for chunk in iter_text(response, max_bytes):
+            found, tail = search_chunk(tail, chunk, text)
+            if found:
+                return True
+    return False
+
+
+async def areadme_contains(
+    session: aiohttp.ClientSession,
+    repo: str,
+    text: str,
+    max_bytes: int = MAX_README_BYTES,
+) -> bool:
+    """
+    Async version of `readme_contains`
+    :param session: aiohttp session used to make the request
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param text: Lowercase text to search for
+    :param max_bytes: Number of bytes of the README after which to stop searching
+    :return: True if the README contains the text (in any case), False if it doesn't or the repo has no README
+    """
+    async with session.get(
+        README_URL.format(repo.strip()),
+        headers={**get_headers(), "Accept": "application/vnd.github.raw"},
+    ) as response:
+        if response.status == 404:
+            return False
+        response.raise_for_status()
+        tail = ""
+        async for chunk in aiter_text(response, max_bytes):
+            found, tail = search_chunk(tail, chunk, text)
+            if found:
+                return True
+    return False
+
+
+def build_batch_signals_query(repos: list, owners: list, users: list) -> dict:
+    """
+    Builds a GraphQL query retrieving signals for several repos at once. Repos, owners and users are referenced
+    through numbered aliases, so a query requests each owner's sponsor count and `.github` repository, and each
+    user's sponsor count, only once
+    :param repos: Repos to retrieve the default branch, README and FUNDING.yml of, as (owner, name) tuples
+    :param owners: Owners to retrieve organization sponsor counts and owner-level FUNDING.yml files of
+    :param users: GitHub users whose sponsor counts should be retrieved
+    :return: Dict with the query and its variables, ready to be posted as JSON
+    """
+    params = []
+    fields = []
+    variables = {}
+    for i, (owner, name) in enumerate(repos):
+        params += [f"$repoOwner{i}: String!", f"$repoName{i}: String!"]
+        fields.append(
+            f"repo{i}: repository(owner: $repoOwner{i}, name: $repoName{i}) {{ {get_repo_fields()} }}"
+        )
+        variables.update({f"repoOwner{i}": owner, f"repoName{i}": name})
+    for i, owner in enumerate(owners):
+        params.append(f"$owner{i}: String!")
+        fields.append(
+            f"org{i}: organization(login: $owner{i}) {{ sponsors {{ totalCount }} }}"
+        )
+        fields.append(
+            f'ownerDefaults{i}: repository(owner: $owner{i}, name: ".github") {{ '
+            f'{get_blob_fields("funding", FUNDING_FILE_PATHS)} }}'
+        )
+        variables[f"owner{i}"] = owner
+    for i, user in enumerate(users):
+        params.append(f"$user{i}: String!")
+        fields.append(f"user{i}: user(login: $user{i}) {{ sponsors {{ totalCount }} }}")
+        variables[f"user{i}"] = user
+    query = "query ({}) {{\n{}\n}}".format(", ".join(params), "\n".join(fields))
+    return {"query": query, "variables": variables}
+
+
+def parse_batch_signals(result: dict, repos: list, owners: list, users: list) -> tuple:
+    """
+    Extracts signals from the result of a batched signals query
+    :param result: JSON returned by GitHub for the query built by `build_batch_signals_query`
+    :param repos: Repos the query retrieved signals for, as (owner, name) tuples
+    :param owners: Owners the query retrieved signals for
+    :param users: GitHub users the query retrieved sponsor counts for
+    :return: Tuple of dicts mapping each repo to its `default_branch`, `readme` and `funding_yml`, each owner to its
+        `org_sponsors` and `funding_yml`, and each user to their sponsor count
+    """
+    data = get_data(result)
+    repo_signals = {}
+    for i, repo in enumerate(repos):
+        repository = data.get(f"repo{i}")
+        default_branch = (repository or {}).get("defaultBranchRef")
+        repo_signals[repo] = {
+            "default_branch": None if not default_branch else default_branch["name"],
+            "readme": get_first_blob_text(repository, "readme"),
+            "funding_yml": get_first_blob_text(repository, "funding"),
+        }
+    owner_signals = {
+        owner: {
+            "org_sponsors": get_sponsor_count(data.get(f"org{i}")),
+            "funding_yml": get_first_blob_text(
+                data.get(f"ownerDefaults{i}"), "funding"
+            ),
+        }
+        for i, owner in enumerate(owners)
+    }
+    user_sponsors = {
+        user: get_sponsor_count(data.get(f"user{i}")) for i, user in enumerate(users)
+    }
+    return repo_signals, owner_signals, user_sponsors
+
+
+def get_chunks(items: list, size: int) -> list:
+    """
+    Splits a list into chunks
+    :param items: List to split
+    :param size: Maximum number of items in each chunk
+    :return: List of chunks
+    """
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class SignalsBatcher:
+    """
+    Combines signal lookups made concurrently from many threads (for example, by the finders of every repo in a
+    batch run) into as few GraphQL queries as possible. Lookups are queued until `max_repos` repos are pending or
+    `max_wait` seconds have passed, then sent together. Each owner and user is only ever requested once per
+    batcher, and recently retrieved repos are reused, so finders looking up the same repo share one request
+    """
+
+    def __init__(
+        self,
+        session: Union[requests.Session, None] = None,
+        max_wait: float = BATCH_WAIT,
+        max_repos: int = MAX_REPOS_PER_QUERY,
+        max_users: int = MAX_USERS_PER_QUERY,
+    ):
+        self.session = session or get_session()
+        self.max_wait = max_wait
+        self.max_repos = max_repos
+        self.max_users = max_users
+        self.lock = threading.Lock()
+        self.timer = None
+        # Futures for each repo, owner and user that has been requested, keyed by lowercased identifiers since
+        # GitHub logins and repo names are case-insensitive
+        self.repos = OrderedDict()
+        self.owners = {}
+        self.users = {}
+        # (key, future) tuples not yet sent to GitHub
+        self.pending_repos = []
+        self.pending_owners = []
+        self.pending_users = []
+
+    def request(self, lookups: dict, pending: list, key: Union[str, tuple]) -> Future:
+        """
+        Returns the future for a lookup, queueing the lookup if it hasn't been requested before. Must be called
+        with the lock held
+        :param lookups: Futures of previous lookups of this kind
+        :param pending: Queued lookups of this kind
+        :param key: Identifier of the repo, owner or user to look up
+        :return: Future that will hold the lookup's result
+        """
+        if key not in lookups:
+            lookups[key] = Future()
+            pending.append((key, lookups[key]))
+        return lookups[key]
+
+    def get_signals(self, repo: str, users: list = ()) -> dict:
+        """
+        Retrieves signals for a repo, waiting until the batch it is part of has been retrieved
+        :param repo: GitHub repo identifier in the format `owner/repo_name`
+        :param users: GitHub users whose sponsor counts should be retrieved
+        :return: Dict of signals, see `fetch_github_signals`
+        """
+        owner, name = repo.strip().lower().split("/")[-2:]
+        with self.lock:
+            repo_future = self.request(self.repos, self.pending_repos, (owner, name))
+            owner_future = self.request(self.owners, self.pending_owners, owner)
+            user_futures = {
+                user: self.request(self.users, self.pending_users, user.lower())
+                for user in users
+            }
+            while len(self.repos) > MAX_CACHED_REPOS:
+                self.repos.popitem(last=False)
+            flush_now = len(self.pending_repos) >= self.max_repos
+            if not flush_now and self.timer is None and self.has_pending():
+                self.timer = threading.Timer(self.max_wait, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if flush_now:
+            self.flush()
+        repo_signals = repo_future.result()
+        owner_signals = owner_future.result()
+        return {
+            "org_sponsors": owner_signals["org_sponsors"],
+            "user_sponsors": {user: f.result() for user, f in user_futures.items()},
+            "default_branch": repo_signals["default_branch"],
+            "readme": repo_signals["readme"],
+            "funding_yml": repo_signals["funding_yml"] or owner_signals["funding_yml"],
+        }
+
+    def has_pending(self) -> bool:
+        """
+        Checks whether any lookups are queued
+        :return: True if there are queued lookups
+        """
+        return bool(self.pending_repos or self.pending_owners or self.pending_users)
+
+    def flush(self) -> None:
+        """
+        Sends all queued lookups to GitHub, in as many queries as needed to respect `max_repos` and `max_users`
+        :return: None
+        """
+        with self.lock:
+            repos, owners, users = (
+                self.pending_repos,
+                self.pending_owners,
+                self.pending_users,
+            )
+            self.pending_repos, self.pending_owners, self.pending_users = [], [], []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        for chunk in itertools.zip_longest(
+            get_chunks(repos, self.max_repos),
+            get_chunks(owners, self.max_repos),
+            get_chunks(users, self.max_users),
+            fillvalue=[],
+        ):
+            self.send(*chunk)
+
+    def send(self, repos: list, owners: list, users: list) -> None:
+        """
+        Retrieves one chunk of lookups with a single query and resolves their futures. If the query fails, the
+        lookups' futures are failed and forgotten, so that later lookups of the same repos, owners and users retry
+        :param repos: Queued (key, future) tuples for repos
+        :param owners: Queued (key, future) tuples for owners
+        :param users: Queued (key, future) tuples for users
+        :return: None
+        """
+        repo_keys, owner_keys, user_keys = [
+            [k for k, _ in lookups] for lookups in (repos, owners, users)
+        ]
+        try:
+            response = self.session.post(
+                GRAPHQL_URL,
+                json=build_batch_signals_query(repo_keys, owner_keys, user_keys),
+                headers=get_headers(),
+            )
+            results = parse_batch_signals(
+                response.json(), repo_keys, owner_keys, user_keys
+            )
+        except Exception as e:
+            with self.lock:
+                for lookups, chunk in (
+                    (self.repos, repos),
+                    (self.owners, owners),
+                    (self.users, users),
+                ):
+                    for key, future in chunk:
+                        if lookups.get(key) is future:
+                            del lookups[key]
+            for _, future in repos + owners + users:
+                future.set_exception(e)
+            return
+        for chunk, chunk_results in zip((repos, owners, users), results):
+            for key, future in chunk:
+                future.set_result(chunk_results[key])
+
+
+@contextlib.contextmanager
+def batching(session: Union[requests.Session, None] = None, **kwargs) -> iter:
+    """
+    Routes every `fetch_github_signals` call made in this process while the context is active, from any thread,
+    through one `SignalsBatcher`
+    :param session: Session the batcher should make requests with. Defaults to the shared session
+    :param kwargs: Keyword arguments passed through to `SignalsBatcher`
+    :return: A context manager yielding the batcher
+    """
+    global _batcher
+    previous = _batcher
+    _batcher = SignalsBatcher(session, **kwargs)
+    try:
+        yield _batcher
+    finally:
+        _batcher = previous
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "repo", help="GitHub repo owner and name in the format 'owner/name'"
+    )
+    parser.add_argument(
+        "--users", nargs="*", default=[], help="GitHub users to count sponsors of"
+    )
+    args = parser.parse_args()
+
+    print(fetch_github_signals(args.repo, args.users))
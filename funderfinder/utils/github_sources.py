@@ -1,48 +1,332 @@
 import argparse
+import asyncio
 import logging
+from html.parser import HTMLParser
+from typing import Union
 
+import aiohttp
 import bs4
-import requests
+
+from funderfinder.utils.lookup_context import LookupContext
+from funderfinder.utils.transport import aiter_text, get_session, iter_text
 
 """
 Retrieves funding links listed under "Sponsor this project" on a GitHub repo
 """
 
 
-def clean_link(repo: str, link: bs4.element.Tag) -> str:
+SPONSOR_HEADING = "Sponsor this project"
+# The "Sponsor this project" section is in the sidebar of a repo's page, which is a small part of the HTML
+SIDEBAR_MARKER = 'class="Layout-sidebar'
+MAX_MARKER_LENGTH = max(len(SPONSOR_HEADING), len(SIDEBAR_MARKER))
+# Number of bytes of a repo's page after which to stop reading it. Pages are usually a few hundred KB
+MAX_PAGE_BYTES = 4 * 1024 * 1024
+# Elements that BeautifulSoup's html.parser builder closes as soon as they open
+VOID_ELEMENTS = bs4.builder.HTMLTreeBuilder.empty_element_tags
+
+
+def clean_href(repo: str, href: str) -> str:
     """
-    Extracts href from bs4 element and converts to absolute url
+    Converts a sponsor link's href to an absolute url
     :param repo: GitHub repo identifier in the format `owner/repo_name`
-    :param link: bs4 element corresponding to a tag containing sponsor link
+    :param href: href of a tag containing sponsor link
     :return: Cleaned link string
     """
-    href = link["href"]
     if href == "/sponsors":
         owner = repo.split("/")[0]
         return f"https://github.com/sponsors/{owner}"
     return href
 
 
-def get_funding_sources(repo: str) -> list:
+def clean_link(repo: str, link: bs4.element.Tag) -> str:
     """
-    Retrives links to each of the funding sources listed under "Sponsor this project" on a GitHub repo
+    Extracts href from bs4 element and converts to absolute url
     :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param link: bs4 element corresponding to a tag containing sponsor link
+    :return: Cleaned link string
+    """
+    return clean_href(repo, link["href"])
+
+
+class StopParsing(Exception):
+    pass
+
+
+class SponsorSectionParser(HTMLParser):
+    """
+    Tokenizes a page from the start of its sidebar, keeping track of open elements the way BeautifulSoup's
+    html.parser builder does, and collects the hrefs of the links in the element containing the "Sponsor this
+    project" heading. Raises StopParsing as soon as that element closes, or as soon as the sidebar can't be
+    parsed on its own (an end tag closes an element opened before the sidebar), in which case `hrefs` is None.
+    Also raises StopParsing if the sidebar closes without containing the heading, setting `sidebar_closed`
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Open elements, as (tag name, number of links seen before the element opened)
+        self.open_elements = []
+        self.links = []
+        self.text = []
+        # Index in `open_elements` of the element containing the heading, once it has been found
+        self.section = None
+        self.hrefs = None
+        self.sidebar_closed = False
+
+    def check_string(self, string: str) -> None:
+        if string != SPONSOR_HEADING or self.section is not None:
+            return
+        if len(self.open_elements) < 2:
+            # The heading's section started before the sidebar
+            raise StopParsing()
+        self.section = len(self.open_elements) - 2
+
+    def flush_text(self) -> None:
+        # Like BeautifulSoup, treat text between two tags as a single string
+        if self.text:
+            self.check_string("".join(self.text))
+            self.text = []
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        self.flush_text()
+        attrs = dict(attrs)
+        if tag == "a" and "href" in attrs:
+            self.links.append(attrs["href"] or "")
+        if tag not in VOID_ELEMENTS:
+            self.open_elements.append((tag, len(self.links)))
+
+    def handle_endtag(self, tag: str) -> None:
+        self.flush_text()
+        if tag in VOID_ELEMENTS:
+            return
+        for idx in range(len(self.open_elements) - 1, -1, -1):
+            if self.open_elements[idx][0] == tag:
+                break
+        else:
+            raise StopParsing()
+        if self.section is not None and idx <= self.section:
+            self.hrefs = self.links[self.open_elements[self.section][1] :]
+            raise StopParsing()
+        if idx == 0:
+            self.sidebar_closed = True
+            raise StopParsing()
+        del self.open_elements[idx:]
+
+    def handle_data(self, data: str) -> None:
+        self.text.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self.flush_text()
+        self.check_string(data)
+
+    def handle_decl(self, decl: str) -> None:
+        self.flush_text()
+
+    def handle_pi(self, data: str) -> None:
+        self.flush_text()
+
+    def unknown_decl(self, data: str) -> None:
+        self.flush_text()
+
+
+def parse_sidebar_hrefs(html: str) -> Union[list, None]:
+    """
+    Extracts the hrefs listed under "Sponsor this project" by only parsing the sidebar of a GitHub repo's page, up
+    to the end of the heading's section
+    :param html: HTML of the repo's GitHub page
+    :return: List of hrefs, or None if the sidebar doesn't contain the heading or can't be parsed on its own
+    """
+    sidebar = html.find(SIDEBAR_MARKER)
+    if sidebar == -1 or html.find(SPONSOR_HEADING) < sidebar:
+        return None
+    parser = SponsorSectionParser()
+    try:
+        parser.feed(html[html.rfind("<", 0, sidebar) :])
+        parser.close()
+    except StopParsing:
+        pass
+    return parser.hrefs
+
+
+def parse_page_funding_sources(repo: str, html: str) -> list:
+    """
+    Extracts links to each of the funding sources listed under "Sponsor this project" by parsing the whole of a
+    GitHub repo's page
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param html: HTML of the repo's GitHub page
     :return: List of links to the repo's funding sources
     """
-    page = requests.get(f"https://github.com/{repo}")
-    soup = bs4.BeautifulSoup(page.text, features="html.parser")
-    sponsor_elems = soup(string="Sponsor this project")
+    soup = bs4.BeautifulSoup(html, features="html.parser")
+    sponsor_elems = soup(string=SPONSOR_HEADING)
     if len(sponsor_elems) == 0:
         logging.warning(f"No sponsors found for {repo}")
         return []
     if len(sponsor_elems) > 1:
         logging.warning(
-            f"Multiple elements found for {repo} with text 'Sponsor this project'"
+            f"Multiple elements found for {repo} with text '{SPONSOR_HEADING}'"
         )
     sponsor_links = sponsor_elems[0].parent.parent.find_all("a", href=True)
     return [clean_link(repo, link) for link in sponsor_links]
 
 
+def parse_funding_sources(repo: str, html: str) -> list:
+    """
+    Extracts links to each of the funding sources listed under "Sponsor this project" from a GitHub repo's page.
+    Returns the same links as `parse_page_funding_sources`, but where the heading appears once, and in the sidebar,
+    only the sidebar is parsed. Otherwise, the whole page is. Pages that don't contain the heading aren't parsed at
+    all (this assumes GitHub doesn't write the heading with character references)
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param html: HTML of the repo's GitHub page
+    :return: List of links to the repo's funding sources
+    """
+    count = html.count(SPONSOR_HEADING)
+    if count == 0:
+        logging.warning(f"No sponsors found for {repo}")
+        return []
+    if count == 1:
+        hrefs = parse_sidebar_hrefs(html)
+        if hrefs is not None:
+            return [clean_href(repo, href) for href in hrefs]
+    return parse_page_funding_sources(repo, html)
+
+
+class FundingSourcesScanner:
+    """
+    Scans a repo's page for its funding sources as it is downloaded, so that the download can stop once the
+    "Sponsor this project" section (or the whole sidebar, if it has no such section) has been read. Unlike
+    `parse_funding_sources`, this relies on the section only ever being in the sidebar, and on the first heading
+    being the one to use, so it doesn't warn about pages with several headings
+    """
+
+    def __init__(self, repo: str):
+        """
+        :param repo: GitHub repo identifier in the format `owner/repo_name`
+        """
+        self.repo = repo
+        # Chunks read so far, kept in case the whole page has to be parsed
+        self.chunks = []
+        # End of the text read so far, long enough to find markers split across chunks
+        self.tail = ""
+        self.parser = None
+        # Set once the funding sources can't be found from the sidebar alone, so the whole page has to be read
+        self.needs_page = False
+        # Set once the funding sources have been found
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Scans the next chunk of the page. Only the new chunk (and the end of the previous one) is searched, so
+        scanning a page takes time linear in its size
+        :param chunk: Decoded chunk of the page
+        :return: True once the page's funding sources are known
+        """
+        self.chunks.append(chunk)
+        if self.needs_page:
+            return False
+        try:
+            if self.parser is None:
+                region = self.tail + chunk
+                self.tail = region[-(MAX_MARKER_LENGTH - 1) :]
+                sidebar = region.find(SIDEBAR_MARKER)
+                heading = region.find(SPONSOR_HEADING)
+                if heading != -1 and (sidebar == -1 or heading < sidebar):
+                    self.needs_page = True
+                    return False
+                if sidebar == -1:
+                    return False
+                # The sidebar's opening tag may start in an earlier chunk
+                text = self.text
+                sidebar += len(text) - len(region)
+                self.parser = SponsorSectionParser()
+                self.parser.feed(text[text.rfind("<", 0, sidebar) :])
+            else:
+                self.parser.feed(chunk)
+        except StopParsing:
+            self.done = self.parser.hrefs is not None or self.parser.sidebar_closed
+            self.needs_page = not self.done
+        return self.done
+
+    def get_funding_sources(self) -> list:
+        """
+        Returns the funding sources found so far, parsing whatever has been read of the page if the sidebar wasn't
+        enough to find them
+        :return: List of links to the repo's funding sources
+        """
+        if not self.done:
+            return parse_funding_sources(self.repo, self.text)
+        if self.parser.hrefs is None:
+            logging.warning(f"No sponsors found for {self.repo}")
+            return []
+        return [clean_href(self.repo, href) for href in self.parser.hrefs]
+
+
+def scan_funding_sources(repo: str, chunks: iter) -> list:
+    """
+    Extracts links to each of the funding sources listed under "Sponsor this project" from a GitHub repo's page,
+    reading no more of the page than needed
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param chunks: Iterable of decoded chunks of the repo's page
+    :return: List of links to the repo's funding sources
+    """
+    scanner = FundingSourcesScanner(repo)
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+    return scanner.get_funding_sources()
+
+
+def get_context_key(repo: str) -> tuple:
+    """
+    Returns the key a repo's funding sources are memoized under in a lookup context
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :return: Lookup context key
+    """
+    return ("funding_sources", repo.strip().lower())
+
+
+def get_funding_sources(repo: str, context: Union[LookupContext, None] = None) -> list:
+    """
+    Retrives links to each of the funding sources listed under "Sponsor this project" on a GitHub repo
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param context: If provided, the page is only retrieved and parsed once per context
+    :return: List of links to the repo's funding sources
+    """
+    if context is not None:
+        return context.get(get_context_key(repo), lambda: get_funding_sources(repo))
+    with get_session().get(f"https://github.com/{repo}", stream=True) as page:
+        return scan_funding_sources(repo, iter_text(page, MAX_PAGE_BYTES))
+
+
+async def aget_funding_sources(
+    session: aiohttp.ClientSession,
+    repo: str,
+    context: Union[LookupContext, None] = None,
+) -> list:
+    """
+    Async version of `get_funding_sources`
+    :param session: aiohttp session used to make the request
+    :param repo: GitHub repo identifier in the format `owner/repo_name`
+    :param context: If provided, the page is only retrieved and parsed once per context
+    :return: List of links to the repo's funding sources
+    """
+    if context is not None:
+        return await context.aget(
+            get_context_key(repo), lambda: aget_funding_sources(session, repo)
+        )
+    scanner = FundingSourcesScanner(repo)
+    async with session.get(f"https://github.com/{repo}") as page:
+        async for chunk in aiter_text(page, MAX_PAGE_BYTES):
+            if scanner.feed(chunk):
+                break
+    if scanner.done:
+        return scanner.get_funding_sources()
+    # Parsing a large page is CPU-bound, so keep it from blocking the event loop
+    return await asyncio.to_thread(scanner.get_funding_sources)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -0,0 +1,267 @@
+"""
+On-disk cache of HTTP responses, so that re-running lookups over projects that haven't changed costs little time
+and API quota. Responses are kept in a sqlite database and reused without a request for as long as the TTL of
+their host. After that, responses with an ETag or Last-Modified header are revalidated with a conditional request;
+GitHub doesn't count the 304 responses to these against the REST API rate limit. POST requests are only cached
+for GraphQL endpoints, which use POST for read-only queries, and are keyed by their body. These can't be
+revalidated, so they are fetched again once their TTL has passed. Responses are also keyed by a hash of the
+request's Authorization header, so a response fetched with one token is never served to a request made with another
+(or with none), and API keys are redacted from the URLs stored alongside responses.
+
+The shared session from `transport` uses the cache in $FUNDERFINDER_CACHE_DIR if that is set. It can also be
+enabled with `transport.set_cache`, or the `--cache_dir` argument of get_funders.py. Only the requests-based
+sessions are cached: lookups made with aiohttp (the finders' `arun`) always go to the network.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DAY = 24 * 60 * 60
+# Number of seconds responses from each host are used without revalidation
+TTLS = {
+    "api.github.com": DAY,
+    "github.com": DAY,
+    "raw.githubusercontent.com": 7 * DAY,
+    "api.opencollective.com": DAY,
+}
+DEFAULT_TTL = DAY
+CACHE_FILE = "http.sqlite"
+CACHE_DIR_ENV = "FUNDERFINDER_CACHE_DIR"
+# These describe the response as it was sent; the cached body is already decoded
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+# Hosts that take an API key as the last part of the path, e.g. https://api.opencollective.com/graphql/v2/<key>,
+# mapped to the part of the path that comes before it
+SECRET_PATH_PREFIXES = {"api.opencollective.com": "/graphql/v2/"}
+SECRET_PARAMS = {"access_token", "api_key", "apikey", "client_secret", "key", "token"}
+REDACTED = "REDACTED"
+
+
+def get_cache_key(
+    method: str,
+    url: str,
+    body: Union[bytes, str, None],
+    authorization: Union[str, None] = None,
+) -> str:
+    """
+    Returns the key a request's response is cached under
+    :param method: HTTP method
+    :param url: Full URL of the request, including its query string
+    :param body: Body of the request, if any
+    :param authorization: Authorization header of the request, if any. Only its hash is part of the key
+    :return: Cache key
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(f"{method.upper()} {url}".encode("utf-8"))
+    if authorization:
+        digest.update(
+            b"\0auth:" + hashlib.sha256(authorization.encode("utf-8")).digest()
+        )
+    if body:
+        digest.update(b"\0" + body)
+    return digest.hexdigest()
+
+
+def redact_url(url: str) -> str:
+    """
+    Removes API keys and tokens from a URL, so that it can be stored alongside the response
+    :param url: URL of a request
+    :return: URL with any secret path segment and secret query parameters replaced by "REDACTED"
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    prefix = SECRET_PATH_PREFIXES.get(parts.hostname)
+    if prefix is not None and path.startswith(prefix) and len(path) > len(prefix):
+        path = prefix + REDACTED
+    query = urlencode(
+        [
+            (name, REDACTED if name.lower() in SECRET_PARAMS else value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        ],
+        safe=":/",
+    )
+    return urlunsplit((parts.scheme, parts.netloc, path, query, parts.fragment))
+
+
+def is_cacheable(method: str, url: str) -> bool:
+    """
+    Checks whether responses to a request may be cached
+    :param method: HTTP method
+    :param url: URL of the request
+    :return: True if the response may be cached
+    """
+    method = method.upper()
+    return method == "GET" or (method == "POST" and "/graphql" in urlsplit(url).path)
+
+
+def get_ttl(url: str) -> float:
+    """
+    Returns the number of seconds responses from a URL are used without revalidation
+    :param url: URL of the request
+    :return: TTL in seconds
+    """
+    return TTLS.get(urlsplit(url).hostname, DEFAULT_TTL)
+
+
+class CachedResponse:
+    """
+    A response read from the cache
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: dict,
+        body: bytes,
+        stored_at: float,
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        """
+        Checks whether the response can be used without revalidation
+        :param ttl: Number of seconds responses are fresh for
+        :return: True if the response is fresh
+        """
+        return time.time() - self.stored_at < ttl
+
+    def get_validators(self) -> dict:
+        """
+        Returns the headers that make a request conditional on the response having changed
+        :return: Dict of headers, empty if the response can't be revalidated
+        """
+        headers = {k.lower(): v for k, v in self.headers.items()}
+        validators = {}
+        if "etag" in headers:
+            validators["If-None-Match"] = headers["etag"]
+        if "last-modified" in headers:
+            validators["If-Modified-Since"] = headers["last-modified"]
+        return validators
+
+
+class HTTPCache:
+    """
+    sqlite-backed store of HTTP responses. Safe to share between threads, and between processes writing to the
+    same file
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, status INTEGER, "
+                "headers TEXT, body BLOB, stored_at REAL)"
+            )
+
+    def get(self, key: str) -> Union[CachedResponse, None]:
+        """
+        Reads a response from the cache
+        :param key: Cache key, see `get_cache_key`
+        :return: The cached response, or None if there isn't one
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, stored_at = row
+        return CachedResponse(
+            status, json.loads(headers), zlib.decompress(body), stored_at
+        )
+
+    def set(self, key: str, url: str, status: int, headers: dict, body: bytes) -> None:
+        """
+        Writes a response to the cache
+        :param key: Cache key, see `get_cache_key`
+        :param url: URL of the request. It is stored with any API keys redacted, see `redact_url`
+        :param status: HTTP status of the response
+        :param headers: Headers of the response
+        :param body: Decoded body of the response
+        :return: None
+        """
+        headers = {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS}
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    redact_url(url),
+                    status,
+                    json.dumps(headers),
+                    zlib.compress(body),
+                    time.time(),
+                ),
+            )
+
+    def touch(self, key: str) -> None:
+        """
+        Marks a cached response as fresh again, after the server confirmed it hasn't changed
+        :param key: Cache key, see `get_cache_key`
+        :return: None
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def clear(self) -> None:
+        """
+        Removes every response from the cache
+        :return: None
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """
+        Closes the database connection
+        :return: None
+        """
+        with self.lock:
+            self.connection.close()
+
+
+def should_store(method: str, status: int, headers: dict, body: bytes) -> bool:
+    """
+    Checks whether a response should be written to the cache
+    :param method: HTTP method of the request
+    :param status: HTTP status of the response
+    :param headers: Headers of the response
+    :param body: Decoded body of the response
+    :return: True if the response should be cached
+    """
+    if status != 200 or "no-store" in headers.get("Cache-Control", ""):
+        return False
+    if method.upper() == "POST":
+        # GraphQL APIs report failed queries (e.g. when rate limited) with a 200 and no data
+        try:
+            result = json.loads(body)
+        except ValueError:
+            return False
+        return isinstance(result, dict) and result.get("data") is not None
+    return True
+
+
+def open_cache(cache_dir: str) -> HTTPCache:
+    """
+    Opens the cache kept in a directory, creating it if needed
+    :param cache_dir: Path to the directory
+    :return: Cache
+    """
+    return HTTPCache(os.path.join(cache_dir, CACHE_FILE))
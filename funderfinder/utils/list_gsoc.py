@@ -10,24 +10,40 @@ For each project, we will affiliate the project with specific repos or entire or
 
   * The project page
   * The student project pages
+
+Pages are fetched through a shared `Crawler`, so that the two archives (which are on different hosts) are crawled
+in parallel, as are the organizations of each year, while each host only gets a few requests at a time.
+
+Archived years never change, so with `--incremental`, years that the existing dataset already has archived data for
+are kept as they are, and only the current year and missing years are crawled. Each year is recorded in a
+checkpoint file as soon as it has been crawled, so that an interrupted run resumes from the years it hadn't
+finished. The checkpoint is removed once the dataset has been written; delete it to start over.
+
+With `--archive_file`, every fetched page is also stored in a `PageArchive`, and `--reextract` rebuilds the
+dataset from the archived pages without any network access.
 """
 
 import argparse
 import json
 import logging
 import os
-import re
-import time
+import threading
 from datetime import datetime
-from itertools import chain
+from typing import Union
 
 import bs4
-import requests
 
-from .utils import GITHUB_ORG_PATTERN, GITHUB_REPO_PATTERN, SCRAPE_DELAY
+from .crawler import Crawler, create_crawler, get_crawler
+from .datasets import atomic_write, write_dataset
+from .utils import extract_github_links
 
-logging.basicConfig(level=logging.INFO)
 LOGGER = logging.getLogger("list_numfocus")
+EARLY_ARCHIVE_URL = "https://www.google-melange.com/archive/gsoc"
+FIRST_YEAR = 2009
+# First year in GSOC's current archive. Earlier years are in the older archive at EARLY_ARCHIVE_URL
+MODERN_ARCHIVE_YEAR = 2016
+# Projects of years that haven't been archived yet are retrieved from this API, and are crawled again in later runs
+CURRENT_YEAR_API = "https://summerofcode.withgoogle.com/api/organization/"
 
 
 def extract_listing_link(link_container: bs4.BeautifulSoup) -> str:
@@ -59,24 +75,19 @@ def get_link_matches(text: str) -> list:
     :param text: Text that may contain github links
     :return: List of orgs and/or repos
     """
-    repo_matches = re.findall(GITHUB_REPO_PATTERN, text)
-    if repo_matches:
-        return list(set([repo_match[1] for repo_match in repo_matches]))
-    # At the moment, we only look for org matches if we didn't find a specific repo in the text
-    org_matches = re.findall(GITHUB_ORG_PATTERN, text)
-    if org_matches:
-        return list(set([org_match[1] for org_match in org_matches]))
-    return []
+    repos, orgs = extract_github_links(text)
+    # At the moment, we only use org matches if we didn't find a specific repo in the text
+    return repos or orgs
 
 
-def get_early_archive_repos(link: str) -> list:
+def parse_early_archive_org_page(text: str) -> tuple:
     """
-    Extracts repos/orgs for a pre-2016 project.
-    :param link: Link to GSOC's detail page
-    :return: List of github repos associated with the project
+    Extracts repos/orgs and student project links from a pre-2016 project's detail page. Runs in the crawler's
+    parse processes
+    :param text: Text of GSOC's detail page
+    :return: Tuple of the list of github repos/orgs found on the page and the list of links to its student projects
     """
-    project_page = requests.get(link)
-    soup = bs4.BeautifulSoup(project_page.text, features="html.parser")
+    soup = bs4.BeautifulSoup(text, features="html.parser")
     links = [
         extract_listing_link(link_elt) for link_elt in soup.find_all("a", href=True)
     ]
@@ -86,86 +97,134 @@ def get_early_archive_repos(link: str) -> list:
             continue
         gh_links = get_link_matches(link)
         repos.extend(gh_links)
-    page_link = get_link_matches(project_page.text)
+    page_link = get_link_matches(text)
     repos.extend(page_link)
     student_projects = get_early_archive_listing_links(soup)
     student_project_links = [
         extract_listing_link(link_container) for link_container in student_projects
     ]
-    for student_project_link in student_project_links:
-        if not student_project_link:
-            continue
-        student_project_page = requests.get(student_project_link)
-        student_page_links = get_link_matches(student_project_page.text)
-        if student_page_links:
-            repos.extend(student_page_links)
-        time.sleep(SCRAPE_DELAY)
+    return repos, [link for link in student_project_links if link]
+
+
+def get_early_archive_repos(link: str, crawler: Union[Crawler, None] = None) -> list:
+    """
+    Extracts repos/orgs for a pre-2016 project.
+    :param link: Link to GSOC's detail page
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: List of github repos associated with the project
+    """
+    crawler = crawler or get_crawler()
+    project_page = crawler.fetch(link)
+    repos, student_project_links = crawler.parse(
+        parse_early_archive_org_page, project_page.text
+    )
+    student_project_pages = [
+        crawler.submit(student_project_link)
+        for student_project_link in student_project_links
+    ]
+    # Parse each student project page as soon as it has been fetched, while the others are still being fetched
+    student_page_matches = [
+        crawler.submit_parse(get_link_matches, student_project_page.result().text)
+        for student_project_page in student_project_pages
+    ]
+    for student_page_links in student_page_matches:
+        repos.extend(student_page_links.result())
     return list(set(repos))
 
 
-def get_early_archive_project(container: bs4.BeautifulSoup, year: int) -> dict:
+def get_early_archive_project(
+    container: bs4.BeautifulSoup, year: int, crawler: Union[Crawler, None] = None
+) -> dict:
     """
     Get a pre-2016 project's metadata
     :param container: BeautifulSoup container containing the project's name and link to GSOC's detail page
     :param year: Year of GSOC the project was retrieved from. A project may appear in more than one year.
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: Dict containing project's name, link to detail page, and any repos/orgs we found for the project
     """
     name = container.find("a").text.strip()
     link = extract_listing_link(container)
-    repos = get_early_archive_repos(link)
+    repos = get_early_archive_repos(link, crawler)
     return {"name": name, "link": link, "repos": repos, "year": year}
 
 
-def get_early_archive_year_projects(link: str) -> iter:
+def get_early_archive_year(link: str) -> int:
+    """
+    Extracts the year from a pre-2016 GSOC yearly project listing link
+    :param link: Link to the year's listing page (e.g. https://www.google-melange.com/archive/gsoc/2015)
+    :return: Year of the listing (e.g. 2015)
+    """
+    return int(link.strip().strip("/").split("/")[-1])
+
+
+def get_early_archive_year_projects(
+    link: str, crawler: Union[Crawler, None] = None
+) -> iter:
     """
     Retrieves all project metadata for a pre-2016 GSOC yearly project listing link
     :param link: Link to the year's listing page (e.g. https://www.google-melange.com/archive/gsoc/2015)
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: A generator of dicts containing project metadata
     """
-    listing_page = requests.get(link)
+    crawler = crawler or get_crawler()
+    listing_page = crawler.fetch(link)
     soup = bs4.BeautifulSoup(listing_page.text, features="html.parser")
     project_containers = get_early_archive_listing_links(soup)
-    year = int(link.strip().strip("/").split("/")[-1])
-    for container in project_containers:
-        meta = get_early_archive_project(container, year)
-        yield meta
-        time.sleep(SCRAPE_DELAY)
+    year = get_early_archive_year(link)
+    yield from crawler.map(
+        lambda container: get_early_archive_project(container, year, crawler),
+        project_containers,
+    )
 
 
-def get_projects_before_2016() -> iter:
+def get_early_archive_year_links(crawler: Union[Crawler, None] = None) -> dict:
     """
-    Retrieves project metadata from before 2016. GSOC uses an older website format for these
-    :return: A generator of dicts containing project metadata
+    Retrieves the links to the yearly project listings of the pre-2016 archive
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: Dict mapping years to their listing links, in the order of the archive's listing
     """
-    listing_page = requests.get("https://www.google-melange.com/archive/gsoc")
+    listing_page = (crawler or get_crawler()).fetch(EARLY_ARCHIVE_URL)
     soup = bs4.BeautifulSoup(listing_page.text, features="html.parser")
-    year_link_containers = get_early_archive_listing_links(soup)
-    for container in year_link_containers:
+    year_links = {}
+    for container in get_early_archive_listing_links(soup):
         year_link = extract_listing_link(container)
-        if not year_link:
-            continue
+        if year_link:
+            year_links[get_early_archive_year(year_link)] = year_link
+    return year_links
+
+
+def get_projects_before_2016(crawler: Union[Crawler, None] = None) -> iter:
+    """
+    Retrieves project metadata from before 2016. GSOC uses an older website format for these
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: A generator of dicts containing project metadata
+    """
+    crawler = crawler or get_crawler()
+    for year_link in get_early_archive_year_links(crawler).values():
         LOGGER.info(f"Getting projects for {year_link}")
-        year_projects = get_early_archive_year_projects(year_link)
+        year_projects = get_early_archive_year_projects(year_link, crawler)
         for project in year_projects:
             yield project
 
 
-def get_modern_archive_project(year: int, slug: str) -> dict:
+def get_modern_archive_project(
+    year: int, slug: str, crawler: Union[Crawler, None] = None
+) -> dict:
     """
     Retrieves project metadata for a project and year after 2016.
     :param year: Year we want to retrieve project metadata from
     :param slug: The GSOC project slug, retrieved from their API
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: Dict of project metadata
     """
     project_url = f"https://summerofcode.withgoogle.com/api/archive/programs/{year}/organizations/{slug}/"
-    meta = requests.get(project_url).json()
+    meta = (crawler or get_crawler()).fetch(project_url).json()
     repos = []
     repos.extend(get_link_matches(meta["description_html"]))
     repos.extend(get_link_matches(meta["ideas_list_url"]))
     for student_project in meta["projects"]:
         repos.extend(get_link_matches(student_project["abstract_html"]))
         repos.extend(get_link_matches(student_project["project_code_url"]))
-    time.sleep(SCRAPE_DELAY)
     return {
         "name": meta["name"],
         "link": project_url,
@@ -174,35 +233,43 @@ def get_modern_archive_project(year: int, slug: str) -> dict:
     }
 
 
-def get_modern_archive_projects(year: int) -> iter:
+def get_modern_archive_projects(
+    year: int, crawler: Union[Crawler, None] = None
+) -> iter:
     """
     Retrieves project metadata for a year after 2016, if available
     :param year: Year to retrieve project metadata from
-    :return: An iterable of project metadata, empty if no data was found
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: An iterable of project metadata, in the order of the archive's listing, yielding each project as soon
+        as it has been retrieved. Empty if no data was found
     """
+    crawler = crawler or get_crawler()
     org_url = f"https://summerofcode.withgoogle.com/api/archive/programs/{year}/organizations/"
-    orgs = requests.get(org_url).json()
+    orgs = crawler.fetch(org_url).json()
     if (type(orgs) != list) or not orgs:
-        return []
-    meta = [get_modern_archive_project(year, org["slug"]) for org in orgs]
-    return meta
+        return ()
+    return crawler.map(
+        lambda org: get_modern_archive_project(year, org["slug"], crawler), orgs
+    )
 
 
-def get_curr_year_project(year: int, slug: str) -> dict:
+def get_curr_year_project(
+    year: int, slug: str, crawler: Union[Crawler, None] = None
+) -> dict:
     """
     Get project metadata for a project in the current year
     :param year: The current year
     :param slug: GSOC project slug
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: Dict of project metadata
     """
-    project_url = f"https://summerofcode.withgoogle.com/api/organization/{slug}/"
-    meta = requests.get(project_url).json()
+    project_url = f"{CURRENT_YEAR_API}{slug}/"
+    meta = (crawler or get_crawler()).fetch(project_url).json()
     repos = []
     repos.extend(get_link_matches(meta["description"]))
     repos.extend(get_link_matches(meta["ideas_link"]))
     repos.extend(get_link_matches(meta["source_code"]))
     repos.extend(get_link_matches(meta["website_url"]))
-    time.sleep(SCRAPE_DELAY)
     return {
         "name": meta["name"],
         "link": project_url,
@@ -211,57 +278,270 @@ def get_curr_year_project(year: int, slug: str) -> dict:
     }
 
 
-def get_curr_year_projects(year: int) -> iter:
+def get_curr_year_projects(year: int, crawler: Union[Crawler, None] = None) -> iter:
     """
     Get projects for the current year, if available
     :param year: The current year
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: An generator (possibly empty) of project metadata
     """
+    crawler = crawler or get_crawler()
     org_url = f"https://summerofcode.withgoogle.com/api/program/{year}/organizations/"
-    orgs = requests.get(org_url).json()
+    orgs = crawler.fetch(org_url).json()
     # If no data is available, the API returns a dict with a "type" key mapped to "object_not_found"
     if type(orgs) == list:
-        return (get_curr_year_project(year, org["slug"]) for org in orgs)
+        return crawler.map(
+            lambda org: get_curr_year_project(year, org["slug"], crawler), orgs
+        )
     return ()
 
 
-def get_projects_2016_onward() -> iter:
+def get_modern_year_projects(year: int, crawler: Union[Crawler, None] = None) -> iter:
+    """
+    Retrieves the projects of a year from 2016 onward, from the archive if the year has been archived and otherwise
+    from the current year's page
+    :param year: Year to retrieve projects from
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: A generator (possibly empty) of project metadata
+    """
+    archived = False
+    for project in get_modern_archive_projects(year, crawler):
+        archived = True
+        yield project
+    if not archived:
+        # If there isn't an archive page for the current year, we may still have active projects with some
+        # metadata we can scrape from the current year's page
+        yield from get_curr_year_projects(year, crawler)
+
+
+def get_projects_2016_onward(crawler: Union[Crawler, None] = None) -> iter:
     """
     Retrieves projects from 2016 onward (GSOC displays these with different website structure from earlier years)
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: A generator of dicts containing project metadata
     """
+    crawler = crawler or get_crawler()
     curr_year = datetime.now().year
-    for year in range(2016, curr_year + 1):
+    for year in range(MODERN_ARCHIVE_YEAR, curr_year + 1):
         LOGGER.info(f"Getting projects for {year}")
-        projects = get_modern_archive_projects(year)
-        if projects:
-            for project in projects:
-                yield project
-        # If there isn't an archive page for the current year, we may still have active projects with some
-        # metadata we can scrape from the current year's page
-        else:
-            projects = get_curr_year_projects(year)
-            for project in projects:
-                yield project
+        for project in get_modern_year_projects(year, crawler):
+            yield project
+
+
+def is_archived(project: dict) -> bool:
+    """
+    Checks whether a project's metadata was retrieved from one of GSOC's archives, which don't change
+    :param project: Project metadata
+    :return: True if the project's year had been archived when it was retrieved
+    """
+    return not project["link"].startswith(CURRENT_YEAR_API)
 
 
-def get_projects(output_file: str) -> None:
+def read_projects(input_file: str) -> list:
+    """
+    Reads a GSOC dataset
+    :param input_file: JSONL file of project metadata, as written by `get_projects`
+    :return: List of project metadata, empty if the file doesn't exist
+    """
+    if not os.path.exists(input_file):
+        return []
+    with open(input_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def get_complete_years(projects: list) -> set:
+    """
+    Finds the years a dataset has archived data for. These won't change, so don't need to be crawled again
+    :param projects: List of project metadata
+    :return: Set of years
+    """
+    return {project["year"] for project in projects if is_archived(project)}
+
+
+def get_year_order(year: int) -> tuple:
+    """
+    Sort key putting years in the order `get_projects` writes them: the pre-2016 archive's years, most recent
+    first, as in its listing, then the years from 2016 onward, oldest first
+    :param year: Year
+    :return: Sort key
+    """
+    return (year >= MODERN_ARCHIVE_YEAR, year if year >= MODERN_ARCHIVE_YEAR else -year)
+
+
+class Checkpoint:
+    """
+    Record of the years crawled so far by a run, so that an interrupted run can resume. Each year's projects are
+    written to a file of their own as they are crawled, which is only put in place once the year is complete, and
+    the checkpoint file lists the complete years, one line per year. Safe to share between threads
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the checkpoint file. Years recorded in an existing file are loaded
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.years = {line["year"] for line in read_projects(path)}
+
+    def get_year_file(self, year: int) -> str:
+        """
+        Returns the path to the file a year's projects are recorded in
+        :param year: Year
+        :return: Path to the file
+        """
+        return f"{self.path}.{year}"
+
+    def add(self, year: int, projects: iter) -> int:
+        """
+        Records the projects of a year as they are crawled, then the year itself once all of them have been. If
+        crawling the year fails, nothing is recorded for it
+        :param year: Year
+        :param projects: Iterable of the year's project metadata
+        :return: Number of projects
+        """
+        num_projects = 0
+        with atomic_write(self.get_year_file(year)) as f:
+            for project in projects:
+                f.write((json.dumps(project) + "\n").encode("utf-8"))
+                num_projects += 1
+        with self.lock:
+            with open(self.path, mode="a") as f:
+                f.write(json.dumps({"year": year, "num_projects": num_projects}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.years.add(year)
+        return num_projects
+
+    def read(self, year: int) -> iter:
+        """
+        Reads the projects recorded for a year
+        :param year: A year that has been recorded
+        :return: A generator of the year's project metadata
+        """
+        with open(self.get_year_file(year)) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def remove(self) -> None:
+        """
+        Removes the checkpoint file and the files of the years it lists, once the run it belongs to has finished
+        :return: None
+        """
+        with self.lock:
+            for path in [self.get_year_file(year) for year in self.years] + [self.path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def get_projects(
+    output_file: str,
+    crawler: Union[Crawler, None] = None,
+    incremental: bool = False,
+    checkpoint_file: Union[str, None] = None,
+) -> None:
     """
     Retrieves all GSOC projects
     :param output_file: File to write project metadata to
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :param incremental: If True, keep the years `output_file` already has archived data for instead of crawling
+        them again
+    :param checkpoint_file: File recording the years crawled so far. Defaults to `output_file` with a .checkpoint
+        suffix
     :return: None
     """
-    projects = chain(get_projects_before_2016(), get_projects_2016_onward())
-    with open(output_file, mode="w") as out:
-        for project in projects:
-            out.write(json.dumps(project) + "\n")
+    crawler = crawler or get_crawler()
+    existing = read_projects(output_file) if incremental else []
+    complete_years = get_complete_years(existing)
+    checkpoint = Checkpoint(checkpoint_file or f"{output_file}.checkpoint")
+    resumed_years = set(checkpoint.years)
+    if resumed_years:
+        LOGGER.info(f"Resuming after years {sorted(resumed_years)}")
+    all_years = sorted(
+        set(range(FIRST_YEAR, datetime.now().year + 1))
+        | complete_years
+        | resumed_years,
+        key=get_year_order,
+    )
+    years = [
+        year
+        for year in all_years
+        if year not in complete_years and year not in resumed_years
+    ]
+    LOGGER.info(f"Getting projects for {years}")
+    early_years = [year for year in years if year < MODERN_ARCHIVE_YEAR]
+    early_year_links = get_early_archive_year_links(crawler) if early_years else {}
+
+    def crawl_year(year: int) -> int:
+        if year < MODERN_ARCHIVE_YEAR:
+            projects = []
+            if year in early_year_links:
+                projects = get_early_archive_year_projects(
+                    early_year_links[year], crawler
+                )
+        else:
+            projects = get_modern_year_projects(year, crawler)
+        # Projects are streamed to the checkpoint as they are crawled rather than kept in memory
+        num_projects = checkpoint.add(year, projects)
+        LOGGER.info(f"Got {num_projects} projects for {year}")
+        return num_projects
+
+    # Years are independent, and the two archives are on different hosts, so crawl every year at once. Each year
+    # is written out from the checkpoint as soon as it and the years before it are done
+    crawled_years = crawler.map(crawl_year, years)
+    existing_years = {}
+    for project in existing:
+        if project["year"] in complete_years:
+            existing_years.setdefault(project["year"], []).append(project)
+
+    def get_year_projects() -> iter:
+        for year in all_years:
+            if year in existing_years:
+                yield from existing_years[year]
+            elif year in resumed_years:
+                yield from checkpoint.read(year)
+            else:
+                next(crawled_years)
+                yield from checkpoint.read(year)
+
+    # The existing dataset is only replaced once the new one is complete, so an interrupted run doesn't lose the
+    # years kept from it
+    write_dataset(output_file, get_year_projects())
+    checkpoint.remove()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--output_file", default=os.path.join("..", "data", "gsoc.jsonl")
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only crawl the current year and years missing from the existing output file",
+    )
+    parser.add_argument(
+        "--checkpoint_file",
+        help="File recording the years crawled so far. Defaults to the output file with a .checkpoint suffix",
+    )
+    parser.add_argument(
+        "--archive_file",
+        help="Archive to store fetched pages in, so that the dataset can be re-extracted from them later",
+    )
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Rebuild the dataset from the pages in --archive_file, without any network access",
+    )
     args = parser.parse_args()
-
-    get_projects(args.output_file)
+    if args.reextract and not args.archive_file:
+        parser.error("--reextract requires --archive_file")
+
+    with create_crawler(args.archive_file, args.reextract) as crawler:
+        get_projects(
+            args.output_file,
+            crawler,
+            incremental=args.incremental,
+            checkpoint_file=args.checkpoint_file,
+        )
@@ -1,14 +1,14 @@
 import argparse
-import json
 import logging
 import os
-import re
-import time
+from typing import Union
 
 import bs4
 import requests
 
-from .utils import GITHUB_REPO_PATTERN, SCRAPE_DELAY
+from .crawler import Crawler, create_crawler, get_crawler
+from .datasets import get_dataset_index, write_dataset
+from .utils import find_github_repo
 
 """
 We will scrape NumFOCUS's:
@@ -27,6 +27,11 @@ For now, for each project we are recording three pieces of information:
     (e.g. "nibabel" for "https://numfocus.org/project/nibabel")
   * github_name - this is the owner/repo string of any GitHub repo we were able to associate with the project
   * relationship - this is "sponsored" for sponsored projects, and "affiliated" for affiliated projects
+
+Project pages (and the project homepages they link to) are fetched through a shared `Crawler`, so that pages on
+different hosts are fetched in parallel while numfocus.org only gets a few requests at a time. With
+`--archive_file`, every fetched page is also stored in a `PageArchive`, and `--reextract` rebuilds the dataset
+from the archived pages without any network access.
 """
 
 HEADERS = {
@@ -34,17 +39,25 @@ HEADERS = {
     "From": "jm3312@georgetown.edu",
 }
 REQUESTS_TIMEOUT = 5
-logging.basicConfig(level=logging.INFO)
 LOGGER = logging.getLogger("list_numfocus")
-with open(
-    os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "..",
-        "data",
-        "manual_repo_mapping.json",
-    )
-) as f:
-    GITHUB_OVERRIDES = json.loads(f.read())
+GITHUB_OVERRIDES_FILE = "manual_repo_mapping.json"
+
+
+def build_overrides_index(overrides: dict) -> dict:
+    """
+    Indexes our manual mapping between project names and github repos
+    :param overrides: Dict mapping project names to github repos
+    :return: Dict mapping "overrides" to the manual mapping
+    """
+    return {"overrides": overrides}
+
+
+def get_github_overrides() -> dict:
+    """
+    Returns our manual mapping between project names and github repos, loading it on first use
+    :return: Dict mapping project names to github repos
+    """
+    return get_dataset_index(GITHUB_OVERRIDES_FILE, build_overrides_index)["overrides"]
 
 
 def get_github_link(project_name: str, text: str) -> str:
@@ -55,10 +68,10 @@ def get_github_link(project_name: str, text: str) -> str:
     :param text: Text that may contain a github repo reference
     :return: The first reference found to a github repo, or None
     """
-    if project_name in GITHUB_OVERRIDES:
-        return GITHUB_OVERRIDES[project_name]
-    match = re.search(GITHUB_REPO_PATTERN, text)
-    return None if not match else match.group(2)
+    github_overrides = get_github_overrides()
+    if project_name in github_overrides:
+        return github_overrides[project_name]
+    return find_github_repo(text)
 
 
 def get_numfocus_slug(url: str) -> str:
@@ -70,125 +83,190 @@ def get_numfocus_slug(url: str) -> str:
     return url.strip().strip("/").split("/")[-1]
 
 
-def get_sponsored_projects() -> list:
+def get_project_homepage(text: str) -> Union[str, None]:
+    """
+    Finds the link to a project's homepage on its numfocus page
+    :param text: Text of the project's numfocus page
+    :return: Link to the project's homepage, or None
+    """
+    project_page_soup = bs4.BeautifulSoup(text, features="html.parser")
+    project_homepage_candidates = project_page_soup.find_all(string="Website")
+    if not project_homepage_candidates:
+        return None
+    return project_homepage_candidates[0].parent["href"]
+
+
+def parse_sponsored_project_page(project_name: str, text: str) -> tuple:
+    """
+    Extracts a numfocus sponsored project's github repo from its numfocus page, or failing that, the link to its
+    homepage. Runs in the crawler's parse processes
+    :param project_name: Name of the project
+    :param text: Text of the project's numfocus page
+    :return: Tuple of the github repo (or None) and, if no repo was found, the link to the project's homepage (or
+        None)
+    """
+    github_ref = get_github_link(project_name, text)
+    if github_ref:
+        return github_ref, None
+    return None, get_project_homepage(text)
+
+
+def get_sponsored_project(
+    project_box: bs4.BeautifulSoup, crawler: Union[Crawler, None] = None
+) -> dict:
+    """
+    Retrieve a numfocus sponsored project's metadata
+    :param project_box: BeautifulSoup element containing the project's name and link to its numfocus page
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: Project metadata as specified in module-level documentation
+    """
+    crawler = crawler or get_crawler()
+    link_parent = project_box.find("a", href=True)
+    link = link_parent["href"]
+    name = link_parent.parent.parent.text.strip()
+    project_page = crawler.fetch(link, headers=HEADERS, timeout=REQUESTS_TIMEOUT).text
+    github_ref = None
+    try:
+        github_ref, project_homepage = crawler.parse(
+            parse_sponsored_project_page, name, project_page
+        )
+        if project_homepage:
+            project_homepage_response = crawler.fetch(
+                project_homepage, headers=HEADERS, timeout=REQUESTS_TIMEOUT
+            )
+            github_ref = crawler.parse(
+                get_github_link, name, project_homepage_response.text
+            )
+    except Exception as e:
+        LOGGER.warning(f"Exception when retrieving {link} for {name}: {e}")
+    return {
+        "name": name,
+        "slug": get_numfocus_slug(link),
+        "github_name": github_ref,
+        "relationship": "sponsored",
+    }
+
+
+def get_sponsored_projects(crawler: Union[Crawler, None] = None) -> list:
     """
     Retrieve all numfocus sponsored projects
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: List of project metadata as specified in module-level documentation
     """
     LOGGER.info("Retrieving sponsored projects")
-    projects = []
-    page = requests.get(
+    crawler = crawler or get_crawler()
+    page = crawler.fetch(
         "https://numfocus.org/sponsored-projects",
         headers=HEADERS,
         timeout=REQUESTS_TIMEOUT,
     )
     soup = bs4.BeautifulSoup(page.text, features="html.parser")
-    for project_box in soup.find_all("div", class_="search-result-item-inner"):
-        link_parent = project_box.find("a", href=True)
-        link = link_parent["href"]
-        name = link_parent.parent.parent.text.strip()
-        project_page = requests.get(
-            link, headers=HEADERS, timeout=REQUESTS_TIMEOUT
-        ).text
-        github_ref = get_github_link(name, project_page)
-        if not github_ref:
-            try:
-                project_page_soup = bs4.BeautifulSoup(
-                    project_page, features="html.parser"
-                )
-                project_homepage_candidates = project_page_soup.find_all(
-                    string="Website"
-                )
-                project_homepage_elt = (
-                    None
-                    if not project_homepage_candidates
-                    else project_homepage_candidates[0]
-                )
-                if project_homepage_elt:
-                    project_homepage = project_homepage_elt.parent["href"]
-                    project_homepage_response = requests.get(
-                        project_homepage, headers=HEADERS, timeout=REQUESTS_TIMEOUT
-                    )
-                    github_ref = get_github_link(name, project_homepage_response.text)
-            except Exception as e:
-                LOGGER.warning(f"Exception when retrieving {link} for {name}: {e}")
-        projects.append(
-            {
-                "name": name,
-                "slug": get_numfocus_slug(link),
-                "github_name": github_ref,
-                "relationship": "sponsored",
-            }
+    return list(
+        crawler.map(
+            lambda project_box: get_sponsored_project(project_box, crawler),
+            soup.find_all("div", class_="search-result-item-inner"),
         )
-        time.sleep(SCRAPE_DELAY)
-    return projects
+    )
+
+
+def get_affiliated_project(
+    project_box: bs4.BeautifulSoup, crawler: Union[Crawler, None] = None
+) -> dict:
+    """
+    Retrieve a numfocus affiliated project's metadata
+    :param project_box: BeautifulSoup element containing the project's name and link to its homepage
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
+    :return: Project metadata as specified in module-level documentation
+    """
+    link_parent = project_box.find("a", href=True)
+    link = link_parent["href"]
+    name = (
+        project_box.find("div", class_="et_pb_blurb_container").find("a").text.strip()
+    )
+    github_ref = get_github_link(name, link)
+    if not github_ref:
+        try:
+            crawler = crawler or get_crawler()
+            project_page = crawler.fetch(
+                link, headers=HEADERS, timeout=REQUESTS_TIMEOUT
+            )
+            github_ref = crawler.parse(get_github_link, name, project_page.text)
+        except requests.exceptions.RequestException as e:
+            LOGGER.warning(f"Exception when retrieving {link} for {name}: {e}")
+    return {
+        "name": name,
+        "slug": None,
+        "github_name": github_ref,
+        "relationship": "affiliated",
+    }
 
 
-def get_affiliated_projects() -> list:
+def get_affiliated_projects(crawler: Union[Crawler, None] = None) -> list:
     """
     Retrieve all numfocus affiliated projects
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: List of project metadata as specified in module-level documentation
     """
     LOGGER.info("Retrieving affiliated projects")
-    projects = []
-    page = requests.get(
+    crawler = crawler or get_crawler()
+    page = crawler.fetch(
         "https://numfocus.org/sponsored-projects/affiliated-projects",
         headers=HEADERS,
         timeout=REQUESTS_TIMEOUT,
     )
     soup = bs4.BeautifulSoup(page.text, features="html.parser")
-    for project_box in soup.find_all("div", class_="et_pb_blurb_content"):
-        link_parent = project_box.find("a", href=True)
-        link = link_parent["href"]
-        name = (
-            project_box.find("div", class_="et_pb_blurb_container")
-            .find("a")
-            .text.strip()
+    return list(
+        crawler.map(
+            lambda project_box: get_affiliated_project(project_box, crawler),
+            soup.find_all("div", class_="et_pb_blurb_content"),
         )
-        github_ref = get_github_link(name, link)
-        if not github_ref:
-            try:
-                project_page = requests.get(
-                    link, headers=HEADERS, timeout=REQUESTS_TIMEOUT
-                )
-                github_ref = get_github_link(name, project_page.text)
-            except requests.exceptions.RequestException as e:
-                LOGGER.warning(f"Exception when retrieving {link} for {name}: {e}")
-        projects.append(
-            {
-                "name": name,
-                "slug": None,
-                "github_name": github_ref,
-                "relationship": "affiliated",
-            }
-        )
-    return projects
+    )
 
 
-def get_projects(output_file: str) -> None:
+def get_projects(output_file: str, crawler: Union[Crawler, None] = None) -> None:
     """
     Get numfocus affiliated and sponsored projects, along with some basic metadata
     :param output_file: File where jsonl of project metadata should be written
+    :param crawler: Crawler to fetch pages with. Defaults to the shared crawler
     :return: None
     """
-    seen_projects = set()
-    with open(output_file, mode="w") as f:
-        sponsored_projects = sorted(get_sponsored_projects(), key=lambda p: p["name"])
-        for project in sponsored_projects:
+    crawler = crawler or get_crawler()
+    sponsored_projects, affiliated_projects = crawler.map(
+        lambda get_list: get_list(crawler),
+        [get_sponsored_projects, get_affiliated_projects],
+    )
+
+    def get_listed_projects() -> iter:
+        seen_projects = set()
+        for project in sorted(sponsored_projects, key=lambda p: p["name"]):
             seen_projects.add(project["name"])
-            f.write(json.dumps(project) + "\n")
-        affiliated_projects = sorted(get_affiliated_projects(), key=lambda p: p["name"])
-        for project in affiliated_projects:
+            yield project
+        for project in sorted(affiliated_projects, key=lambda p: p["name"]):
             # if a project is both sponsored and affiliated, only list it under sponsored
             if project["name"] not in seen_projects:
-                f.write(json.dumps(project) + "\n")
+                yield project
+
+    write_dataset(output_file, get_listed_projects())
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--output_file", default=os.path.join("..", "data", "numfocus.jsonl")
     )
+    parser.add_argument(
+        "--archive_file",
+        help="Archive to store fetched pages in, so that the dataset can be re-extracted from them later",
+    )
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Rebuild the dataset from the pages in --archive_file, without any network access",
+    )
     args = parser.parse_args()
+    if args.reextract and not args.archive_file:
+        parser.error("--reextract requires --archive_file")
 
-    get_projects(args.output_file)
+    with create_crawler(args.archive_file, args.reextract) as crawler:
+        get_projects(args.output_file, crawler)
@@ -0,0 +1,160 @@
+"""
+Memoizes artifacts that several finders need while looking up the same project, so each is retrieved at most once
+per lookup by whichever finder asks for it first. These are the links under "Sponsor this project" on the repo's
+GitHub page (see `github_sources.get_funding_sources`), and the repo's GitHub signals, which include its README,
+its FUNDING.yml and its top contributors' sponsor counts (see `github_signals.get_repo_signals`). Artifacts that
+only depend on a project's owner, like its organization sponsor count and the FUNDING.yml of its `.github`
+repository, can also be shared by every lookup in a run
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Union
+
+
+class LookupContext:
+    """
+    Memo shared by the finders of one project lookup. Finders may run in threads (`get`) or as coroutines on one
+    event loop (`aget`); either way, concurrent requests for the same key wait for a single computation. Failed
+    computations aren't memoized, so the next request retries
+    """
+
+    def __init__(self, run_context: Union["LookupContext", None] = None):
+        """
+        :param run_context: Context shared by every lookup in a run. If provided, owner-scoped values (see
+            `get_owner_value`) are shared with the other lookups in the run
+        """
+        self.owners = {} if run_context is None else run_context.owners
+        # Owner-scoped values some lookup in the run is retrieving, see `claim_owner_value`
+        self.owner_claims = {} if run_context is None else run_context.owner_claims
+        self.owner_lock = (
+            threading.Lock() if run_context is None else run_context.owner_lock
+        )
+        self.values = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+        self.tasks = {}
+
+    def get(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the memoized value for a key, computing it first if no finder has yet
+        :param key: Hashable identifier of the artifact, e.g. ("funding_sources", "owner/repo")
+        :param compute: Function that computes the artifact
+        :return: The artifact
+        """
+        if key in self.values:
+            return self.values[key]
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self.values:
+                self.values[key] = compute()
+        return self.values[key]
+
+    async def aget(self, key: Any, compute: Callable[[], Awaitable]) -> Any:
+        """
+        Async version of `get`
+        :param key: Hashable identifier of the artifact, e.g. ("funding_sources", "owner/repo")
+        :param compute: Function returning an awaitable that computes the artifact
+        :return: The artifact
+        """
+        if key in self.values:
+            return self.values[key]
+        task = self.tasks.get(key)
+        if task is None:
+            task = self.tasks[key] = asyncio.ensure_future(compute())
+        try:
+            # Shielded so that a finder timing out doesn't cancel the computation for the others waiting on it
+            value = await asyncio.shield(task)
+        except Exception:
+            if self.tasks.get(key) is task:
+                del self.tasks[key]
+            raise
+        self.values[key] = value
+        return value
+
+    def get_owner_value(self, owner: str, key: Any) -> Any:
+        """
+        Returns a value that only depends on the project's owner, if a lookup in this run has recorded it
+        :param owner: GitHub owner (user or organization)
+        :param key: Hashable identifier of the value
+        :return: The value, or None if it hasn't been recorded
+        """
+        return self.owners.get((owner.strip().lower(), key))
+
+    def claim_owner_value(self, owner: str, key: Any) -> Any:
+        """
+        Returns a value that only depends on the project's owner, waiting for it if another lookup in this run is
+        retrieving it. Otherwise, the caller is expected to retrieve it and record it with `set_owner_value`, or
+        call `release_owner_value` if it can't, and other lookups asking for it meanwhile wait for the caller
+        :param owner: GitHub owner (user or organization)
+        :param key: Hashable identifier of the value
+        :return: The value, or None if the caller should retrieve it
+        """
+        while True:
+            claim = self.get_owner_claim(owner, key)
+            if claim is None:
+                return self.get_owner_value(owner, key)
+            if claim.result() is not None:
+                return claim.result()
+
+    async def aclaim_owner_value(self, owner: str, key: Any) -> Any:
+        """
+        Async version of `claim_owner_value`
+        :param owner: GitHub owner (user or organization)
+        :param key: Hashable identifier of the value
+        :return: The value, or None if the caller should retrieve it
+        """
+        while True:
+            claim = self.get_owner_claim(owner, key)
+            if claim is None:
+                return self.get_owner_value(owner, key)
+            value = await asyncio.shield(asyncio.wrap_future(claim))
+            if value is not None:
+                return value
+
+    def get_owner_claim(self, owner: str, key: Any) -> Union[Future, None]:
+        """
+        Claims the retrieval of an owner-scoped value unless it is recorded or another lookup has claimed it
+        :param owner: GitHub owner (user or organization)
+        :param key: Hashable identifier of the value
+        :return: The other lookup's claim, resolved with the value (or None if it failed) once it finishes. None if
+            the value is recorded or the caller now holds the claim
+        """
+        owner_key = (owner.strip().lower(), key)
+        with self.owner_lock:
+            if owner_key in self.owners:
+                return None
+            claim = self.owner_claims.get(owner_key)
+            if claim is None:
+                self.owner_claims[owner_key] = Future()
+            return claim
+
+    def set_owner_value(self, owner: str, key: Any, value: Any) -> None:
+        """
+        Records a value that only depends on the project's owner, for every lookup in this run
+        :param owner: GitHub owner (user or organization)
+        :param key: Hashable identifier of the value
+        :param value: The value
+        :return: None
+        """
+        owner_key = (owner.strip().lower(), key)
+        with self.owner_lock:
+            self.owners[owner_key] = value
+            claim = self.owner_claims.pop(owner_key, None)
+        if claim is not None:
+            claim.set_result(value)
+
+    def release_owner_value(self, owner: str, key: Any) -> None:
+        """
+        Gives up a claim on an owner-scoped value that couldn't be retrieved, so that a lookup waiting for it
+        retrieves it instead
+        :param owner: GitHub owner (user or organization)
+        :param key: Hashable identifier of the value
+        :return: None
+        """
+        with self.owner_lock:
+            claim = self.owner_claims.pop((owner.strip().lower(), key), None)
+        if claim is not None:
+            claim.set_result(None)
@@ -0,0 +1,140 @@
+"""
+Archive of the raw pages fetched by the dataset builders (list_gsoc and list_numfocus). Every response the crawler
+receives is stored, compressed, under its URL and the time it was fetched. The builders can then be re-run with
+`--reextract` to rebuild their datasets from the archive without any network access, e.g. after changing how
+GitHub links are extracted, or adding to manual_repo_mapping.json. Re-extraction uses the most recent copy of each
+page.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Union
+
+import requests
+
+from funderfinder.utils.http_cache import SKIPPED_HEADERS, CachedResponse
+from funderfinder.utils.transport import build_cached_response
+
+
+class PageNotArchived(requests.exceptions.RequestException):
+    """
+    Raised when re-extraction needs a page that isn't in the archive
+    """
+
+
+class PageArchive:
+    """
+    sqlite-backed archive of fetched pages. Safe to share between threads
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the archive file, created if it doesn't exist
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT, fetched_at REAL, status INTEGER, headers TEXT, "
+                "body BLOB, PRIMARY KEY (url, fetched_at))"
+            )
+
+    def add(self, response: requests.Response) -> None:
+        """
+        Stores a fetched page under the URL it was requested with, and the URL of each redirect that led to it, so
+        that re-extraction finds it when making the same request
+        :param response: Response to a GET request
+        :return: None
+        """
+        headers = {
+            k: v
+            for k, v in response.headers.items()
+            if k.lower() not in SKIPPED_HEADERS
+        }
+        urls = dict.fromkeys(r.request.url for r in [*response.history, response])
+        fetched_at = time.time()
+        body = zlib.compress(response.content)
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                [
+                    (url, fetched_at, response.status_code, json.dumps(headers), body)
+                    for url in urls
+                ],
+            )
+
+    def get(self, url: str) -> Union[CachedResponse, None]:
+        """
+        Reads the most recent copy of a page
+        :param url: URL the page was requested with
+        :return: The archived response, or None if the page isn't in the archive
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status, headers, body, fetched_at FROM pages WHERE url = ? "
+                "ORDER BY fetched_at DESC LIMIT 1",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, fetched_at = row
+        return CachedResponse(
+            status, json.loads(headers), zlib.decompress(body), fetched_at
+        )
+
+    def get_urls(self) -> list:
+        """
+        Lists the URLs of the archived pages
+        :return: List of URLs, each listed once however many copies of its page are archived
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT url FROM pages ORDER BY url"
+            ).fetchall()
+        return [url for url, in rows]
+
+    def close(self) -> None:
+        """
+        Closes the database connection
+        :return: None
+        """
+        with self.lock:
+            self.connection.close()
+
+
+class ArchiveSession(requests.Session):
+    """
+    Session that answers requests from a page archive instead of the network, for re-extraction
+    """
+
+    def __init__(self, archive: PageArchive):
+        """
+        :param archive: Archive to read pages from. Closed along with the session
+        """
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """
+        Answers a prepared request with its page's most recent copy in the archive
+        :param request: Prepared request
+        :param kwargs: Ignored; accepted for compatibility with `requests.Session.send`
+        :return: Response
+        """
+        archived = self.archive.get(request.url)
+        if archived is None:
+            raise PageNotArchived(
+                f"{request.url} is not in {self.archive.path}", request=request
+            )
+        return build_cached_response(request, archived)
+
+    def close(self) -> None:
+        super().close()
+        self.archive.close()
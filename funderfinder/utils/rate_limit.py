@@ -0,0 +1,187 @@
+"""
+Keeps requests to GitHub's APIs within their rate limits. GitHub reports the remaining budget of each family of
+endpoints (REST "core" and GraphQL have separate budgets) in the X-RateLimit-* headers of every response, including
+GraphQL responses, whose budget is counted in query cost points. The limiter tracks these budgets for the whole
+process, so that concurrent workers:
+
+  * run at full speed while more than half of a budget is left
+  * are then paced so that the rest of the budget lasts until it resets
+  * wait for the reset once a budget is used up, instead of failing
+  * back off when GitHub reports a secondary rate limit (a 403 or 429 with a Retry-After header or a rate limit
+    message), for as long as GitHub asks or for a minute, doubling with each consecutive retry
+
+Requests to other hosts aren't limited.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+GITHUB_API_HOST = "api.github.com"
+# Fraction of a budget below which requests are paced
+PACE_BELOW = 0.5
+# Number of seconds to back off after a secondary rate limit that doesn't say how long to wait for
+SECONDARY_BACKOFF = 60
+MAX_RETRIES = 3
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_family(url: str) -> Union[str, None]:
+    """
+    Returns the family of endpoints sharing a rate limit budget that a URL belongs to
+    :param url: URL of the request
+    :return: "graphql" or "core" for GitHub's APIs, otherwise None
+    """
+    parts = urlsplit(url)
+    if parts.hostname != GITHUB_API_HOST:
+        return None
+    return "graphql" if parts.path.startswith("/graphql") else "core"
+
+
+def is_rate_limited(status: int, headers: dict, body: bytes = b"") -> bool:
+    """
+    Checks whether GitHub refused a request because of a primary or secondary rate limit. GitHub also uses 403
+    for requests that aren't authorized, so a 403 only counts if it says it's about rate limits
+    :param status: HTTP status of the response
+    :param headers: Headers of the response
+    :param body: Body of the response, if it has been read
+    :return: True if the request should be retried once the limit has passed
+    """
+    if status in (403, 429):
+        return (
+            status == 429
+            or "Retry-After" in headers
+            or headers.get("X-RateLimit-Remaining") == "0"
+            or b"rate limit" in body.lower()
+        )
+    # GraphQL can also report an exhausted budget as an error in a 200 response
+    return status == 200 and b'"RATE_LIMITED"' in body
+
+
+class Budget:
+    """
+    State of one family's rate limit budget
+    """
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = 0.0
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """
+    Process-wide tracker of GitHub rate limit budgets. Callers `reserve` a slot before each request and wait
+    for the returned number of seconds, then report the response's headers with `update`
+    """
+
+    def __init__(
+        self, pace_below: float = PACE_BELOW, clock: Callable[[], float] = time.time
+    ):
+        self.pace_below = pace_below
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.budgets = {}
+
+    def reserve(self, family: Union[str, None]) -> float:
+        """
+        Reserves a request from a family's budget
+        :param family: Family the request belongs to, see `get_family`
+        :return: Number of seconds to wait before making the request
+        """
+        if family is None:
+            return 0
+        with self.lock:
+            budget = self.budgets.setdefault(family, Budget())
+            now = self.clock()
+            start = max(now, budget.blocked_until)
+            if budget.remaining is not None and now < budget.reset:
+                if budget.remaining <= 0:
+                    start = max(start, budget.reset)
+                elif budget.remaining < budget.limit * self.pace_below:
+                    start = max(start, budget.next_slot)
+                    budget.next_slot = start + (budget.reset - now) / budget.remaining
+                budget.remaining -= 1
+            return start - now
+
+    def update(self, family: Union[str, None], headers: dict) -> None:
+        """
+        Records the budget GitHub reported in a response's headers
+        :param family: Family the request belonged to, see `get_family`
+        :param headers: Headers of the response
+        :return: None
+        """
+        if family is None or "X-RateLimit-Remaining" not in headers:
+            return
+        with self.lock:
+            budget = self.budgets.setdefault(family, Budget())
+            budget.remaining = int(headers["X-RateLimit-Remaining"])
+            budget.limit = int(headers.get("X-RateLimit-Limit", budget.remaining))
+            budget.reset = float(headers.get("X-RateLimit-Reset", 0))
+
+    def back_off(self, family: Union[str, None], headers: dict, attempt: int) -> None:
+        """
+        Blocks a family's requests after GitHub rate limited one of them
+        :param family: Family the request belonged to, see `get_family`
+        :param headers: Headers of the rate limited response
+        :param attempt: Number of times the request has already been retried
+        :return: None
+        """
+        if family is None:
+            return
+        with self.lock:
+            budget = self.budgets.setdefault(family, Budget())
+            now = self.clock()
+            if "Retry-After" in headers:
+                delay = float(headers["Retry-After"])
+            elif headers.get("X-RateLimit-Remaining") == "0":
+                delay = float(headers.get("X-RateLimit-Reset", now)) - now + 1
+            else:
+                delay = SECONDARY_BACKOFF * 2**attempt
+            budget.blocked_until = max(budget.blocked_until, now + delay)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Returns the process-wide rate limiter, creating it on first use
+    :return: Shared rate limiter
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def get_trace_config(rate_limiter: RateLimiter) -> aiohttp.TraceConfig:
+    """
+    Returns an aiohttp trace config that makes a session's requests wait for `rate_limiter` and report their
+    responses to it. Rate limited responses are still returned to the caller, but later requests back off
+    :param rate_limiter: Rate limiter to use
+    :return: aiohttp trace config
+    """
+
+    async def on_request_start(session, context, params) -> None:
+        delay = rate_limiter.reserve(get_family(str(params.url)))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def on_request_end(session, context, params) -> None:
+        family = get_family(str(params.url))
+        rate_limiter.update(family, params.response.headers)
+        if is_rate_limited(params.response.status, params.response.headers):
+            rate_limiter.back_off(family, params.response.headers, 0)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
@@ -0,0 +1,143 @@
+"""
+Cache of finder results, so that projects that come up again (within a run, or in later runs) aren't looked up
+again. Results are keyed by finder name and normalized repo slug, and kept in an in-memory LRU in front of an
+optional sqlite file. Each entry expires after its finder's `cache_ttl`, and entries of finders that match against
+a bundled dataset are discarded as soon as the dataset changes (see `Finder.get_cache_version`).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Union
+
+RESULTS_FILE = "results.sqlite"
+MAX_MEMORY_ENTRIES = 10000
+GITHUB_URL = "https://github.com/"
+
+
+def normalize_slug(slug: str) -> str:
+    """
+    Normalizes a GitHub identifier so that different spellings of the same repo share cache entries
+    :param slug: GitHub identifier or url, e.g. NumPy/numpy or https://github.com/numpy/numpy/
+    :return: Normalized identifier, e.g. numpy/numpy
+    """
+    slug = slug.strip().rstrip("/").lower()
+    if slug.startswith(GITHUB_URL):
+        slug = slug[len(GITHUB_URL) :]
+    return slug
+
+
+class ResultCache:
+    """
+    Two-tier cache of finder results. Safe to share between threads
+    """
+
+    def __init__(
+        self,
+        path: Union[str, None] = None,
+        max_memory_entries: int = MAX_MEMORY_ENTRIES,
+    ):
+        """
+        :param path: Path to the sqlite file results are persisted in. If None, results are only kept in memory
+        :param max_memory_entries: Number of results to keep in memory
+        """
+        self.max_memory_entries = max_memory_entries
+        self.lock = threading.Lock()
+        # Maps (finder name, slug) to (version, time stored, JSON of the results)
+        self.memory = OrderedDict()
+        self.connection = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            with self.lock, self.connection:
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results (finder TEXT, slug TEXT, version TEXT, stored_at REAL, "
+                    "funding TEXT, PRIMARY KEY (finder, slug))"
+                )
+
+    def remember(self, key: tuple, entry: tuple) -> None:
+        """
+        Adds an entry to the in-memory tier, evicting the least recently used entries. Must be called with the
+        lock held
+        :param key: (finder name, slug) tuple
+        :param entry: (version, time stored, JSON of the results) tuple
+        :return: None
+        """
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, finder_class, slug: str) -> Union[list, None]:
+        """
+        Returns a finder's cached results for a project
+        :param finder_class: Finder subclass
+        :param slug: GitHub identifier for the project (e.g. georgetown-cset/funder-finder)
+        :return: The finder's results, or None if they aren't cached, have expired, or were computed from an older
+            version of the finder's dataset
+        """
+        key = (finder_class.name, normalize_slug(slug))
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+            elif self.connection is not None:
+                entry = self.connection.execute(
+                    "SELECT version, stored_at, funding FROM results WHERE finder = ? AND slug = ?",
+                    key,
+                ).fetchone()
+                if entry is not None:
+                    self.remember(key, entry)
+        if entry is None:
+            return None
+        version, stored_at, funding = entry
+        if (
+            time.time() - stored_at >= finder_class.cache_ttl
+            or version != finder_class.get_cache_version()
+        ):
+            return None
+        return json.loads(funding)
+
+    def set(self, finder_class, slug: str, funding: list) -> None:
+        """
+        Caches a finder's results for a project
+        :param finder_class: Finder subclass
+        :param slug: GitHub identifier for the project (e.g. georgetown-cset/funder-finder)
+        :param funding: The finder's results
+        :return: None
+        """
+        key = (finder_class.name, normalize_slug(slug))
+        entry = (finder_class.get_cache_version(), time.time(), json.dumps(funding))
+        with self.lock:
+            self.remember(key, entry)
+            if self.connection is not None:
+                with self.connection:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        key + entry,
+                    )
+
+    def close(self) -> None:
+        """
+        Closes the sqlite file, if any
+        :return: None
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+def open_result_cache(cache_dir: Union[str, None] = None) -> ResultCache:
+    """
+    Opens the result cache kept in a directory
+    :param cache_dir: Path to the cache directory, or None to only cache results in memory
+    :return: Result cache
+    """
+    return ResultCache(
+        None if cache_dir is None else os.path.join(cache_dir, RESULTS_FILE)
+    )
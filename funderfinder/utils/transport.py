@@ -0,0 +1,309 @@
+"""
+Shared HTTP transport for the finders. Requests made through these sessions reuse keep-alive connections (one pool
+per host), ask for compressed responses, time out by default instead of hanging forever, and stay within GitHub's
+rate limits (see `rate_limit`). The shared session can also cache responses on disk between runs, see `http_cache`.
+`iter_text` and `aiter_text` read streamed responses incrementally, so that callers can stop downloading as soon
+as they have found what they were looking for
+"""
+
+import codecs
+import contextlib
+import logging
+import os
+import threading
+import time
+from typing import Union
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from funderfinder.utils.http_cache import (
+    CACHE_DIR_ENV,
+    CachedResponse,
+    HTTPCache,
+    get_cache_key,
+    get_ttl,
+    is_cacheable,
+    open_cache,
+    should_store,
+)
+from funderfinder.utils.rate_limit import (
+    MAX_RETRIES,
+    RateLimiter,
+    get_family,
+    get_rate_limiter,
+    get_trace_config,
+    is_rate_limited,
+)
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+# Number of hosts to keep connection pools for, and number of connections to keep open to each host. A single repo
+# lookup talks to a handful of hosts (api.github.com, github.com, raw.githubusercontent.com, api.opencollective.com)
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+HEADERS = {"Accept-Encoding": "gzip, deflate"}
+# Number of bytes of a streamed response to read at a time
+CHUNK_SIZE = 16 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """
+    requests Session with larger per-host connection pools, a default timeout, rate limiting of requests to GitHub,
+    and optionally an on-disk response cache
+    """
+
+    def __init__(
+        self,
+        timeout: Union[float, tuple] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+        pool_maxsize: int = POOL_MAXSIZE,
+        cache: Union[HTTPCache, None] = None,
+        rate_limiter: Union[RateLimiter, None] = None,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.cache = cache
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.headers.update(HEADERS)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """
+        Sends a prepared request, answering it from the cache if a fresh response is cached, and revalidating
+        stale responses when the server gave us a validator for them. Streamed responses stay streamed, and are only
+        stored if their body is read in full, see `store_when_read`
+        :param request: Prepared request
+        :param kwargs: Keyword arguments passed through to `requests.Session.send`
+        :return: Response
+        """
+        if self.cache is None or not is_cacheable(request.method, request.url):
+            return self.send_limited(request, **kwargs)
+        key = get_cache_key(
+            request.method,
+            request.url,
+            request.body,
+            request.headers.get("Authorization"),
+        )
+        cached = self.cache.get(key)
+        if cached is not None and cached.is_fresh(get_ttl(request.url)):
+            return build_cached_response(request, cached)
+        if cached is not None:
+            request.headers.update(cached.get_validators())
+        response = self.send_limited(request, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(key)
+            return build_cached_response(request, cached)
+        if kwargs.get("stream"):
+            self.store_when_read(key, request, response)
+        elif should_store(
+            request.method, response.status_code, response.headers, response.content
+        ):
+            self.cache.set(
+                key,
+                request.url,
+                response.status_code,
+                dict(response.headers),
+                response.content,
+            )
+        return response
+
+    def store_when_read(
+        self, key: str, request: requests.PreparedRequest, response: requests.Response
+    ) -> None:
+        """
+        Makes a streamed response store itself in the cache once its body has been read in full. Responses that the
+        caller stops reading early (see `iter_text`) aren't stored, since only part of their body was downloaded
+        :param key: Cache key of the request, see `http_cache.get_cache_key`
+        :param request: Prepared request
+        :param response: Streamed response whose body hasn't been read yet
+        :return: None
+        """
+        iter_content = response.iter_content
+
+        def iter_and_store(chunk_size: int = 1, decode_unicode: bool = False) -> iter:
+            if decode_unicode:
+                yield from iter_content(chunk_size, decode_unicode)
+                return
+            chunks = []
+            for chunk in iter_content(chunk_size):
+                chunks.append(chunk)
+                yield chunk
+            body = b"".join(chunks)
+            if should_store(
+                request.method, response.status_code, response.headers, body
+            ):
+                self.cache.set(
+                    key, request.url, response.status_code, dict(response.headers), body
+                )
+
+        response.iter_content = iter_and_store
+
+    def send_limited(
+        self, request: requests.PreparedRequest, **kwargs
+    ) -> requests.Response:
+        """
+        Sends a prepared request once the rate limiter allows it, retrying it if GitHub rate limits it anyway
+        :param request: Prepared request
+        :param kwargs: Keyword arguments passed through to `requests.Session.send`
+        :return: Response
+        """
+        family = get_family(request.url)
+        for attempt in range(MAX_RETRIES + 1):
+            delay = self.rate_limiter.reserve(family)
+            if delay > 0:
+                time.sleep(delay)
+            response = super().send(request, **kwargs)
+            if family is None:
+                return response
+            self.rate_limiter.update(family, response.headers)
+            # Only read the body where it can tell us about rate limits, so streamed responses stay streamed
+            read_body = response.status_code in (403, 429) or (
+                family == "graphql" and not kwargs.get("stream")
+            )
+            if attempt == MAX_RETRIES or not is_rate_limited(
+                response.status_code,
+                response.headers,
+                response.content if read_body else b"",
+            ):
+                return response
+            self.rate_limiter.back_off(family, response.headers, attempt)
+        return response
+
+
+def build_cached_response(
+    request: requests.PreparedRequest, cached: CachedResponse
+) -> requests.Response:
+    """
+    Turns a cached response into a requests Response. Its `from_cache` attribute is set to True
+    :param request: Request the response answers
+    :param cached: Response read from the cache
+    :return: Response
+    """
+    response = requests.Response()
+    response.status_code = cached.status
+    response.headers = CaseInsensitiveDict(cached.headers)
+    response._content = cached.body
+    response._content_consumed = True
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.from_cache = True
+    return response
+
+
+def iter_text(
+    response: requests.Response, max_bytes: int, chunk_size: int = CHUNK_SIZE
+) -> iter:
+    """
+    Decodes a streamed response's body as it is downloaded. Closing the response after stopping early drops its
+    connection instead of downloading the rest of the body
+    :param response: Response to a request made with `stream=True`
+    :param max_bytes: Number of bytes of the body after which to stop reading
+    :param chunk_size: Number of bytes to read at a time
+    :return: A generator of decoded chunks of the body
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+        errors="replace"
+    )
+    size = 0
+    for chunk in response.iter_content(chunk_size):
+        size += len(chunk)
+        yield decoder.decode(chunk)
+        if size >= max_bytes:
+            logging.warning(f"Stopped reading {response.url} after {size} bytes")
+            return
+    yield decoder.decode(b"", final=True)
+
+
+async def aiter_text(
+    response: aiohttp.ClientResponse, max_bytes: int, chunk_size: int = CHUNK_SIZE
+) -> iter:
+    """
+    Async version of `iter_text`
+    :param response: aiohttp response whose body hasn't been read yet
+    :param max_bytes: Number of bytes of the body after which to stop reading
+    :param chunk_size: Number of bytes to read at a time
+    :return: An async generator of decoded chunks of the body
+    """
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+        errors="replace"
+    )
+    size = 0
+    async for chunk in response.content.iter_chunked(chunk_size):
+        size += len(chunk)
+        yield decoder.decode(chunk)
+        if size >= max_bytes:
+            logging.warning(f"Stopped reading {response.url} after {size} bytes")
+            return
+    yield decoder.decode(b"", final=True)
+
+
+def get_session() -> PooledSession:
+    """
+    Returns the process-wide session shared by all finders, creating it on first use. requests sessions can be
+    shared between the threads get_funders.py runs finders in
+    :return: Shared session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                cache_dir = os.environ.get(CACHE_DIR_ENV)
+                _session = PooledSession(
+                    cache=open_cache(cache_dir) if cache_dir else None
+                )
+    return _session
+
+
+def set_cache(cache_dir: Union[str, None]) -> None:
+    """
+    Makes the shared session cache responses in a directory, or stops it caching responses
+    :param cache_dir: Path to the cache directory, or None to disable caching
+    :return: None
+    """
+    get_session().cache = None if cache_dir is None else open_cache(cache_dir)
+
+
+def create_async_session() -> aiohttp.ClientSession:
+    """
+    Creates an aiohttp session with the same connection pooling, timeout defaults and rate limiting as
+    `get_session`. Must be called from a running event loop, and closed by the caller
+    :return: aiohttp session
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=POOL_MAXSIZE, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(
+            sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT
+        ),
+        headers=HEADERS,
+        trace_configs=[get_trace_config(get_rate_limiter())],
+    )
+
+
+@contextlib.asynccontextmanager
+async def async_session(session: Union[aiohttp.ClientSession, None] = None) -> iter:
+    """
+    Yields `session` if one was passed in, otherwise a new session that is closed on exit. Lets callers that make
+    many lookups share one session while single lookups still clean up after themselves
+    :param session: aiohttp session to use, if any
+    :return: An async context manager yielding an aiohttp session
+    """
+    if session is not None:
+        yield session
+        return
+    async with create_async_session() as session:
+        yield session
@@ -1,5 +1,43 @@
+import re
+from typing import Union
+
 GITHUB_PREFIX = "(^|[^.])github.com/([A-Za-z0-9-_.]+"
 GITHUB_REPO_PATTERN = rf"(?i){GITHUB_PREFIX}/[A-Za-z0-9-_.]*[A-Za-z0-9-_])"
 GITHUB_ORG_PATTERN = rf"(?i){GITHUB_PREFIX})(\b)"
+# Matches every link to GitHub, capturing its repo (in the same way as GITHUB_REPO_PATTERN) if it links to one, and
+# otherwise its owner (in the same way as GITHUB_ORG_PATTERN). Only "github.com/" is consumed when no repo matches,
+# so that scanning on finds the same repos as GITHUB_REPO_PATTERN would
+GITHUB_LINK_PATTERN = re.compile(
+    r"(?i)(?<![.])github.com/(?:([A-Za-z0-9-_.]+/[A-Za-z0-9-_.]*[A-Za-z0-9-_])|(?=([A-Za-z0-9-_.]+)\b))"
+)
 
 SCRAPE_DELAY = 2
+
+
+def extract_github_links(text: str) -> tuple:
+    """
+    Extracts the github repos and owners linked to in some text, in a single scan
+    :param text: Text that may contain github links
+    :return: Tuple of the list of repos and the list of owners linked to without a repo, each without duplicates
+        and in the order they first appear
+    """
+    repos = {}
+    owners = {}
+    for repo, owner in GITHUB_LINK_PATTERN.findall(text):
+        if repo:
+            repos[repo] = None
+        else:
+            owners[owner] = None
+    return list(repos), list(owners)
+
+
+def find_github_repo(text: str) -> Union[str, None]:
+    """
+    Finds the first github repo linked to in some text, without scanning the rest of the text
+    :param text: Text that may contain github links
+    :return: The repo, or None
+    """
+    for match in GITHUB_LINK_PATTERN.finditer(text):
+        if match.group(1):
+            return match.group(1)
+    return None
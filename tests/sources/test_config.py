@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from funderfinder.sources.config import FINDERS, get_finders
+
+from ..context import funderfinder
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+class TestConfig(unittest.TestCase):
+    def test_get_finders(self):
+        self.assertEqual(
+            [class_name for _, class_name in FINDERS.values()],
+            [finder.__name__ for finder in get_finders()],
+        )
+        # Finders are returned in registry order, whatever order they were asked for in
+        self.assertEqual(
+            ["NumFocusFinder", "GSOCFinder"],
+            [finder.__name__ for finder in get_finders(["gsoc", "numfocus"])],
+        )
+        self.assertEqual(
+            ["GitHubSponsorsFinder", "OpenCollectiveFinder", "TideliftFinder"],
+            [
+                finder.__name__
+                for finder in get_finders(exclude_sources=["numfocus", "gsoc"])
+            ],
+        )
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            get_finders(["gsoc", "patreon"])
+        with self.assertRaises(ValueError):
+            get_finders(exclude_sources=["patreon"])
+
+    def test_offline_sources_skip_http_imports(self):
+        script = (
+            "import sys\n"
+            "from funderfinder.get_funders import get_project_funders\n"
+            "from funderfinder.sources.config import get_finders\n"
+            "funders = get_project_funders('numpy/numpy', finders=get_finders(['gsoc', 'numfocus']))\n"
+            "assert [f['type'] for f in funders] == ['NumFOCUS'], funders\n"
+            "print(' '.join(m for m in ('requests', 'aiohttp', 'bs4') if m in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual("", result.stdout.strip())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 """Tidelift-related testing"""
 
+import os
 import unittest
+from unittest import mock
 
 from funderfinder.sources.tidelift import TideliftFinder
 
@@ -37,3 +39,8 @@ class TestTidelift(unittest.TestCase):
             }
         )
         self.assertTrue(not stats["is_funded"])
+
+    @mock.patch.dict(os.environ, {"GITHUB_TOKEN": ""})
+    def test_requires_github_token(self):
+        with self.assertRaisesRegex(ValueError, "GITHUB_TOKEN"):
+            TideliftFinder()
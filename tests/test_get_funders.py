@@ -0,0 +1,288 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from funderfinder.get_funders import (
+    aget_project_funders,
+    get_batch_project_funders,
+    get_project_funders,
+    read_repo_names,
+    write_batch_project_funders,
+)
+from funderfinder.sources._finder import Finder
+from funderfinder.sources.github_sponsors import GitHubSponsorsFinder
+from funderfinder.sources.tidelift import TideliftFinder
+from funderfinder.utils.result_cache import ResultCache
+
+from .context import funderfinder
+from .utils.test_github_signals import FakeResponse
+
+
+class SlowFinder(Finder):
+    name = "Slow"
+
+    def run(self, gh_project_slug=None) -> list:
+        time.sleep(0.2)
+        return [{"funding_type": "slow"}]
+
+
+class FastFinder(Finder):
+    name = "Fast"
+
+    def run(self, gh_project_slug=None) -> list:
+        return [{"funding_type": "fast"}]
+
+
+class NotFundedFinder(Finder):
+    name = "Not Funded"
+
+    def run(self, gh_project_slug=None) -> list:
+        return []
+
+
+class FailingFinder(Finder):
+    name = "Failing"
+
+    def run(self, gh_project_slug=None) -> list:
+        if gh_project_slug == "an-owner/broken":
+            raise ValueError("broken")
+        return [{"funding_type": "failing"}]
+
+
+class AsyncSlowFinder(Finder):
+    name = "Async Slow"
+
+    async def arun(self, gh_project_slug=None, session=None) -> list:
+        await asyncio.sleep(0.2)
+        return [{"funding_type": "async slow"}]
+
+
+class AsyncHangingFinder(Finder):
+    name = "Async Hanging"
+
+    async def arun(self, gh_project_slug=None, session=None) -> list:
+        await asyncio.sleep(2)
+        return [{"funding_type": "async hanging"}]
+
+
+class HangingFinder(Finder):
+    name = "Hanging"
+
+    def run(self, gh_project_slug=None) -> list:
+        time.sleep(2)
+        return [{"funding_type": "hanging"}]
+
+
+class SharingFinder(Finder):
+    name = "Sharing"
+    computations = []
+
+    def run(self, gh_project_slug=None) -> list:
+        def compute():
+            time.sleep(0.1)
+            self.computations.append(gh_project_slug)
+            return {"funding_type": "shared"}
+
+        return [dict(self.context.get(("artifact", gh_project_slug), compute))]
+
+
+class FakeGitHubSession:
+    """
+    Answers the contributors and signals requests of the GitHub-based finders for a repo with one contributor, a
+    README, and no funding
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(("GET", url))
+        return FakeResponse([{"login": "a-user"}])
+
+    def post(self, url, **kwargs):
+        self.requests.append(("POST", url))
+        return FakeResponse(
+            {
+                "data": {
+                    "repository": {
+                        "defaultBranchRef": {"name": "main"},
+                        "readme0": {"text": "A README"},
+                    },
+                    "user0": {"sponsors": {"totalCount": 0}},
+                }
+            }
+        )
+
+
+class TestGetFunders(unittest.TestCase):
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [SlowFinder, NotFundedFinder, FastFinder],
+    )
+    def test_results_in_finder_order(self):
+        for max_workers in [None, 1, 2]:
+            funders = get_project_funders("an-owner/a-repo", max_workers=max_workers)
+            self.assertEqual(["slow", "fast"], [f["funding_type"] for f in funders])
+            self.assertEqual(["Slow", "Fast"], [f["type"] for f in funders])
+            self.assertTrue(all(f["is_funded"] for f in funders))
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [SlowFinder, SlowFinder, SlowFinder],
+    )
+    def test_finders_run_concurrently(self):
+        start = time.monotonic()
+        funders = get_project_funders("an-owner/a-repo")
+        self.assertEqual(3, len(funders))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_no_finders(self):
+        self.assertEqual([], get_project_funders("an-owner/a-repo", finders=[]))
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [HangingFinder, FastFinder],
+    )
+    def test_timeout_skips_finder(self):
+        start = time.monotonic()
+        funders = get_project_funders("an-owner/a-repo", timeout=0.1)
+        self.assertEqual(["fast"], [f["funding_type"] for f in funders])
+        self.assertLess(time.monotonic() - start, 1)
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [SlowFinder, SlowFinder],
+    )
+    def test_timeout_counts_from_finder_start(self):
+        # With a single worker, the second finder is queued behind the first and should still get its full timeout
+        funders = get_project_funders("an-owner/a-repo", max_workers=1, timeout=0.3)
+        self.assertEqual(2, len(funders))
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [SharingFinder, SharingFinder, SharingFinder],
+    )
+    def test_finders_share_lookup_context(self):
+        SharingFinder.computations.clear()
+        funders = get_project_funders("an-owner/a-repo")
+        self.assertEqual(3, len(funders))
+        get_project_funders("an-owner/a-repo")
+        # Once per lookup, however many finders ask
+        self.assertEqual(["an-owner/a-repo"] * 2, SharingFinder.computations)
+
+    @patch.dict(
+        os.environ, {"GITHUB_TOKEN": "a-token", "GITHUB_USERNAME": "a-username"}
+    )
+    def test_finders_share_github_signals(self):
+        session = FakeGitHubSession()
+        with patch("funderfinder.utils.transport.get_session", return_value=session):
+            funders = get_project_funders(
+                "an-owner/a-repo", finders=[GitHubSponsorsFinder, TideliftFinder]
+            )
+        self.assertEqual([], funders)
+        # One request for the top contributors and one signals query for the whole lookup
+        self.assertEqual(
+            [
+                "GET https://api.github.com/repos/an-owner/a-repo/contributors?page=1&per_page=3",
+                "POST https://api.github.com/graphql",
+            ],
+            [" ".join(request) for request in session.requests],
+        )
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [SharingFinder, NotFundedFinder],
+    )
+    def test_cached_results_are_reused(self):
+        SharingFinder.computations.clear()
+        cache = ResultCache()
+        for _ in range(3):
+            funders = get_project_funders("an-owner/a-repo", cache=cache)
+            self.assertEqual(["shared"], [f["funding_type"] for f in funders])
+        self.assertEqual(["an-owner/a-repo"], SharingFinder.computations)
+        self.assertEqual([], cache.get(NotFundedFinder, "an-owner/a-repo"))
+        asyncio.run(aget_project_funders("An-Owner/a-repo", cache=cache))
+        self.assertEqual(["an-owner/a-repo"], SharingFinder.computations)
+
+    def test_read_repo_names(self):
+        lines = io.StringIO(
+            "an-owner/a-repo\n\n# a comment\n  another-owner/another-repo  \n"
+        )
+        self.assertEqual(
+            ["an-owner/a-repo", "another-owner/another-repo"],
+            list(read_repo_names(lines)),
+        )
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS", [FastFinder, FailingFinder]
+    )
+    def test_get_batch_project_funders(self):
+        repo_names = [f"an-owner/repo-{i}" for i in range(50)] + ["an-owner/broken"]
+        results = list(get_batch_project_funders(repo_names, max_concurrent_repos=4))
+        self.assertEqual(sorted(repo_names), sorted(r["repo_name"] for r in results))
+        for result in results:
+            if result["repo_name"] == "an-owner/broken":
+                self.assertEqual("ValueError: broken", result["error"])
+            else:
+                self.assertEqual(
+                    ["fast", "failing"], [f["funding_type"] for f in result["funders"]]
+                )
+
+    @patch("funderfinder.sources.config.PRODUCTION_FINDERS", [FastFinder])
+    def test_get_batch_project_funders_is_lazy(self):
+        consumed = []
+
+        def repo_names():
+            for i in range(1000):
+                consumed.append(i)
+                yield f"an-owner/repo-{i}"
+
+        results = get_batch_project_funders(repo_names(), max_concurrent_repos=2)
+        next(results)
+        # only a bounded number of repos should have been read from the input
+        self.assertLessEqual(len(consumed), 5)
+        results.close()
+
+    @patch("funderfinder.sources.config.PRODUCTION_FINDERS", [FastFinder])
+    def test_write_batch_project_funders(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "repos.txt")
+            output_file = os.path.join(tmpdir, "funders.jsonl")
+            with open(input_file, mode="w") as f:
+                f.write("an-owner/a-repo\nanother-owner/another-repo\n")
+            write_batch_project_funders(input_file, output_file)
+            with open(output_file) as f:
+                results = [json.loads(line) for line in f]
+        self.assertEqual(
+            ["an-owner/a-repo", "another-owner/another-repo"],
+            sorted(r["repo_name"] for r in results),
+        )
+
+    @patch(
+        "funderfinder.sources.config.PRODUCTION_FINDERS",
+        [AsyncSlowFinder, SlowFinder, NotFundedFinder, AsyncHangingFinder, FastFinder],
+    )
+    def test_aget_project_funders(self):
+        async def get_many_project_funders():
+            return await asyncio.gather(
+                *[
+                    aget_project_funders(f"an-owner/repo-{i}", timeout=0.5)
+                    for i in range(3)
+                ]
+            )
+
+        start = time.monotonic()
+        results = asyncio.run(get_many_project_funders())
+        self.assertLess(time.monotonic() - start, 1.5)
+        for funders in results:
+            self.assertEqual(
+                ["async slow", "slow", "fast"], [f["funding_type"] for f in funders]
+            )
+            self.assertEqual(
+                ["Async Slow", "Slow", "Fast"], [f["type"] for f in funders]
+            )
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+
+from funderfinder.utils.bulk_match import match_slugs, read_slugs, write_matches
+
+from ..context import funderfinder
+
+
+class TestBulkMatch(unittest.TestCase):
+    def test_read_slugs(self):
+        self.assertEqual(
+            ["nipy/nibabel", "conda"],
+            list(read_slugs(io.StringIO("nipy/nibabel\n\n  conda \n"))),
+        )
+
+    def test_read_slugs_csv(self):
+        self.assertEqual(
+            ["nipy/nibabel", "conda"],
+            list(
+                read_slugs(
+                    io.StringIO("stars,repo\n10,nipy/nibabel\n20,conda\n30,\n"),
+                    "repo",
+                )
+            ),
+        )
+
+    def test_match_slugs(self):
+        matches = list(
+            match_slugs(
+                [
+                    "enigma-dev/enigma-dev",
+                    "enigma-dev",
+                    "pandas-dev/pandas",
+                    "conda/conda-build",
+                    "some/projectthatdoesntexist",
+                ]
+            )
+        )
+        self.assertEqual(5, len(matches))
+        for match in matches[:2]:
+            for year in range(2020, 2024):
+                self.assertIn(str(year), match["gsoc_years"].split(";"))
+            self.assertFalse(match["is_numfocus"])
+        for match in matches[2:4]:
+            self.assertTrue(match["is_numfocus"])
+        self.assertEqual(
+            {
+                "slug": "some/projectthatdoesntexist",
+                "gsoc_years": "",
+                "is_numfocus": False,
+            },
+            matches[4],
+        )
+
+    def test_write_matches(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_file = os.path.join(tmpdir, "repos.txt")
+            output_file = os.path.join(tmpdir, "matches.csv")
+            with open(input_file, mode="w") as f:
+                f.write("pandas-dev/pandas\nsome/projectthatdoesntexist\n")
+            write_matches(input_file, output_file)
+            with open(output_file) as f:
+                self.assertEqual(
+                    [
+                        "slug,gsoc_years,is_numfocus",
+                        "pandas-dev/pandas,,True",
+                        "some/projectthatdoesntexist,,False",
+                    ],
+                    f.read().splitlines(),
+                )
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from funderfinder.utils.crawler import Crawler
+
+from ..context import funderfinder
+
+
+class CrawledHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.starts.append((self.path, time.monotonic()))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            attempt = server.attempts[self.path] = server.attempts.get(self.path, 0) + 1
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.2)
+            if self.path == "/timeout":
+                time.sleep(1)
+            if self.path.startswith("/moved"):
+                self.send_response(301)
+                self.send_header("Location", self.path.replace("/moved", "/page", 1))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 503 if self.path == "/flaky" and attempt <= 2 else 200
+            body = self.path.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CrawledHandler)
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestCrawler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.servers = [start_server(), start_server()]
+        cls.urls = [f"http://127.0.0.1:{s.server_port}" for s in cls.servers]
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers:
+            server.shutdown()
+
+    def setUp(self):
+        for server in self.servers:
+            server.starts = []
+            server.attempts = {}
+            server.active = 0
+            server.max_active = 0
+
+    def test_hosts_are_crawled_in_parallel(self):
+        urls = [f"{url}/slow/{idx}" for idx in range(4) for url in self.urls]
+        with Crawler(max_per_host=2, delay=0) as crawler:
+            start = time.monotonic()
+            pages = [response.text for response in crawler.map(crawler.fetch, urls)]
+            elapsed = time.monotonic() - start
+        self.assertEqual([urlsplit(url).path for url in urls], pages)
+        # Each host gets two requests at a time, and both hosts are crawled at once
+        self.assertEqual([2, 2], [server.max_active for server in self.servers])
+        self.assertLess(elapsed, 0.7)
+
+    def test_requests_to_a_host_are_paced(self):
+        with Crawler(max_per_host=4, delay=0.1) as crawler:
+            futures = [crawler.submit(f"{self.urls[0]}/{idx}") for idx in range(4)]
+            for future in futures:
+                self.assertEqual(200, future.result().status_code)
+        starts = sorted(start for _, start in self.servers[0].starts)
+        # Requests reach the server with some jitter, so only check that they were spread out
+        self.assertGreaterEqual(starts[-1] - starts[0], 0.27)
+
+    def test_failed_requests_are_retried(self):
+        with Crawler(delay=0, backoff=0.01) as crawler:
+            self.assertEqual(200, crawler.fetch(f"{self.urls[0]}/flaky").status_code)
+        self.assertEqual(3, self.servers[0].attempts["/flaky"])
+        self.servers[0].attempts.clear()
+        with Crawler(delay=0, backoff=0.01, max_retries=1) as crawler:
+            self.assertEqual(503, crawler.fetch(f"{self.urls[0]}/flaky").status_code)
+        self.assertEqual(2, self.servers[0].attempts["/flaky"])
+
+    def test_requests_time_out(self):
+        with Crawler(delay=0, max_retries=0, timeout=0.1) as crawler:
+            with self.assertRaises(requests.exceptions.Timeout):
+                crawler.fetch(f"{self.urls[0]}/timeout")
+
+    def test_duplicate_requests_are_shared(self):
+        with Crawler(max_per_host=1, delay=0) as crawler:
+            first = crawler.submit(f"{self.urls[0]}/slow/a")
+            second = crawler.submit(f"{self.urls[0]}/slow/a")
+            self.assertIs(first, second)
+            first.result()
+            # Once answered, a request is made again
+            self.assertIsNot(first, crawler.submit(f"{self.urls[0]}/slow/a"))
+
+    def test_close_cancels_pending_requests(self):
+        crawler = Crawler(max_per_host=1, delay=0)
+        futures = [crawler.submit(f"{self.urls[0]}/slow/{idx}") for idx in range(3)]
+        time.sleep(0.05)
+        crawler.close()
+        self.assertEqual(200, futures[0].result().status_code)
+        self.assertTrue(futures[2].cancelled())
+        with self.assertRaises(RuntimeError):
+            crawler.submit(self.urls[0])
+
+    def test_pages_are_parsed_in_other_processes(self):
+        with Crawler(parse_workers=1) as crawler:
+            self.assertNotEqual(os.getpid(), crawler.parse(os.getpid))
+            with self.assertRaises(ZeroDivisionError):
+                crawler.parse(divmod, 1, 0)
+        with Crawler(parse_workers=0) as crawler:
+            self.assertEqual(os.getpid(), crawler.parse(os.getpid))
+
+    def test_parse_queue_is_bounded(self):
+        with Crawler(parse_workers=1, max_parse_queue=1) as crawler:
+            crawler.parse(os.getpid)
+            start = time.monotonic()
+            first = crawler.submit_parse(time.sleep, 0.2)
+            # Waits for the first job to finish before it is queued
+            crawler.submit_parse(time.sleep, 0)
+            self.assertTrue(first.done())
+            self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from funderfinder.sources._finder import Finder
+from funderfinder.sources.gsoc import GSOCFinder
+from funderfinder.sources.numfocus import NumFocusFinder
+from funderfinder.utils.datasets import (
+    CompiledDatasets,
+    compile_datasets,
+    get_dataset_path,
+    get_dataset_version,
+    get_file_digest,
+    get_index_builders,
+    get_version_path,
+    read_dataset,
+    read_version_stamp,
+    write_dataset,
+)
+
+from ..context import funderfinder
+
+
+def read_records(file_name: str) -> list:
+    with open(get_dataset_path(file_name)) as f:
+        return [json.loads(line.strip()) for line in f]
+
+
+def scan_gsoc(projects: list, slug: str) -> set:
+    # Reference implementation: linear scan over the dataset
+    years_matched = set()
+    for project_metadata in projects:
+        is_exact_match = slug in project_metadata["repos"]
+        is_owner_match = slug in [
+            Finder.get_owner_name(proj) for proj in project_metadata["repos"]
+        ]
+        if is_exact_match or (("/" not in slug) and is_owner_match):
+            years_matched.add(project_metadata["year"])
+    return years_matched
+
+
+def scan_numfocus(projects: list, search_params: dict) -> bool:
+    # Reference implementation: linear scan over the dataset
+    is_affiliated = False
+    for project_metadata in projects:
+        for key in search_params:
+            if not (project_metadata[key] and search_params[key]):
+                continue
+            is_affiliated |= project_metadata[key].lower() == search_params[key].lower()
+            if key == "github_name":
+                owner = search_params[key].split("/")[0].lower()
+                is_affiliated |= project_metadata[key].lower() == owner
+    return is_affiliated
+
+
+class TestDatasetIndexes(unittest.TestCase):
+    def test_index_is_loaded_once(self):
+        self.assertIs(GSOCFinder().get_index(), GSOCFinder().get_index())
+        self.assertIs(NumFocusFinder.get_index(), NumFocusFinder.get_index())
+        # Subclasses of a finder share its index
+        subclass = type("GSOCSubclass", (GSOCFinder,), {})
+        self.assertIs(GSOCFinder().get_index(), subclass().get_index())
+
+    def test_gsoc_index_matches_scan(self):
+        projects = read_records(GSOCFinder.DATA_FILE)
+        repos = sorted({repo for project in projects for repo in project["repos"]})
+        slugs = repos[::10] + [Finder.get_owner_name(repo) for repo in repos[::10]]
+        slugs += ["enigma-dev", "ENIGMA-DEV/enigma-dev", "some/projectthatdoesntexist"]
+        finder = GSOCFinder()
+        for slug in slugs:
+            stats = finder.get_funding_stats({"slug": slug})
+            years = scan_gsoc(projects, slug)
+            expected = (
+                None
+                if not years
+                else {
+                    "contributions": [
+                        {"date_contribution_made": f"{year}-05-01"}
+                        for year in sorted(years)
+                    ]
+                }
+            )
+            self.assertEqual(expected, stats, slug)
+
+    def test_numfocus_index_matches_scan(self):
+        projects = read_records(NumFocusFinder.DATA_FILE)
+        search_params = [{"name": None, "slug": None, "github_name": "NUMPY/numpy"}]
+        for project in projects:
+            for key in ["name", "slug", "github_name"]:
+                if project[key]:
+                    params = {"name": None, "slug": None, "github_name": None}
+                    params[key] = project[key].upper()
+                    search_params.append(params)
+                    params = dict(params)
+                    params[key] += "/something-else"
+                    search_params.append(params)
+        for params in search_params:
+            stats = NumFocusFinder.get_funding_stats(params)
+            expected = {"is_funded": True} if scan_numfocus(projects, params) else None
+            self.assertEqual(expected, stats, params)
+
+    def test_compiled_datasets_match_indexes(self):
+        index_builders = get_index_builders()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_file = os.path.join(tmpdir, "datasets.bin")
+            compile_datasets(index_builders, output_file)
+            compiled = CompiledDatasets(output_file)
+            for file_name, build_index in index_builders.items():
+                self.assertTrue(compiled.is_current(file_name))
+                index = build_index(read_dataset(get_dataset_path(file_name)))
+                compiled_index = compiled.indexes[file_name]
+                self.assertEqual(sorted(index), sorted(compiled_index))
+                for table_name, table in index.items():
+                    compiled_table = compiled_index[table_name]
+                    self.assertEqual(len(table), len(compiled_table))
+                    self.assertEqual(sorted(table), sorted(compiled_table))
+                    for key, value in table.items():
+                        self.assertIn(key, compiled_table)
+                        self.assertEqual(value, compiled_table[key])
+                        self.assertNotIn(key + "-not-present", compiled_table)
+                    self.assertIsNone(compiled_table.get("not-present"))
+            self.assertFalse(compiled.is_current("not-a-dataset.jsonl"))
+            compiled.buf.close()
+
+    def test_gsoc_years(self):
+        index = GSOCFinder.build_index(
+            [
+                {"repos": ["an-owner/a-repo", "another-owner"], "year": 2009},
+                {"repos": ["an-owner/another-repo"], "year": 2023},
+            ]
+        )
+        self.assertEqual(
+            [2009], GSOCFinder.get_years(index["repos"]["an-owner/a-repo"])
+        )
+        self.assertEqual(
+            [2009, 2023], GSOCFinder.get_years(index["owners"]["an-owner"])
+        )
+        self.assertEqual([2009], GSOCFinder.get_years(index["owners"]["another-owner"]))
+
+
+class TestDatasetPublication(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        patch = mock.patch("funderfinder.utils.datasets.DATA_DIR", self.dir.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.path = get_dataset_path("a_dataset.jsonl")
+
+    def test_write_dataset(self):
+        records = [{"name": "a project"}, {"name": "another project"}]
+        stamp = write_dataset(self.path, iter(records))
+        self.assertEqual(records, list(read_dataset(self.path)))
+        self.assertEqual(get_file_digest(self.path).hex(), stamp["sha256"])
+        self.assertEqual(os.path.getsize(self.path), stamp["size"])
+        self.assertEqual(2, stamp["records"])
+        self.assertEqual(stamp, read_version_stamp(self.path))
+        self.assertEqual(
+            ["a_dataset.jsonl", "a_dataset.jsonl.version"],
+            sorted(os.listdir(self.dir.name)),
+        )
+
+    def test_interrupted_write_keeps_old_dataset(self):
+        write_dataset(self.path, [{"name": "a project"}])
+
+        def get_records():
+            yield {"name": "another project"}
+            raise KeyboardInterrupt()
+
+        with self.assertRaises(KeyboardInterrupt):
+            write_dataset(self.path, get_records())
+        self.assertEqual([{"name": "a project"}], list(read_dataset(self.path)))
+        self.assertEqual(
+            ["a_dataset.jsonl", "a_dataset.jsonl.version"],
+            sorted(os.listdir(self.dir.name)),
+        )
+
+    def test_version_is_read_from_stamp(self):
+        stamp = write_dataset(self.path, [{"name": "a project"}])
+        with mock.patch("funderfinder.utils.datasets.get_file_digest") as digest:
+            self.assertEqual(stamp["sha256"], get_dataset_version("a_dataset.jsonl"))
+            digest.assert_not_called()
+
+    def test_stale_stamp_is_ignored(self):
+        write_dataset(self.path, [{"name": "a project"}])
+        with open(self.path, mode="a") as f:
+            f.write(json.dumps({"name": "a project added by hand"}) + "\n")
+        self.assertIsNone(read_version_stamp(self.path))
+        self.assertEqual(
+            get_file_digest(self.path).hex(), get_dataset_version("a_dataset.jsonl")
+        )
+        os.remove(get_version_path(self.path))
+        self.assertIsNone(read_version_stamp(self.path))
@@ -0,0 +1,375 @@
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from funderfinder.utils.github_signals import (
+    FUNDING_FILE_PATHS,
+    README_NAMES,
+    SignalsBatcher,
+    batching,
+    build_signals_query,
+    fetch_github_signals,
+    get_readme,
+    parse_signals,
+    readme_contains,
+)
+from funderfinder.utils.lookup_context import LookupContext
+
+from ..context import funderfinder
+
+
+class FakeResponse:
+    encoding = "utf-8"
+    url = "https://api.github.com"
+
+    def __init__(self, result=None, status_code=200, text=""):
+        self.result = result
+        self.status_code = status_code
+        self.text = text
+        self.bytes_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return self.result
+
+    def iter_content(self, chunk_size=1):
+        body = self.text.encode("utf-8")
+        for start in range(0, len(body), chunk_size):
+            self.bytes_read += len(body[start : start + chunk_size])
+            yield body[start : start + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeReadmeSession:
+    def __init__(self, readmes):
+        self.readmes = readmes
+        self.requests = []
+        self.responses = []
+
+    def get(self, url, headers=None, stream=False):
+        self.requests.append((url, headers))
+        repo = url.split("/repos/")[1].rsplit("/readme")[0]
+        if repo not in self.readmes:
+            self.responses.append(FakeResponse(status_code=404))
+        else:
+            self.responses.append(FakeResponse(text=self.readmes[repo]))
+        return self.responses[-1]
+
+
+class FakeGraphQLSession:
+    """
+    Answers batched signals queries: every repo has a README naming it, users and organizations have as many
+    sponsors as their login has characters, and only the owner "funded" has a FUNDING.yml, in its .github repo
+    """
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, headers=None):
+        with self.lock:
+            self.queries.append(json)
+        if self.fail:
+            raise ConnectionError("GitHub is down")
+        data = {}
+        for name, value in json["variables"].items():
+            if name.startswith("repoName"):
+                i = name[len("repoName") :]
+                owner = json["variables"][f"repoOwner{i}"]
+                data[f"repo{i}"] = {
+                    "defaultBranchRef": {"name": "main"},
+                    "readme0": {"text": f"{owner}/{value}"},
+                }
+            elif name.startswith("owner"):
+                i = name[len("owner") :]
+                data[f"org{i}"] = {"sponsors": {"totalCount": len(value)}}
+                data[f"ownerDefaults{i}"] = (
+                    {"funding0": {"text": "github: [funded]"}}
+                    if value == "funded"
+                    else None
+                )
+            elif name.startswith("user"):
+                data[name] = {"sponsors": {"totalCount": len(value)}}
+        return FakeResponse({"data": data})
+
+
+@mock.patch.dict(os.environ, {"GITHUB_TOKEN": "a-token"})
+class TestSignalsBatcher(unittest.TestCase):
+    def test_batches_and_deduplicates_lookups(self):
+        session = FakeGraphQLSession()
+        batcher = SignalsBatcher(session, max_wait=0.5)
+        lookups = [
+            ("funded/a", ["alice", "bob"]),
+            ("funded/b", ["Bob"]),
+            ("other/c", ["alice", "carol"]),
+            ("funded/a", []),
+        ]
+        with ThreadPoolExecutor(len(lookups)) as executor:
+            results = list(
+                executor.map(lambda lookup: batcher.get_signals(*lookup), lookups)
+            )
+        self.assertEqual(1, len(session.queries))
+        variables = session.queries[0]["variables"]
+        # Three distinct repos, two owners and three users, however many repos they are shared between
+        self.assertEqual(
+            [3, 2, 3],
+            [
+                len([name for name in variables if name.startswith(prefix)])
+                for prefix in ["repoName", "owner", "user"]
+            ],
+        )
+        self.assertEqual(
+            {"alice", "bob", "carol"},
+            {v for k, v in variables.items() if k.startswith("user")},
+        )
+        self.assertEqual(
+            {
+                "org_sponsors": 6,
+                "user_sponsors": {"alice": 5, "bob": 3},
+                "default_branch": "main",
+                "readme": "funded/a",
+                "funding_yml": "github: [funded]",
+            },
+            results[0],
+        )
+        self.assertEqual({"Bob": 3}, results[1]["user_sponsors"])
+        self.assertEqual(5, results[2]["org_sponsors"])
+        self.assertIsNone(results[2]["funding_yml"])
+        self.assertEqual(results[0]["readme"], results[3]["readme"])
+
+        # Owners and users that were already retrieved aren't requested again
+        batcher.get_signals("other/d", ["carol"])
+        self.assertEqual(2, len(session.queries))
+        self.assertEqual(
+            {"repoOwner0": "other", "repoName0": "d"}, session.queries[1]["variables"]
+        )
+
+    def test_splits_large_batches(self):
+        session = FakeGraphQLSession()
+        batcher = SignalsBatcher(session, max_wait=0.5, max_repos=2)
+        repos = [f"owner{i}/repo" for i in range(5)]
+        with ThreadPoolExecutor(len(repos)) as executor:
+            results = list(executor.map(batcher.get_signals, repos))
+        self.assertEqual(repos, [result["readme"] for result in results])
+        self.assertEqual(3, len(session.queries))
+
+    def test_failed_lookups_are_retried(self):
+        session = FakeGraphQLSession(fail=True)
+        batcher = SignalsBatcher(session, max_wait=0)
+        with self.assertRaises(ConnectionError):
+            batcher.get_signals("funded/a", ["alice"])
+        session.fail = False
+        self.assertEqual(
+            {"alice": 5}, batcher.get_signals("funded/a", ["alice"])["user_sponsors"]
+        )
+        self.assertEqual(2, len(session.queries))
+
+    def test_batching_routes_fetch_github_signals(self):
+        session = FakeGraphQLSession()
+        with batching(session, max_wait=0):
+            signals = fetch_github_signals("funded/a", ["alice"])
+        self.assertEqual("funded/a", signals["readme"])
+        self.assertEqual(1, len(session.queries))
+        self.assertIn("repoOwner0", session.queries[0]["variables"])
+
+
+class FakeSignalsSession:
+    """
+    Answers single-repo signals queries for repos of an organization with 7 sponsors
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def post(self, url, json=None, headers=None):
+        self.queries.append(json["query"])
+        data = {"repository": {"readme0": {"text": json["variables"]["repo"]}}}
+        if "organization(" in json["query"]:
+            data["organization"] = {"sponsors": {"totalCount": 7}}
+            data["ownerDefaults"] = {"funding0": {"text": "github: [an-org]"}}
+        return FakeResponse({"data": data})
+
+
+class TestGithubSignals(unittest.TestCase):
+    @mock.patch.dict(os.environ, {"GITHUB_TOKEN": "a-token"})
+    def test_owner_signals_are_retrieved_once_per_run(self):
+        session = FakeSignalsSession()
+        run_context = LookupContext()
+        for repo in ["an-org/a-repo", "An-Org/another-repo"]:
+            signals = fetch_github_signals(
+                repo, session=session, context=LookupContext(run_context)
+            )
+            self.assertEqual(7, signals["org_sponsors"])
+            self.assertEqual("github: [an-org]", signals["funding_yml"])
+            self.assertEqual(repo.split("/")[1], signals["readme"])
+        self.assertIn("organization(", session.queries[0])
+        self.assertNotIn("organization(", session.queries[1])
+        # Without a shared context, every lookup retrieves the owner's signals
+        fetch_github_signals("an-org/a-repo", session=session)
+        self.assertIn("organization(", session.queries[2])
+
+    @mock.patch.dict(os.environ, {"GITHUB_TOKEN": "a-token"})
+    def test_concurrent_lookups_retrieve_owner_signals_once(self):
+        session = FakeSignalsSession()
+        post = session.post
+
+        def slow_post(*args, **kwargs):
+            time.sleep(0.05)
+            return post(*args, **kwargs)
+
+        session.post = slow_post
+        run_context = LookupContext()
+        repos = [f"an-org/repo{i}" for i in range(6)]
+        with ThreadPoolExecutor(len(repos)) as executor:
+            results = list(
+                executor.map(
+                    lambda repo: fetch_github_signals(
+                        repo, session=session, context=LookupContext(run_context)
+                    ),
+                    repos,
+                )
+            )
+        self.assertTrue(all(signals["org_sponsors"] == 7 for signals in results))
+        self.assertEqual(1, sum("organization(" in query for query in session.queries))
+
+    @mock.patch.dict(os.environ, {"GITHUB_TOKEN": "a-token"})
+    def test_get_readme(self):
+        session = FakeReadmeSession({"an-owner/a-repo": "Funded by Tidelift"})
+        self.assertEqual("Funded by Tidelift", get_readme("an-owner/a-repo", session))
+        self.assertIsNone(get_readme("an-owner/no-readme", session))
+        url, headers = session.requests[0]
+        self.assertEqual("https://api.github.com/repos/an-owner/a-repo/readme", url)
+        self.assertEqual("application/vnd.github.raw", headers["Accept"])
+
+    @mock.patch.dict(os.environ, {"GITHUB_TOKEN": "a-token"})
+    def test_readme_contains(self):
+        padding = "Lorem ipsum dolor sit amet. " * 10000
+        session = FakeReadmeSession(
+            {
+                "an-owner/top-badge": f"[![Tidelift](badge.svg)]\n{padding}",
+                "an-owner/no-badge": padding,
+            }
+        )
+        self.assertTrue(readme_contains("an-owner/top-badge", "tidelift", session))
+        # The search stops at the badge, without downloading the rest of the README
+        self.assertLess(session.responses[0].bytes_read, len(padding))
+        self.assertFalse(readme_contains("an-owner/no-badge", "tidelift", session))
+        self.assertFalse(readme_contains("an-owner/no-readme", "tidelift", session))
+        # Matches spanning chunks are found, and the search stops at `max_bytes`
+        session = FakeReadmeSession({"an-owner/a-repo": padding + "TideLift"})
+        self.assertTrue(readme_contains("an-owner/a-repo", "tidelift", session))
+        self.assertFalse(
+            readme_contains("an-owner/a-repo", "tidelift", session, max_bytes=1000)
+        )
+
+    def test_build_signals_query(self):
+        query = build_signals_query("an-owner", "a-repo", ["a-user", "another-user"])
+        self.assertEqual(
+            {
+                "owner": "an-owner",
+                "repo": "a-repo",
+                "user0": "a-user",
+                "user1": "another-user",
+            },
+            query["variables"],
+        )
+        for alias in ["user0: user(login: $user0)", "user1: user(login: $user1)"]:
+            self.assertIn(alias, query["query"])
+        self.assertNotIn("user2", query["query"])
+        self.assertIn(
+            f'readme{len(README_NAMES) - 1}: object(expression: "HEAD:', query["query"]
+        )
+        self.assertIn(
+            f'funding{len(FUNDING_FILE_PATHS) - 1}: object(expression: "HEAD:',
+            query["query"],
+        )
+
+    def test_parse_signals_user_owner(self):
+        # GitHub returns null data and an error for the organization when the owner is a user
+        result = {
+            "data": {
+                "organization": None,
+                "repository": {
+                    "defaultBranchRef": {"name": "develop"},
+                    "readme0": None,
+                    "readme1": None,
+                    "readme2": {"text": "Supported by Tidelift"},
+                    "funding0": None,
+                    "funding1": None,
+                    "funding2": None,
+                },
+                "ownerDefaults": {
+                    "funding0": {"text": "github: [a-user]"},
+                    "funding1": None,
+                    "funding2": None,
+                },
+                "user0": {"sponsors": {"totalCount": 3}},
+                "user1": None,
+            },
+            "errors": [{"type": "NOT_FOUND", "path": ["organization"]}],
+        }
+        self.assertEqual(
+            {
+                "org_sponsors": 0,
+                "user_sponsors": {"a-user": 3, "a-missing-user": 0},
+                "default_branch": "develop",
+                "readme": "Supported by Tidelift",
+                "funding_yml": "github: [a-user]",
+            },
+            parse_signals(result, ["a-user", "a-missing-user"]),
+        )
+
+    def test_parse_signals_missing_repo(self):
+        result = {
+            "data": {
+                "organization": {"sponsors": {"totalCount": 5}},
+                "repository": None,
+                "ownerDefaults": None,
+            }
+        }
+        self.assertEqual(
+            {
+                "org_sponsors": 5,
+                "user_sponsors": {},
+                "default_branch": None,
+                "readme": None,
+                "funding_yml": None,
+            },
+            parse_signals(result, []),
+        )
+
+    @mock.patch.dict(os.environ, {"GITHUB_TOKEN": "a-token"})
+    def test_failed_query_is_not_reported_as_unfunded(self):
+        result = {"data": None, "errors": [{"type": "RATE_LIMITED"}]}
+        with self.assertRaises(ValueError):
+            parse_signals(result, [])
+        session = mock.Mock()
+        session.post.return_value = FakeResponse(result)
+        context = LookupContext()
+        with self.assertRaises(ValueError):
+            fetch_github_signals("an-org/a-repo", session=session, context=context)
+        # The failure isn't memoized as the owner's signals
+        self.assertIsNone(context.get_owner_value("an-org", "github_signals"))
+
+    def test_fetch_github_signals_babel(self):
+        # This test may fail in the future if Babel stops using GitHub sponsors or moves its FUNDING.yml
+        signals = fetch_github_signals("babel/babel")
+        self.assertTrue(signals["org_sponsors"] > 0)
+        self.assertEqual("main", signals["default_branch"])
+        self.assertIsNotNone(signals["readme"])
+        self.assertIsNotNone(signals["funding_yml"])
@@ -1,11 +1,128 @@
 import unittest
 
-from funderfinder.utils.github_sources import get_funding_sources
+from funderfinder.utils.github_sources import (
+    get_funding_sources,
+    parse_funding_sources,
+    parse_page_funding_sources,
+    parse_sidebar_hrefs,
+    scan_funding_sources,
+)
 
 from ..context import funderfinder
 
+SPONSOR_SECTION = (
+    '<div class="BorderGrid-cell"><a href="https://before.example.com">Before</a>'
+    '<h2 class="h4 mb-3">Sponsor this project</h2><ul><li><a href="/sponsors">'
+    '<img src="avatar.png"><br/>Sponsor</a></li><li><a href="https://opencollective.com/x?a=1&amp;b=2">'
+    "Open Collective</a></li><li><a>No href</a></li></ul></div>"
+)
+
+
+def build_page(main: str, sidebar: str) -> str:
+    return (
+        f'<html><body><div class="Layout"><div class="Layout-main">{main}</div>'
+        f'<div class="Layout-sidebar">{sidebar}</div></div>'
+        f'<footer><a href="https://after.example.com">After</a></footer></body></html>'
+    )
+
 
 class TestGithubSources(unittest.TestCase):
+    def assert_same_sources(self, html: str, expected_sources: list) -> None:
+        self.assertEqual(expected_sources, parse_page_funding_sources("x/x", html))
+        self.assertEqual(expected_sources, parse_funding_sources("x/x", html))
+
+    def test_parse_sidebar(self):
+        html = build_page("<p>Readme</p>", f"<div>{SPONSOR_SECTION}</div>")
+        self.assertEqual(
+            [
+                "https://before.example.com",
+                "/sponsors",
+                "https://opencollective.com/x?a=1&b=2",
+            ],
+            parse_sidebar_hrefs(html),
+        )
+        self.assert_same_sources(
+            html,
+            [
+                "https://before.example.com",
+                "https://github.com/sponsors/x",
+                "https://opencollective.com/x?a=1&b=2",
+            ],
+        )
+
+    def test_parse_sidebar_falls_back(self):
+        # The heading is outside the sidebar
+        html = build_page(SPONSOR_SECTION, "<p>About</p>")
+        self.assertIsNone(parse_sidebar_hrefs(html))
+        self.assert_same_sources(
+            html,
+            [
+                "https://before.example.com",
+                "https://github.com/sponsors/x",
+                "https://opencollective.com/x?a=1&b=2",
+            ],
+        )
+        # The heading's section closes an element opened before the sidebar
+        html = build_page(
+            "<p>Readme</p>", SPONSOR_SECTION.replace("</ul>", "</ul></p>")
+        )
+        self.assertIsNone(parse_sidebar_hrefs(html))
+        self.assert_same_sources(html, parse_page_funding_sources("x/x", html))
+        # The heading's parent is the sidebar, so its section contains the main column
+        html = build_page(
+            '<a href="https://main.example.com">x</a>',
+            'Sponsor this project<a href="https://example.com">x</a>',
+        )
+        self.assertIsNone(parse_sidebar_hrefs(html))
+        self.assert_same_sources(
+            html, ["https://main.example.com", "https://example.com"]
+        )
+        # The heading appears twice
+        html = build_page(
+            "<p>Sponsor this project</p>", f"<div>{SPONSOR_SECTION}</div>"
+        )
+        self.assert_same_sources(html, [])
+        # There is no heading
+        self.assert_same_sources(build_page("<p>Readme</p>", "<p>About</p>"), [])
+
+    def test_scan_funding_sources(self):
+        def iter_chunks(html, size=50):
+            for start in range(0, len(html), size):
+                read.append(start)
+                yield html[start : start + size]
+
+        footer = "<p>Footer</p>" * 1000
+        html = build_page("<p>Readme</p>", f"<div>{SPONSOR_SECTION}</div>") + footer
+        read = []
+        self.assertEqual(
+            parse_page_funding_sources("x/x", html),
+            scan_funding_sources("x/x", iter_chunks(html)),
+        )
+        # Reading stops at the end of the sponsor section
+        self.assertLess(len(read) * 50, len(html) - len(footer))
+        html = build_page("<p>Readme</p>", "<p>About</p>") + footer
+        read = []
+        self.assertEqual([], scan_funding_sources("x/x", iter_chunks(html)))
+        self.assertLess(len(read) * 50, len(html) - len(footer))
+        # Sponsor sections outside the sidebar are found by reading the whole page
+        html = build_page(SPONSOR_SECTION, "<p>About</p>") + footer
+        read = []
+        self.assertEqual(
+            parse_page_funding_sources("x/x", html),
+            scan_funding_sources("x/x", iter_chunks(html)),
+        )
+        self.assertEqual(len(range(0, len(html), 50)), len(read))
+
+    def test_scan_funding_sources_chunk_boundaries(self):
+        # Markers split across chunks of any size are found
+        for sidebar in [f"<div>{SPONSOR_SECTION}</div>", "<p>About</p>"]:
+            for readme in ["<p>Readme</p>", SPONSOR_SECTION]:
+                html = build_page(readme, sidebar)
+                expected = parse_page_funding_sources("x/x", html)
+                for size in [1, 3, 7, 20, 64]:
+                    chunks = [html[i : i + size] for i in range(0, len(html), size)]
+                    self.assertEqual(expected, scan_funding_sources("x/x", chunks))
+
     def test_get_funding_sources_babel(self):
         expected_sources = [
             "https://opencollective.com/babel",
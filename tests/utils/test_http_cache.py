@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from funderfinder.utils.http_cache import HTTPCache, get_cache_key, redact_url
+from funderfinder.utils.transport import PooledSession, iter_text
+
+from ..context import funderfinder
+
+
+class CachingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+
+    def send_body(self, body, headers=()):
+        self.send_response(200)
+        for header in headers:
+            self.send_header(*header)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append(
+            ("GET", self.path, self.headers.get("If-None-Match"))
+        )
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(b"a page", [("ETag", self.etag)])
+
+    def do_POST(self):
+        query = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(("POST", self.path, query))
+        if b"fail" in query:
+            self.send_body(json.dumps({"errors": ["rate limited"]}).encode("utf-8"))
+        else:
+            self.send_body(
+                json.dumps({"data": {"query": query.decode("utf-8")}}).encode("utf-8")
+            )
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CachingHandler)
+        cls.server.requests = []
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = HTTPCache(os.path.join(self.tmp_dir.name, "http.sqlite"))
+        self.session = PooledSession(cache=self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_get_key(self):
+        self.assertEqual(
+            get_cache_key("get", "https://github.com/a/b", None),
+            get_cache_key("GET", "https://github.com/a/b", b""),
+        )
+        self.assertNotEqual(
+            get_cache_key("POST", "https://api.github.com/graphql", '{"query": 1}'),
+            get_cache_key("POST", "https://api.github.com/graphql", '{"query": 2}'),
+        )
+        self.assertNotEqual(
+            get_cache_key("GET", "https://api.github.com/a", None, "bearer one"),
+            get_cache_key("GET", "https://api.github.com/a", None, "bearer two"),
+        )
+
+    def test_fresh_responses_are_reused(self):
+        first = self.session.get(f"{self.url}/a-repo")
+        second = self.session.get(f"{self.url}/a-repo")
+        self.assertEqual("a page", first.text)
+        self.assertEqual("a page", second.text)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(1, len(self.server.requests))
+        self.session.get(f"{self.url}/another-repo")
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_stale_responses_are_revalidated(self):
+        self.session.get(f"{self.url}/a-repo")
+        with mock.patch("funderfinder.utils.transport.get_ttl", return_value=0):
+            response = self.session.get(f"{self.url}/a-repo")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("a page", response.text)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(
+            [("GET", "/a-repo", None), ("GET", "/a-repo", '"v1"')],
+            self.server.requests,
+        )
+        # Revalidation makes the response fresh again
+        self.session.get(f"{self.url}/a-repo")
+        self.assertEqual(2, len(self.server.requests))
+
+    def test_streamed_requests_are_cached(self):
+        key = get_cache_key("GET", f"{self.url}/a-repo", None)
+        with self.session.get(f"{self.url}/a-repo", stream=True) as response:
+            self.assertEqual("a", "".join(iter_text(response, 1, chunk_size=1)))
+        # Only part of the body was downloaded, so there is nothing to store
+        self.assertIsNone(self.cache.get(key))
+        with self.session.get(f"{self.url}/a-repo", stream=True) as response:
+            self.assertEqual("a page", "".join(iter_text(response, 100)))
+        self.assertEqual(b"a page", self.cache.get(key).body)
+        with self.session.get(f"{self.url}/a-repo", stream=True) as response:
+            self.assertTrue(response.from_cache)
+            self.assertEqual("a page", "".join(iter_text(response, 100)))
+        self.assertEqual(2, len(self.server.requests))
+        # and revalidated once stale
+        with mock.patch("funderfinder.utils.transport.get_ttl", return_value=0):
+            with self.session.get(f"{self.url}/a-repo", stream=True) as response:
+                self.assertTrue(response.from_cache)
+                self.assertEqual("a page", "".join(iter_text(response, 100)))
+        self.assertEqual(("GET", "/a-repo", '"v1"'), self.server.requests[-1])
+
+    def test_graphql_posts_are_cached_by_body(self):
+        for query in ["one", "two", "one"]:
+            response = self.session.post(f"{self.url}/graphql", data=query)
+            self.assertEqual(query, response.json()["data"]["query"])
+        self.assertEqual(2, len(self.server.requests))
+        for _ in range(2):
+            self.session.post(f"{self.url}/graphql", data="fail")
+        self.assertEqual(4, len(self.server.requests))
+        self.session.post(f"{self.url}/not-graphql", data="one")
+        self.session.post(f"{self.url}/not-graphql", data="one")
+        self.assertEqual(6, len(self.server.requests))
+
+    def test_responses_are_not_shared_across_tokens(self):
+        self.session.get(f"{self.url}/a-repo", headers={"Authorization": "bearer one"})
+        response = self.session.get(
+            f"{self.url}/a-repo", headers={"Authorization": "bearer two"}
+        )
+        self.assertFalse(getattr(response, "from_cache", False))
+        self.assertEqual(2, len(self.server.requests))
+        with open(self.cache.path, "rb") as f:
+            self.assertNotIn(b"bearer one", f.read())
+
+    def test_cache_persists(self):
+        self.session.get(f"{self.url}/a-repo")
+        other = HTTPCache(self.cache.path)
+        self.assertEqual(
+            b"a page",
+            other.get(get_cache_key("GET", f"{self.url}/a-repo", None)).body,
+        )
+        other.close()
+
+    def test_api_keys_are_not_stored(self):
+        self.assertEqual(
+            "https://api.opencollective.com/graphql/v2/REDACTED",
+            redact_url("https://api.opencollective.com/graphql/v2/a-secret-key"),
+        )
+        self.assertEqual(
+            "https://example.com/a?page=2&access_token=REDACTED",
+            redact_url("https://example.com/a?page=2&access_token=a-secret-key"),
+        )
+        url = "https://api.opencollective.com/graphql/v2/a-secret-key"
+        self.cache.set(get_cache_key("POST", url, b"{}"), url, 200, {}, b"{}")
+        for path in [self.cache.path, self.cache.path + "-wal"]:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    self.assertNotIn(b"a-secret-key", f.read())
+        self.assertIsNotNone(self.cache.get(get_cache_key("POST", url, b"{}")))
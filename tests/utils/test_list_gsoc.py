@@ -1,13 +1,22 @@
+import json
+import os
+import tempfile
 import unittest
+from datetime import datetime
+from unittest import mock
 
 import bs4
 
 from funderfinder.utils.list_gsoc import (
+    Checkpoint,
+    get_complete_years,
     get_curr_year_project,
     get_curr_year_projects,
     get_early_archive_project,
     get_link_matches,
     get_modern_archive_projects,
+    get_projects,
+    parse_early_archive_org_page,
 )
 
 from ..context import funderfinder
@@ -104,8 +113,25 @@ class TestListGSOC(unittest.TestCase):
             get_early_archive_project(soup, 2015),
         )
 
+    def test_parse_early_archive_org_page(self):
+        page = """
+        <p>Our code is at https://github.com/an-org</p>
+        <span class="mdl-list__item-primary-content">
+        <a href="/archive/gsoc/2015/orgs/an-org/projects/student.html">A student project</a>
+        </span>
+        <a href="/archive/gsoc/2015/orgs/an-org/logo.png">Logo</a>
+        """
+        repos, student_project_links = parse_early_archive_org_page(page)
+        self.assertEqual(["an-org"], repos)
+        self.assertEqual(
+            [
+                "https://www.google-melange.com/archive/gsoc/2015/orgs/an-org/projects/student.html"
+            ],
+            student_project_links,
+        )
+
     def test_get_modern_archive_projects_has_expected_size(self):
-        projects = get_modern_archive_projects(2016)
+        projects = list(get_modern_archive_projects(2016))
         self.assertEqual(178, len(projects))
 
     def test_get_curr_year_project(self):
@@ -121,3 +147,116 @@ class TestListGSOC(unittest.TestCase):
 
     def test_get_curr_year_projects_empty(self):
         self.assertEqual([], [p for p in get_curr_year_projects(3000)])
+
+
+def build_project(year: int, archived: bool = True) -> dict:
+    if year < 2016:
+        link = f"https://www.google-melange.com/archive/gsoc/{year}/orgs/org"
+    elif archived:
+        link = f"https://summerofcode.withgoogle.com/api/archive/programs/{year}/organizations/org/"
+    else:
+        link = "https://summerofcode.withgoogle.com/api/organization/org/"
+    return {"name": f"Org {year}", "link": link, "repos": [], "year": year}
+
+
+class TestIncrementalRefresh(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.output_file = os.path.join(self.dir.name, "gsoc.jsonl")
+        self.checkpoint_file = self.output_file + ".checkpoint"
+        self.curr_year = datetime.now().year
+        self.crawled = []
+        patches = [
+            mock.patch(
+                "funderfinder.utils.list_gsoc.get_early_archive_year_links",
+                side_effect=lambda crawler: {
+                    year: f"https://www.google-melange.com/archive/gsoc/{year}"
+                    for year in range(2015, 2008, -1)
+                },
+            ),
+            mock.patch(
+                "funderfinder.utils.list_gsoc.get_early_archive_year_projects",
+                side_effect=lambda link, crawler: self.crawl(int(link[-4:])),
+            ),
+            mock.patch(
+                "funderfinder.utils.list_gsoc.get_modern_year_projects",
+                side_effect=lambda year, crawler: self.crawl(year),
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def crawl(self, year: int) -> list:
+        self.crawled.append(year)
+        return [build_project(year, year < self.curr_year)]
+
+    def write_output(self, projects: list) -> None:
+        with open(self.output_file, mode="w") as f:
+            for project in projects:
+                f.write(json.dumps(project) + "\n")
+
+    def read_years(self) -> list:
+        with open(self.output_file) as f:
+            return [json.loads(line)["year"] for line in f]
+
+    def test_get_complete_years(self):
+        projects = [
+            build_project(2015),
+            build_project(2016),
+            build_project(2023, False),
+        ]
+        self.assertEqual({2015, 2016}, get_complete_years(projects))
+
+    def test_full_refresh(self):
+        self.write_output([build_project(2015)])
+        get_projects(self.output_file, crawler=mock.Mock(map=map))
+        self.assertEqual(list(range(2009, self.curr_year + 1)), sorted(self.crawled))
+        self.assertEqual(
+            list(range(2015, 2008, -1)) + list(range(2016, self.curr_year + 1)),
+            self.read_years(),
+        )
+        self.assertFalse(os.path.exists(self.checkpoint_file))
+
+    def test_incremental_refresh_skips_complete_years(self):
+        existing = [build_project(year) for year in range(2015, 2008, -1)]
+        existing += [build_project(year) for year in range(2016, 2020)]
+        existing.append(build_project(2020, False))
+        self.write_output(existing)
+        get_projects(self.output_file, crawler=mock.Mock(map=map), incremental=True)
+        self.assertEqual(list(range(2020, self.curr_year + 1)), sorted(self.crawled))
+        self.assertEqual(
+            list(range(2015, 2008, -1)) + list(range(2016, self.curr_year + 1)),
+            self.read_years(),
+        )
+
+    def test_resumes_from_checkpoint(self):
+        checkpoint = Checkpoint(self.checkpoint_file)
+        checkpoint.add(2009, [build_project(2009)])
+        checkpoint.add(2016, [build_project(2016)])
+        get_projects(self.output_file, crawler=mock.Mock(map=map))
+        self.assertNotIn(2009, self.crawled)
+        self.assertNotIn(2016, self.crawled)
+        self.assertEqual(self.curr_year - 2009 - 1, len(self.crawled))
+        self.assertEqual(
+            list(range(2015, 2008, -1)) + list(range(2016, self.curr_year + 1)),
+            self.read_years(),
+        )
+        self.assertEqual(
+            ["gsoc.jsonl", "gsoc.jsonl.version"], sorted(os.listdir(self.dir.name))
+        )
+
+    def test_interrupted_year_is_not_checkpointed(self):
+        def crawl():
+            yield build_project(2016)
+            raise RuntimeError("Interrupted")
+
+        checkpoint = Checkpoint(self.checkpoint_file)
+        checkpoint.add(2009, [build_project(2009)])
+        with self.assertRaises(RuntimeError):
+            checkpoint.add(2016, crawl())
+        checkpoint = Checkpoint(self.checkpoint_file)
+        self.assertEqual({2009}, checkpoint.years)
+        self.assertEqual([build_project(2009)], list(checkpoint.read(2009)))
+        self.assertFalse(os.path.exists(checkpoint.get_year_file(2016)))
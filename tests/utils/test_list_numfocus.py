@@ -2,7 +2,11 @@ import json
 import os
 import unittest
 
-from funderfinder.utils.list_numfocus import get_github_link, get_numfocus_slug
+from funderfinder.utils.list_numfocus import (
+    get_github_link,
+    get_numfocus_slug,
+    parse_sponsored_project_page,
+)
 
 from ..context import funderfinder
 
@@ -33,6 +37,20 @@ class TestListNumfocus(unittest.TestCase):
         )
         self.assertEqual(link, "an-owner/a-project")
 
+    def test_parse_sponsored_project_page(self):
+        self.assertEqual(
+            ("an-owner/a-project", None),
+            parse_sponsored_project_page(
+                "A project", '<a href="https://github.com/an-owner/a-project">Code</a>'
+            ),
+        )
+        self.assertEqual(
+            (None, "https://a-project.org"),
+            parse_sponsored_project_page(
+                "A project", '<a href="https://a-project.org">Website</a>'
+            ),
+        )
+
     def test_gensim_affiliated(self):
         # The goal of this test is to fail if something goes very wrong with list_numfocus and a large, stable
         # affiliated project disappears
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from funderfinder.utils.lookup_context import LookupContext
+
+from ..context import funderfinder
+
+
+class TestLookupContext(unittest.TestCase):
+    def test_get_computes_once(self):
+        context = LookupContext()
+        calls = []
+        lock = threading.Lock()
+
+        def compute():
+            time.sleep(0.1)
+            with lock:
+                calls.append(1)
+            return ["https://github.com/sponsors/an-owner"]
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(lambda _: context.get("links", compute), range(8))
+            )
+        self.assertEqual(1, len(calls))
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual("other", context.get("other-key", lambda: "other"))
+
+    def test_get_retries_failures(self):
+        context = LookupContext()
+
+        def fail():
+            raise ValueError("not found")
+
+        with self.assertRaises(ValueError):
+            context.get("links", fail)
+        self.assertEqual([], context.get("links", lambda: []))
+
+    def test_owner_values_are_shared_by_run(self):
+        run_context = LookupContext()
+        context = LookupContext(run_context)
+        self.assertIsNone(context.get_owner_value("apache", "signals"))
+        context.set_owner_value("apache", "signals", {"org_sponsors": 3})
+        self.assertEqual(
+            {"org_sponsors": 3},
+            LookupContext(run_context).get_owner_value("Apache", "signals"),
+        )
+        self.assertIsNone(LookupContext().get_owner_value("apache", "signals"))
+        # Project-scoped values aren't shared
+        context.get("links", lambda: [])
+        self.assertNotIn("links", LookupContext(run_context).values)
+
+    def test_concurrent_owner_lookups_retrieve_once(self):
+        run_context = LookupContext()
+        retrievals = []
+        lock = threading.Lock()
+
+        def lookup(idx):
+            context = LookupContext(run_context)
+            value = context.claim_owner_value("apache", "signals")
+            if value is not None:
+                return value
+            with lock:
+                retrievals.append(idx)
+            time.sleep(0.1)
+            if len(retrievals) == 1:
+                # The first retrieval fails, so one of the waiting lookups takes over
+                context.release_owner_value("apache", "signals")
+                return None
+            context.set_owner_value("apache", "signals", {"org_sponsors": 3})
+            return {"org_sponsors": 3}
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lookup, range(8)))
+        self.assertEqual(2, len(retrievals))
+        self.assertEqual(7, results.count({"org_sponsors": 3}))
+
+    def test_aclaim_owner_value(self):
+        run_context = LookupContext()
+
+        async def lookup(retrieve):
+            context = LookupContext(run_context)
+            value = await context.aclaim_owner_value("apache", "signals")
+            if value is None:
+                retrieve.append(1)
+                await asyncio.sleep(0.05)
+                context.set_owner_value("apache", "signals", 3)
+                value = 3
+            return value
+
+        async def run():
+            retrieve = []
+            results = await asyncio.gather(*[lookup(retrieve) for _ in range(4)])
+            return retrieve, results
+
+        retrieve, results = asyncio.run(run())
+        self.assertEqual([1], retrieve)
+        self.assertEqual([3] * 4, results)
+
+    def test_aget_computes_once(self):
+        context = LookupContext()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return ["https://github.com/sponsors/an-owner"]
+
+        async def lookup():
+            # The first finder times out, but the others still get the shared result
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(context.aget("links", compute), 0.01)
+            return await asyncio.gather(
+                *[context.aget("links", compute) for _ in range(3)]
+            )
+
+        results = asyncio.run(lookup())
+        self.assertEqual(1, len(calls))
+        self.assertEqual([["https://github.com/sponsors/an-owner"]] * 3, results)
+        self.assertEqual(
+            results[0], context.get("links", lambda: self.fail("recomputed"))
+        )
+
+    def test_aget_retries_failures(self):
+        context = LookupContext()
+
+        async def fail():
+            raise ValueError("not found")
+
+        async def succeed():
+            return []
+
+        async def lookup():
+            with self.assertRaises(ValueError):
+                await context.aget("links", fail)
+            return await context.aget("links", succeed)
+
+        self.assertEqual([], asyncio.run(lookup()))
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import requests
+
+from funderfinder.utils.crawler import create_crawler
+from funderfinder.utils.page_archive import ArchiveSession, PageArchive, PageNotArchived
+
+from ..context import funderfinder
+from .test_crawler import start_server
+
+
+class TestPageArchive(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.archive_file = os.path.join(self.dir.name, "pages.sqlite")
+        self.server = start_server()
+        self.server.starts = []
+        self.server.attempts = {}
+        self.server.active = 0
+        self.server.max_active = 0
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def test_crawled_pages_are_archived(self):
+        with create_crawler(self.archive_file) as crawler:
+            self.assertEqual("/page", crawler.fetch(f"{self.url}/page").text)
+        archive = PageArchive(self.archive_file)
+        self.addCleanup(archive.close)
+        archived = archive.get(f"{self.url}/page")
+        self.assertEqual(200, archived.status)
+        self.assertEqual(b"/page", archived.body)
+        self.assertNotIn("Content-Length", archived.headers)
+        self.assertIsNone(archive.get(f"{self.url}/other"))
+
+    def test_get_returns_latest_copy(self):
+        archive = PageArchive(self.archive_file)
+        self.addCleanup(archive.close)
+        for body in (b"old", b"new"):
+            response = requests.Response()
+            response.status_code = 200
+            response._content = body
+            response.request = requests.Request("GET", f"{self.url}/page").prepare()
+            archive.add(response)
+        self.assertEqual(b"new", archive.get(f"{self.url}/page").body)
+
+    def test_reextract_runs_offline(self):
+        with create_crawler(self.archive_file) as crawler:
+            crawler.fetch(f"{self.url}/page")
+            crawler.fetch(f"{self.url}/page", params={"v": "2"})
+        self.server.attempts = {}
+        with create_crawler(self.archive_file, reextract=True) as crawler:
+            self.assertEqual("/page", crawler.fetch(f"{self.url}/page").text)
+            self.assertEqual(
+                "/page?v=2", crawler.fetch(f"{self.url}/page", params={"v": "2"}).text
+            )
+            with self.assertRaises(PageNotArchived):
+                crawler.fetch(f"{self.url}/missing")
+        self.assertEqual({}, self.server.attempts)
+
+    def test_redirected_pages_are_reextracted(self):
+        with create_crawler(self.archive_file) as crawler:
+            self.assertEqual("/page?v=3", crawler.fetch(f"{self.url}/moved?v=3").text)
+        self.server.attempts = {}
+        with create_crawler(self.archive_file, reextract=True) as crawler:
+            self.assertEqual("/page?v=3", crawler.fetch(f"{self.url}/moved?v=3").text)
+            self.assertEqual("/page?v=3", crawler.fetch(f"{self.url}/page?v=3").text)
+        self.assertEqual({}, self.server.attempts)
+
+    def test_archive_session_raises_request_exception(self):
+        session = ArchiveSession(PageArchive(self.archive_file))
+        self.addCleanup(session.close)
+        with self.assertRaises(requests.exceptions.RequestException):
+            session.get(f"{self.url}/missing")
+
+    def test_reextract_requires_archive(self):
+        with self.assertRaises(ValueError):
+            create_crawler(reextract=True)
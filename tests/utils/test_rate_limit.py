@@ -0,0 +1,137 @@
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+
+from funderfinder.utils.rate_limit import RateLimiter, get_family, is_rate_limited
+from funderfinder.utils.transport import PooledSession
+
+from ..context import funderfinder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CannedAdapter(BaseAdapter):
+    """
+    Answers requests with a fixed sequence of (status, headers, body) responses
+    """
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status, headers, body = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def get_headers(remaining, limit=5000, reset=1100):
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Reset": str(reset),
+    }
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_get_family(self):
+        self.assertEqual("graphql", get_family("https://api.github.com/graphql"))
+        self.assertEqual(
+            "core", get_family("https://api.github.com/repos/a/b/contributors")
+        )
+        self.assertIsNone(get_family("https://github.com/a/b"))
+
+    def test_is_rate_limited(self):
+        self.assertTrue(is_rate_limited(429, {}))
+        self.assertTrue(is_rate_limited(403, {"Retry-After": "30"}))
+        self.assertTrue(
+            is_rate_limited(403, {}, b"You have exceeded a secondary rate limit")
+        )
+        self.assertTrue(is_rate_limited(403, get_headers(0)))
+        self.assertFalse(
+            is_rate_limited(403, get_headers(10), b"Resource not accessible")
+        )
+        self.assertTrue(
+            is_rate_limited(200, {}, b'{"errors": [{"type": "RATE_LIMITED"}]}')
+        )
+        self.assertFalse(is_rate_limited(200, get_headers(0), b'{"data": {}}'))
+
+    def test_unknown_and_plentiful_budgets_are_not_paced(self):
+        limiter = RateLimiter(clock=FakeClock())
+        self.assertEqual(0, limiter.reserve(None))
+        self.assertEqual(0, limiter.reserve("core"))
+        limiter.update("core", get_headers(4000))
+        self.assertEqual([0] * 10, [limiter.reserve("core") for _ in range(10)])
+
+    def test_low_budgets_are_paced_until_reset(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+        # 10 requests left for the next 100 seconds
+        limiter.update("graphql", get_headers(10, reset=clock.now + 100))
+        delays = [limiter.reserve("graphql") for _ in range(3)]
+        self.assertEqual(0, delays[0])
+        self.assertAlmostEqual(10, delays[1])
+        self.assertAlmostEqual(10 + 100 / 9, delays[2])
+        # Other families have their own budgets
+        self.assertEqual(0, limiter.reserve("core"))
+
+    def test_exhausted_budgets_wait_for_reset(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+        limiter.update("core", get_headers(0, reset=clock.now + 300))
+        self.assertEqual(300, limiter.reserve("core"))
+        clock.now += 301
+        self.assertEqual(0, limiter.reserve("core"))
+
+    def test_back_off(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+        limiter.back_off("core", {"Retry-After": "30"}, 0)
+        self.assertEqual(30, limiter.reserve("core"))
+        limiter.back_off("graphql", {}, 2)
+        self.assertEqual(240, limiter.reserve("graphql"))
+
+    def test_session_retries_rate_limited_requests(self):
+        limiter = RateLimiter()
+        adapter = CannedAdapter(
+            [
+                (
+                    403,
+                    {"Retry-After": "0"},
+                    b"You have exceeded a secondary rate limit",
+                ),
+                (200, get_headers(4999), b"[]"),
+            ]
+        )
+        session = PooledSession(rate_limiter=limiter)
+        session.mount("https://api.github.com", adapter)
+        response = session.get("https://api.github.com/repos/a/b/contributors")
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(adapter.requests))
+        self.assertEqual(4999, limiter.budgets["core"].remaining)
+
+    def test_session_returns_other_errors(self):
+        adapter = CannedAdapter([(403, get_headers(10), b"Resource not accessible")])
+        session = PooledSession(rate_limiter=RateLimiter())
+        session.mount("https://api.github.com", adapter)
+        self.assertEqual(
+            403, session.get("https://api.github.com/repos/a/b/readme").status_code
+        )
+        self.assertEqual(1, len(adapter.requests))
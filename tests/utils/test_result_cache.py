@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from funderfinder.sources._finder import Finder
+from funderfinder.sources.gsoc import GSOCFinder
+from funderfinder.utils.result_cache import ResultCache, normalize_slug
+
+from ..context import funderfinder
+
+
+class VersionedFinder(Finder):
+    name = "Versioned"
+    version = "v1"
+
+    @classmethod
+    def get_cache_version(cls) -> str:
+        return cls.version
+
+
+class ExpiringFinder(Finder):
+    name = "Expiring"
+    cache_ttl = 0
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        VersionedFinder.version = "v1"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "results.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_normalize_slug(self):
+        for slug in ["NumPy/numpy", " numpy/numpy/ ", "https://github.com/numpy/numpy"]:
+            self.assertEqual("numpy/numpy", normalize_slug(slug))
+
+    def test_memory_cache(self):
+        cache = ResultCache()
+        self.assertIsNone(cache.get(VersionedFinder, "numpy/numpy"))
+        cache.set(VersionedFinder, "numpy/numpy", [{"is_funded": True}])
+        self.assertEqual(
+            [{"is_funded": True}], cache.get(VersionedFinder, "NumPy/numpy")
+        )
+        # Callers get their own copy of the results
+        cache.get(VersionedFinder, "numpy/numpy")[0]["is_funded"] = False
+        self.assertEqual(
+            [{"is_funded": True}], cache.get(VersionedFinder, "numpy/numpy")
+        )
+        # Finders have separate entries
+        self.assertIsNone(cache.get(GSOCFinder, "numpy/numpy"))
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        cache = ResultCache(max_memory_entries=2)
+        for slug in ["a/a", "b/b"]:
+            cache.set(VersionedFinder, slug, [])
+        cache.get(VersionedFinder, "a/a")
+        cache.set(VersionedFinder, "c/c", [])
+        self.assertEqual([], cache.get(VersionedFinder, "a/a"))
+        self.assertIsNone(cache.get(VersionedFinder, "b/b"))
+
+    def test_sqlite_cache(self):
+        cache = ResultCache(self.path)
+        cache.set(VersionedFinder, "numpy/numpy", [{"is_funded": True}])
+        cache.set(VersionedFinder, "psf/requests", [])
+        cache.close()
+        cache = ResultCache(self.path, max_memory_entries=1)
+        self.assertEqual(
+            [{"is_funded": True}], cache.get(VersionedFinder, "numpy/numpy")
+        )
+        self.assertEqual([], cache.get(VersionedFinder, "psf/requests"))
+        cache.close()
+
+    def test_expired_results_are_ignored(self):
+        cache = ResultCache()
+        cache.set(ExpiringFinder, "numpy/numpy", [])
+        self.assertIsNone(cache.get(ExpiringFinder, "numpy/numpy"))
+
+    def test_results_from_old_datasets_are_ignored(self):
+        cache = ResultCache(self.path)
+        cache.set(VersionedFinder, "numpy/numpy", [])
+        VersionedFinder.version = "v2"
+        self.assertIsNone(cache.get(VersionedFinder, "numpy/numpy"))
+        cache.close()
+
+    def test_dataset_finders_are_versioned(self):
+        self.assertEqual("", Finder.get_cache_version())
+        version = GSOCFinder.get_cache_version()
+        self.assertEqual(64, len(version))
+        self.assertEqual(version, GSOCFinder.get_cache_version())
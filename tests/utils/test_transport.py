@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from funderfinder.utils.transport import (
+    PooledSession,
+    aiter_text,
+    async_session,
+    create_async_session,
+    get_session,
+    iter_text,
+)
+
+from ..context import funderfinder
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        body = b"ok"
+        if self.path == "/large":
+            body = "d\u00e9j\u00e0 vu ".encode("utf-8") * 100000
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        cls.server.client_ports = set()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.server.client_ports.clear()
+
+    def test_get_session_is_shared(self):
+        self.assertIs(get_session(), get_session())
+
+    def test_session_reuses_connections(self):
+        session = PooledSession()
+        for _ in range(5):
+            self.assertEqual("ok", session.get(self.url).text)
+        self.assertEqual(1, len(self.server.client_ports))
+
+    def test_session_default_timeout(self):
+        session = PooledSession(timeout=3)
+        response = session.get(self.url)
+        self.assertTrue(response.ok)
+        self.assertIn("gzip", response.request.headers["Accept-Encoding"])
+
+    def test_async_session_reuses_connections(self):
+        async def get_many():
+            async with create_async_session() as session:
+                for _ in range(5):
+                    async with session.get(self.url) as response:
+                        self.assertEqual("ok", await response.text())
+
+        asyncio.run(get_many())
+        self.assertEqual(1, len(self.server.client_ports))
+
+    def test_async_session_scope(self):
+        async def check_scope():
+            async with create_async_session() as outer:
+                async with async_session(outer) as session:
+                    self.assertIs(outer, session)
+                self.assertFalse(outer.closed)
+            async with async_session() as session:
+                pass
+            self.assertTrue(session.closed)
+
+        asyncio.run(check_scope())
+
+    def test_iter_text(self):
+        session = PooledSession()
+        with session.get(f"{self.url}large", stream=True) as response:
+            # An odd chunk size splits multibyte characters across chunks
+            text = "".join(iter_text(response, max_bytes=10**7, chunk_size=999))
+        self.assertEqual("d\u00e9j\u00e0 vu " * 100000, text)
+        with session.get(f"{self.url}large", stream=True) as response:
+            text = "".join(iter_text(response, max_bytes=2000, chunk_size=1000))
+        self.assertEqual("d\u00e9j\u00e0 vu " * 200, text)
+
+    def test_aiter_text(self):
+        async def read(max_bytes):
+            async with create_async_session() as session:
+                async with session.get(f"{self.url}large") as response:
+                    return "".join(
+                        [chunk async for chunk in aiter_text(response, max_bytes, 999)]
+                    )
+
+        self.assertEqual("d\u00e9j\u00e0 vu " * 100000, asyncio.run(read(10**7)))
+        self.assertEqual(1998, len(asyncio.run(read(1998)).encode("utf-8")))
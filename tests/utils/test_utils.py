@@ -0,0 +1,42 @@
+import unittest
+
+from funderfinder.utils.utils import extract_github_links, find_github_repo
+
+from ..context import funderfinder
+
+
+class TestUtils(unittest.TestCase):
+    def test_extract_github_links(self):
+        text = """
+        <a href="https://github.com/an-owner/a-repo/issues">Issues</a>
+        <a href="https://gist.github.com/a-user/0123abcd">A gist</a>
+        <a href="https://GitHub.com/another-owner">Another owner</a>
+        See https://github.com/an-owner/a-repo. and https://github.com/a-third-owner/repo.git
+        """
+        self.assertEqual(
+            (
+                ["an-owner/a-repo", "a-third-owner/repo.git"],
+                ["another-owner"],
+            ),
+            extract_github_links(text),
+        )
+
+    def test_extract_github_links_owners_only(self):
+        self.assertEqual(
+            ([], ["EOL"]),
+            extract_github_links("code is located at https://github.com/EOL, and"),
+        )
+
+    def test_find_github_repo(self):
+        self.assertEqual(
+            "an-owner/a-repo",
+            find_github_repo(
+                "https://github.com/an-owner https://github.com/an-owner/a-repo "
+                "https://github.com/another-owner/another-repo"
+            ),
+        )
+        self.assertIsNone(find_github_repo("https://github.com/an-owner"))
+
+
+if __name__ == "__main__":
+    unittest.main()